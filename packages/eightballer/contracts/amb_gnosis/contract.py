@@ -825,3 +825,40 @@ class AmbGnosis(Contract):
             "from_block": from_block,
             "to_block": to_block,
         }
+
+    @classmethod
+    def get_collected_signatures_events(
+        cls,
+        ledger_api: LedgerApi,
+        contract_address: str,
+        authority_responsible_for_relay: Address = None,
+        message_hash: str | None = None,
+        number_of_collected_signatures: int | None = None,
+        look_back: int = 1000,
+        to_block: str = "latest",
+        from_block: int | None = None,
+    ) -> JSONLike:
+        """Handler method for the 'CollectedSignatures' events ."""
+
+        instance = cls.get_instance(ledger_api, contract_address)
+        arg_filters = {
+            key: value
+            for key, value in (
+                ("authorityResponsibleForRelay", authority_responsible_for_relay),
+                ("messageHash", message_hash),
+                ("NumberOfCollectedSignatures", number_of_collected_signatures),
+            )
+            if value is not None
+        }
+        to_block = to_block or "latest"
+        if to_block == "latest":
+            to_block = ledger_api.api.eth.block_number
+        from_block = from_block or (to_block - look_back)
+        result = instance.events.CollectedSignatures().get_logs(
+            fromBlock=from_block, toBlock=to_block, argument_filters=arg_filters
+        )
+        return {
+            "events": result,
+            "from_block": from_block,
+            "to_block": to_block,
+        }
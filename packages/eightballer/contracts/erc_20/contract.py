@@ -146,3 +146,36 @@ class Erc20(Contract):
         """Handler method for the 'approve' requests."""
         instance = cls.get_instance(ledger_api, contract_address)
         return instance.functions.approve(to, value)
+
+    @classmethod
+    def get_transfer_events(
+        cls,
+        ledger_api: LedgerApi,
+        contract_address: str,
+        from_address: Address | list[Address] | None = None,
+        to_address: Address | list[Address] | None = None,
+        value: int | None = None,
+        look_back: int = 1000,
+        to_block: str = "latest",
+        from_block: int | None = None,
+    ) -> JSONLike:
+        """Handler method for the 'Transfer' events ."""
+
+        instance = cls.get_instance(ledger_api, contract_address)
+        arg_filters = {
+            key: value
+            for key, value in (("from", from_address), ("to", to_address), ("value", value))
+            if value is not None
+        }
+        to_block = to_block or "latest"
+        if to_block == "latest":
+            to_block = ledger_api.api.eth.block_number
+        from_block = from_block or (to_block - look_back)
+        result = instance.events.Transfer().get_logs(
+            fromBlock=from_block, toBlock=to_block, argument_filters=arg_filters
+        )
+        return {
+            "events": result,
+            "from_block": from_block,
+            "to_block": to_block,
+        }
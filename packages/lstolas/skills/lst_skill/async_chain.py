@@ -0,0 +1,236 @@
+"""Asynchronous chain access on a dedicated event loop, for reads the behaviours pick up on later ticks."""
+
+import time
+import asyncio
+import threading
+from typing import Any
+from inspect import isawaitable
+from dataclasses import field, dataclass
+from collections.abc import Callable, Coroutine
+from concurrent.futures import Future
+
+from web3 import AsyncWeb3, AsyncHTTPProvider
+from web3.types import RPCEndpoint, RPCResponse
+from eth_utils.address import to_checksum_address
+
+from packages.lstolas.skills.lst_skill.metrics import RPC_ERRORS, RPC_SECONDS, RPC_REQUESTS, Metrics, request_contract
+from packages.lstolas.skills.lst_skill.rate_limit import TokenBucket, classify
+from packages.lstolas.skills.lst_skill.view_cache import CachedViews
+
+
+class PendingResult:
+    """The result of an async contract call, which can be indexed before it resolves."""
+
+    def __init__(self, awaitable: Any, path: tuple = ()) -> None:
+        """Start the call, unless it is already started."""
+        self._future = asyncio.ensure_future(awaitable)
+        self._path = path
+
+    def __getitem__(self, index: Any) -> "PendingResult":
+        """Get an item of the result, once it resolves."""
+        return PendingResult(self._future, (*self._path, index))
+
+    def __await__(self) -> Any:
+        """Wait for the result."""
+        result = yield from self._future.__await__()
+        for index in self._path:
+            result = result[index]
+        return result
+
+
+class _AsyncCall:
+    def __init__(self, function: Any) -> None:
+        self._function = function
+
+    def call(self, *args: Any, **kwargs: Any) -> PendingResult:
+        return PendingResult(self._function.call(*args, **kwargs))
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._function, name)
+
+
+class _AsyncFunctions:
+    def __init__(self, functions: Any) -> None:
+        self._functions = functions
+
+    def __getattr__(self, name: str) -> Callable[..., _AsyncCall]:
+        function = getattr(self._functions, name)
+        return lambda *args, **kwargs: _AsyncCall(function(*args, **kwargs))
+
+
+class _AsyncInstance:
+    """An AsyncWeb3 contract whose calls start as soon as the generated wrappers make them."""
+
+    def __init__(self, contract: Any) -> None:
+        self._contract = contract
+        self.functions = _AsyncFunctions(contract.functions)
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._contract, name)
+
+
+@dataclass
+class AsyncLimits:
+    """What the requests of an async ledger api share with the synchronous client of its endpoint."""
+
+    max_in_flight: int
+    bucket: TokenBucket | None = None  # the rate limit of the endpoint
+    metrics: Metrics | None = None
+    chain: str = ""
+    contracts: dict[str, str] = field(default_factory=dict)
+
+
+class LimitedAsyncHTTPProvider(AsyncHTTPProvider):
+    """An async provider bounding the requests in flight, and drawing them from the rate limit of the endpoint.
+
+    The tokens come from the bucket the synchronous client of the endpoint draws from, so async reads
+    queue behind its transactions and receipts. A request waits for its token in the default
+    executor, as the bucket blocks, and the semaphore bounds the threads waiting.
+    """
+
+    def __init__(self, endpoint: str, limits: AsyncLimits) -> None:
+        """Initialize the provider."""
+        super().__init__(endpoint)
+        self.limits = limits
+        self._in_flight = asyncio.Semaphore(limits.max_in_flight)
+
+    async def make_request(self, method: RPCEndpoint, params: Any) -> RPCResponse:
+        """Send a request once a slot and a token are free, recording it like the synchronous requests."""
+        limits = self.limits
+        async with self._in_flight:
+            if limits.bucket is not None:
+                await asyncio.get_running_loop().run_in_executor(None, limits.bucket.acquire, classify(method))
+            if limits.metrics is None:
+                return await super().make_request(method, params)
+            labels = {
+                "chain": limits.chain,
+                "method": method,
+                "contract": request_contract(method, params, limits.contracts),
+            }
+            started = time.perf_counter()
+            try:
+                response = await super().make_request(method, params)
+            except Exception:
+                limits.metrics.inc(RPC_ERRORS, **labels)
+                raise
+            finally:
+                limits.metrics.observe(RPC_SECONDS, time.perf_counter() - started, **labels)
+                limits.metrics.inc(RPC_REQUESTS, **labels)
+            if "error" in response:
+                limits.metrics.inc(RPC_ERRORS, **labels)
+            return response
+
+
+class AsyncLedgerApi:
+    """The AsyncWeb3 counterpart of a ledger api, as far as the generated contract wrappers use it."""
+
+    identifier = "ethereum"
+
+    def __init__(self, endpoint: str, limits: AsyncLimits | None = None) -> None:
+        """Initialize the ledger api, sending its requests within the limits if any."""
+        provider = AsyncHTTPProvider(endpoint) if limits is None else LimitedAsyncHTTPProvider(endpoint, limits)
+        self.api = AsyncWeb3(provider)
+        self._instances: dict[tuple[str, int], tuple[dict, _AsyncInstance]] = {}
+
+    def get_contract_instance(self, contract_interface: dict[str, str], contract_address: str) -> _AsyncInstance:
+        """Get the instance of a contract, built once per address and interface."""
+        address = to_checksum_address(contract_address)
+        key = (address, id(contract_interface))
+        entry = self._instances.get(key)
+        if entry is None or entry[0] is not contract_interface:
+            contract = self.api.eth.contract(address=address, abi=contract_interface["abi"])
+            entry = self._instances[key] = (contract_interface, _AsyncInstance(contract))
+        return entry[1]
+
+
+class AsyncContract:
+    """Coroutine versions of the methods of a generated contract wrapper.
+
+    The generated method runs unchanged against an `AsyncLedgerApi`: the calls it makes start
+    right away, and the values of the dict it returns are awaited, so `await
+    contract.ts_checkpoint(address)` gets `{"int": ...}` like the synchronous method does.
+    """
+
+    def __init__(self, contract: Any, ledger_api: AsyncLedgerApi) -> None:
+        """Initialize the wrapper, unwrapping a contract read through the view cache."""
+        self._contract = contract._contract if isinstance(contract, CachedViews) else contract  # noqa: SLF001
+        self._ledger_api = ledger_api
+
+    def __getattr__(self, name: str) -> Callable[..., Coroutine[Any, Any, dict]]:
+        """Get the coroutine version of a method of the wrapper."""
+        method = getattr(self._contract, name)
+
+        async def call(contract_address: str, *args: Any, **kwargs: Any) -> dict:
+            result = method(self._ledger_api, contract_address, *args, **kwargs)
+            return {key: await value if isawaitable(value) else value for key, value in result.items()}
+
+        return call
+
+
+class AsyncChain:
+    """An event loop in a background thread, running the async chain reads of the behaviours.
+
+    Behaviours `submit` a coroutine, or `poll` one by key from tick to tick: the first poll submits
+    it and every poll returns None until it resolves, so hundreds of reads are queued on one
+    thread while the behaviour thread never waits on the network. With `limits` for a chain, its
+    requests share the rate limit and metrics of the synchronous client of the endpoint, and at most
+    `max_in_flight` of them are sent at once. They do not go through the pool or the cassette, so it
+    only serves the reads enabled by `async_reads`.
+    """
+
+    def __init__(self, endpoints: dict[str, str], limits: dict[str, AsyncLimits] | None = None) -> None:
+        """Initialize the chain access, with an endpoint and optionally the limits of its requests per chain name."""
+        self.endpoints = endpoints
+        self.limits = limits or {}
+        self._ledger_apis: dict[str, AsyncLedgerApi] = {}
+        self._pending: dict[str, Future] = {}
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._thread: threading.Thread | None = None
+
+    def start(self) -> None:
+        """Start the event loop in a background thread."""
+        if self._thread is not None:
+            return
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Cancel the pending coroutines and stop the event loop."""
+        if self._thread is None or self._loop is None:
+            return
+        for future in self._pending.values():
+            future.cancel()
+        self._pending.clear()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(timeout=5)
+        self._thread = None
+
+    def ledger_api(self, chain: str) -> AsyncLedgerApi:
+        """Get the async ledger api of a chain."""
+        if chain not in self._ledger_apis:
+            self._ledger_apis[chain] = AsyncLedgerApi(self.endpoints[chain], self.limits.get(chain))
+        return self._ledger_apis[chain]
+
+    def contract(self, contract: Any, chain: str) -> AsyncContract:
+        """Get the coroutine versions of the methods of a contract wrapper on a chain."""
+        return AsyncContract(contract, self.ledger_api(chain))
+
+    def submit(self, coroutine: Coroutine) -> Future:
+        """Run a coroutine on the event loop."""
+        self.start()
+        return asyncio.run_coroutine_threadsafe(coroutine, self._loop)  # type: ignore
+
+    def poll(self, key: str, coroutine: Callable[[], Coroutine]) -> Any:
+        """Get the result of the coroutine submitted under a key, submitting it if none is pending.
+
+        Returns None while it runs. An exception it raised is raised here once.
+        """
+        future = self._pending.get(key)
+        if future is None:
+            self._pending[key] = self.submit(coroutine())
+            return None
+        if not future.done():
+            return None
+        del self._pending[key]
+        return future.result()
@@ -24,6 +24,7 @@ from typing import Any
 
 from aea.skills.behaviours import FSMBehaviour
 
+from packages.lstolas.skills.lst_skill.metrics import ACT_SECONDS
 from packages.lstolas.skills.lst_skill.behaviours_classes.error_rounds import HandledErrorRound, UnHandledErrorRound
 from packages.lstolas.skills.lst_skill.behaviours_classes.redeem_round import RedeemRound
 from packages.lstolas.skills.lst_skill.behaviours_classes.waiting_round import WaitingRound
@@ -237,9 +238,17 @@ class LstabciappFsmBehaviour(FSMBehaviour, BaseState):
         """Implement the teardown."""
         self.context.logger.info("Tearing down Lstabciapp FSM behaviour.")
 
+    @property
+    def round_name(self) -> str:
+        """The name of the round acting, as listed in the states of the fsm."""
+        state = self.get_state(self.current) if self.current is not None else None
+        return state._state.value if isinstance(state, BaseState) else "none"  # noqa: SLF001
+
     def act(self) -> None:
-        """Implement the act."""
-        super().act()
+        """Implement the act, timing the act of the current state and pushing the metrics recorded meanwhile."""
+        with self.strategy.metrics.timed(ACT_SECONDS, state=self.round_name):
+            super().act()
+        self.strategy.push_metrics()
         if self.current is None:
             self.context.logger.info("No state to act on.")
             self.terminate()
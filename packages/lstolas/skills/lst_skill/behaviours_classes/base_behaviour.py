@@ -9,6 +9,7 @@ from aea.contracts.base import Contract
 from aea.skills.behaviours import State
 
 from packages.lstolas.skills.lst_skill.models import LstStrategy, TransactionSettler
+from packages.lstolas.skills.lst_skill.staked_services import StakedServices
 from packages.eightballer.protocols.user_interaction.message import UserInteractionMessage
 from packages.eightballer.protocols.user_interaction.dialogues import UserInteractionDialogues
 from packages.eightballer.connections.apprise_wrapper.connection import CONNECTION_ID as APPRISE_PUBLIC_ID
@@ -91,6 +92,19 @@ class BaseState(State, ABC):
             abi = json.load(json_file)
         return abi.get("abi", [])
 
+    def sync_staked_services(self) -> StakedServices:
+        """Bring the services staked through the staking manager up to the latest confirmed block."""
+        services = self.strategy.staked_services
+        indexer = self.strategy.layer_2_indexer
+        to_block = indexer.begin(services)
+        if to_block is None:
+            return services
+        address, from_block = self.strategy.lst_staking_manager_address, services.last_block + 1
+        if indexer.may_have_logs(address, from_block, to_block.number):
+            services.apply_events(indexer.logs.iter_events(address, "Staked", from_block, to_block))
+        indexer.commit(services, to_block)
+        return services
+
     def send_notification_to_user(self, msg: str, attach: str | None = None, title: str | None = None) -> None:
         """Send notification to user."""
         dialogues = cast(UserInteractionDialogues, self.context.user_interaction_dialogues)
@@ -1,5 +1,6 @@
 """Check any work round behaviour."""
 
+from packages.lstolas.skills.lst_skill.metrics import WORK_DISCOVERED, IS_TRIGGERED_SECONDS
 from packages.lstolas.skills.lst_skill.behaviours_classes.base_behaviour import (
     BaseState,
     LstabciappEvents,
@@ -32,7 +33,10 @@ class CheckAnyWorkRound(BaseState):
         for behaviour, event in self.conditional_behaviours_to_events:
             instance: BaseState = self.context.behaviours.main.get_state(behaviour.value)
             self.log.info(f"Checking condition for {behaviour}...")
-            if instance.is_triggered():
+            with self.strategy.metrics.timed(IS_TRIGGERED_SECONDS, state=behaviour.value):
+                triggered = instance.is_triggered()
+            if triggered:
+                self.strategy.metrics.inc(WORK_DISCOVERED, state=behaviour.value)
                 self._event = event
                 self._is_done = True
                 return
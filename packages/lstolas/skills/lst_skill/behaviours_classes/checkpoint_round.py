@@ -1,10 +1,10 @@
 """Checkpoint Round behaviour class."""
 
+import asyncio
 from typing import cast
 
 from aea_ledger_ethereum import Address
 
-from packages.lstolas.skills.lst_skill.events_processing import EventsPayload
 from packages.lstolas.skills.lst_skill.behaviours_classes.base_behaviour import (
     BaseState,
     LstabciappEvents,
@@ -37,17 +37,18 @@ class CheckpointRound(BaseState):
 
     def is_triggered(self) -> bool:
         """Check whether the behaviour is triggered."""
-        current_block_ts = int(self.strategy.layer_2_api.api.eth.get_block("latest").timestamp)  # type: ignore
-        raw_events = self.strategy.lst_staking_manager_contract.get_staked_events(
-            self.strategy.layer_2_api,
-            self.strategy.lst_staking_manager_address,
-            from_block=17497117,
-        )
-
-        all_events = EventsPayload(dictionary=raw_events)
-
-        unique_staking_proxies = {event.args.stakingProxy for event in all_events.events}
+        unique_staking_proxies = self.sync_staked_services().staking_proxies
+        if self.strategy.async_reads:
+            # the reads of every staking proxy are in flight at once, and picked up on a later tick
+            due = self.strategy.async_chain.poll(
+                "checkpoints_due", lambda: self.get_checkpoints_due(unique_staking_proxies)
+            )
+            if due is None:
+                return False
+            self.callable_staking_proxies.extend(due)
+            return len(self.callable_staking_proxies) > 0
 
+        current_block_ts = int(self.strategy.layer_2_api.api.eth.get_block("latest").timestamp)  # type: ignore
         for staking_proxy in unique_staking_proxies:
             last_checkpoint = cast(
                 int,
@@ -68,3 +69,21 @@ class CheckpointRound(BaseState):
                 self.log.info(f"Checkpoint needed for staking proxy {staking_proxy}.")
                 self.callable_staking_proxies.append(staking_proxy)
         return len(self.callable_staking_proxies) > 0
+
+    async def get_checkpoints_due(self, staking_proxies: list[Address]) -> list[Address]:
+        """Get the staking proxies whose liveness period elapsed since their last checkpoint."""
+        chain = self.strategy.async_chain
+        contract = chain.contract(self.strategy.lst_staking_token_locked, "layer_2")
+        block, *readings = await asyncio.gather(
+            chain.ledger_api("layer_2").api.eth.get_block("latest"),
+            *(
+                asyncio.gather(contract.ts_checkpoint(staking_proxy), contract.liveness_period(staking_proxy))
+                for staking_proxy in staking_proxies
+            ),
+        )
+        due = []
+        for staking_proxy, (last_checkpoint, liveness_period) in zip(staking_proxies, readings, strict=True):
+            if int(block["timestamp"]) - last_checkpoint["int"] > liveness_period["int"]:
+                self.log.info(f"Checkpoint needed for staking proxy {staking_proxy}.")
+                due.append(staking_proxy)
+        return due
@@ -1,15 +1,17 @@
 """FinalizeBridgedTokensRound class module."""
 
+import time
 from typing import cast
 
 from pydantic import BaseModel
-from eth_utils.abi import event_abi_to_log_topic
 from web3.exceptions import ContractLogicError
-from web3._utils.events import get_event_data  # noqa: PLC2701
+from eth_utils.crypto import keccak
 from aea_ledger_ethereum import HexBytes
 from eth_utils.conversions import to_hex
 
-from packages.lstolas.skills.lst_skill.events_processing import Event, EventsPayload, hexify
+from packages.lstolas.skills.lst_skill.multicall import aggregate, decode_bool, encode_call
+from packages.lstolas.skills.lst_skill.bridge_messages import BridgeMessages
+from packages.lstolas.skills.lst_skill.signature_readiness import SignatureReadiness
 from packages.lstolas.skills.lst_skill.behaviours_classes.base_behaviour import (
     BaseState,
     LstabciappEvents,
@@ -56,74 +58,108 @@ class ClaimBridgedTokensRound(BaseState):
     def is_triggered(self) -> bool:
         """Check if the state is triggered."""
         # we check if there are bridged tokens to be finalised here;
+        messages = self.strategy.bridge_messages
+        self.sync_bridge_messages(messages)
+        self.log.debug(f"Found {len(messages.pending)} L2 to L1 messages.")
+        self.log.debug("Checking for any messages to be finalized...")
+        # check if the messages have been executed on the layer 1, in a single call
         pending_bridges = {}
+        for (message_id, encoded_data), is_relayed in zip(
+            messages.pending.items(), self.get_relayed_states(list(messages.pending)), strict=True
+        ):
+            if is_relayed:
+                self.log.debug(f"Message id {message_id} was executed on L1.")
+                continue
+            self.log.info(f"No L1 execution found for message id {message_id}. It is pending.")
+            pending_bridges[message_id] = encoded_data
+        for message_id in set(messages.pending) - set(pending_bridges):
+            messages.remove(message_id)
+        messages.save()
 
-        events = EventsPayload(
-            dictionary=self.strategy.lst_collector_contract.get_tokens_relayed_events(
-                self.strategy.layer_2_api, self.strategy.lst_collector_address, from_block=17590111
-            ),
-        )
-        l2_to_l1_events = {}
-        for event in events.events:
-            individual_events = self._decode_event_data(event)
-            for individual_event in individual_events:
-                l2_to_l1_events[individual_event.args.messageId] = individual_event
-
-        # we now check if there are any events to be processed
-        self.log.debug(f"Found {len(l2_to_l1_events)} L2 to L1 events.")
-        self.log.debug("Checking for any events to be finalized...")
-        for message_id in l2_to_l1_events:  # noqa: PLC0206
-            # check if the event has been processed on the layer 1
-            # we search for events on the l1 for the same message id
-            l1_events = EventsPayload(
-                dictionary=self.strategy.amb_mainnet_contract.get_relayed_message_events(
-                    self.strategy.layer_1_api,
-                    self.strategy.layer_1_amb_home,
-                    from_block=9123229,
-                    message_id=message_id,
-                ),
-            )
-
-            # sleep to avoid silly rate limits
-            if not l1_events.events:
-                self.log.info(f"No L1 event found for message id {message_id}. It is pending.")
-                pending_bridges[message_id] = l2_to_l1_events[message_id]
         # we now check if the bridge can be finalized
-        for message_id, event in pending_bridges.items():
-            try:
-                signature = cast(
-                    HexBytes,
-                    self.strategy.layer_2_amb_helper_contract.get_signatures(
-                        self.strategy.layer_2_api, self.strategy.layer_2_amb_helper, event.args.encodedData
-                    )["str"],
-                ).hex()
-                if signature and len(signature) > 2:
-                    self.log.info(f"Bridge can be finalized for message id {message_id}.")
-                    self.pending_claims.append(
-                        PendingClaim(
-                            data=event.args.encodedData,
-                            signatures="0x" + signature,
-                        )
-                    )
-            except ContractLogicError as e:
-                self.log.debug(f"Error while fetching signatures: {e}")
+        readiness = self.strategy.signature_readiness
+        message_hashes = {
+            message_id: to_hex(keccak(hexstr=encoded_data)) for message_id, encoded_data in pending_bridges.items()
+        }
+        self.sync_signature_readiness(readiness, set(message_hashes.values()))
+        now = time.time()
+        for message_id, encoded_data in pending_bridges.items():
+            message_hash = message_hashes[message_id]
+            if not readiness.should_check(message_hash, now):
+                self.log.debug(f"Signatures for message id {message_id} are not collected yet.")
+                continue
+            signatures = self.get_signatures(encoded_data)
+            if signatures is None:
+                readiness.on_not_ready(message_hash, now)
                 continue
+            self.log.info(f"Bridge can be finalized for message id {message_id}.")
+            self.pending_claims.append(PendingClaim(data=encoded_data, signatures=signatures))
+        readiness.save()
         return len(self.pending_claims) > 0
 
-    def _decode_event_data(self, event: Event) -> list:
-        """Decode the events data.
-        1. get the transaction receipt.
-        2. get the message hash from the event.
-
-        """
-        receipt = self.strategy.layer_2_api.api.eth.get_transaction_receipt(event["transactionHash"])
-        amb_abi = self.load_abi(self.strategy.layer_2_amb_home_contract)
-        event_abis = [a for a in amb_abi if a.get("type") == "event"]
-        topic_to_eventabi = {to_hex(event_abi_to_log_topic(e)): e for e in event_abis}  # pyright: ignore
-        raw_logs = [log for log in receipt["logs"] if log["address"].lower() == self.strategy.layer_2_amb_home.lower()]
-        decoded_events = []
-        for raw_log in raw_logs:
-            event_abi = topic_to_eventabi[raw_log["topics"][0].hex()]  # pyright: ignore
-            decoded = get_event_data(self.strategy.layer_2_api.api.codec, event_abi, raw_log)
-            decoded_events.append(hexify(decoded))
-        return decoded_events
+    def sync_signature_readiness(self, readiness: SignatureReadiness, message_hashes: set[str]) -> None:
+        """Mark the pending messages whose signatures were collected since the last check."""
+        readiness.retain(message_hashes)
+        indexer = self.strategy.layer_2_indexer
+        to_block = indexer.begin(readiness)
+        if to_block is None:
+            return
+        from_block = readiness.last_block + 1
+        if (
+            readiness.last_block
+            and message_hashes
+            and indexer.may_have_logs(self.strategy.layer_2_amb_home, from_block, to_block.number)
+        ):
+            events = indexer.logs.iter_events(
+                self.strategy.layer_2_amb_home, "CollectedSignatures", from_block, to_block
+            )
+            for event in events:
+                message_hash = to_hex(event.args.messageHash)
+                if message_hash in message_hashes:
+                    readiness.on_collected_signatures(message_hash)
+        indexer.commit(readiness, to_block)
+
+    def get_signatures(self, encoded_data: str) -> str | None:
+        """Get the collected signatures of a message, or None if the validators have not signed it yet."""
+        try:
+            signatures = cast(
+                HexBytes,
+                self.strategy.layer_2_amb_helper_contract.get_signatures(
+                    self.strategy.layer_2_api, self.strategy.layer_2_amb_helper, encoded_data
+                )["str"],
+            )
+        except ContractLogicError as e:
+            self.log.debug(f"Error while fetching signatures: {e}")
+            return None
+        return to_hex(signatures) if signatures else None
+
+    def sync_bridge_messages(self, messages: BridgeMessages) -> None:
+        """Record the AMB messages sent in the `TokensRelayed` transactions of the collector."""
+        indexer = self.strategy.layer_2_indexer
+        to_block = indexer.begin(messages)
+        if to_block is None:
+            return
+        collector_address, from_block = self.strategy.lst_collector_address, messages.last_block + 1
+        if indexer.may_have_logs(collector_address, from_block, to_block.number):
+            messages.apply_events(
+                [
+                    *indexer.logs.iter_events(collector_address, "TokensRelayed", from_block, to_block),
+                    *indexer.logs.iter_events(
+                        self.strategy.layer_2_amb_home, "UserRequestForSignature", from_block, to_block
+                    ),
+                ]
+            )
+        indexer.commit(messages, to_block)
+
+    def get_relayed_states(self, message_ids: list[str]) -> list[bool | None]:
+        """Get whether each message was executed on layer 1, batched into one multicall."""
+        if not message_ids:
+            return []
+        amb = self.strategy.amb_mainnet_contract.get_instance(self.strategy.layer_1_api, self.strategy.layer_1_amb_home)
+        calls = [encode_call(amb, "relayedMessages", message_id) for message_id in message_ids]
+        return [
+            decode_bool(self.strategy.layer_1_api, result)
+            for result in aggregate(
+                self.strategy.multicall_contract, self.strategy.layer_1_api, self.strategy.multicall_address, calls
+            )
+        ]
@@ -5,7 +5,6 @@ from typing import Any
 from web3.exceptions import ContractLogicError, ContractCustomError
 from aea_ledger_ethereum import Address
 
-from packages.lstolas.skills.lst_skill.events_processing import EventsPayload
 from packages.lstolas.skills.lst_skill.behaviours_classes.base_behaviour import (
     BaseState,
     LstabciappEvents,
@@ -38,19 +37,10 @@ class ClaimRewardTokensRound(BaseState):
 
     def is_triggered(self) -> bool:
         """Check whether the behaviour is triggered."""
-        raw_events = self.strategy.lst_staking_manager_contract.get_staked_events(
-            self.strategy.layer_2_api,
-            self.strategy.lst_staking_manager_address,
-            from_block=17497117,
-        )
-
-        all_events = EventsPayload(dictionary=raw_events)
-        unique_staking_proxies = set()
-        service_id_to_activity_module = {}
-
-        for event in all_events.events:
-            unique_staking_proxies.add(event.args.stakingProxy)
-            service_id_to_activity_module[event.args.serviceId] = event.args.activityModule
+        services = self.sync_staked_services()
+        service_id_to_activity_module = {
+            service_id: service.activity_module for service_id, service in services.services.items()
+        }
         for service_id, activity_module in service_id_to_activity_module.items():
             self.log.debug(
                 f"Checking claimable rewards for service ID {service_id} and activity module {activity_module}..."
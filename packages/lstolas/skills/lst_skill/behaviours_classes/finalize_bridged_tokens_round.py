@@ -1,7 +1,9 @@
 """Skill behaviour for finalizing bridged tokens round."""
 
 from typing import cast
+from collections.abc import Callable
 
+from packages.lstolas.skills.lst_skill.token_balances import TokenBalances
 from packages.lstolas.skills.lst_skill.behaviours_classes.base_behaviour import (
     BaseState,
     LstabciappEvents,
@@ -23,38 +25,72 @@ class FinalizeBridgedTokensRound(BaseState):
         if self.balance_of_unstake_relayer:
             self.log.info("Finalizing bridged tokens for unstake relayer contract...")
             results.append(
-                self.tx_settler.build_and_settle_transaction(
-                    contract_address=self.strategy.lst_unstake_relayer_address,
-                    function=self.strategy.lst_unstake_relayer_contract.relay,
-                    ledger_api=self.strategy.layer_1_api,
+                self.settle_and_empty(
+                    self.strategy.lst_unstake_relayer_address, self.strategy.lst_unstake_relayer_contract.relay
                 )
             )
         if self.balance_of_distributor:
             self.log.info("Finalizing bridged tokens for distributor contract...")
             results.append(
-                self.tx_settler.build_and_settle_transaction(
-                    contract_address=self.strategy.lst_distributor_address,
-                    function=self.strategy.lst_distributor_contract.distribute,
-                    ledger_api=self.strategy.layer_1_api,
+                self.settle_and_empty(
+                    self.strategy.lst_distributor_address, self.strategy.lst_distributor_contract.distribute
                 )
             )
+        self.strategy.layer_1_olas_balances.save()
         self._is_done = True
         self._event = LstabciappEvents.DONE if all(results) else LstabciappEvents.FATAL_ERROR
 
+    def settle_and_empty(self, contract_address: str, function: Callable) -> bool:
+        """Call a contract forwarding its OLAS, holding its mirrored balance at zero until the transfer is indexed."""
+        if not self.tx_settler.build_and_settle_transaction(
+            contract_address=contract_address,
+            function=function,
+            ledger_api=self.strategy.layer_1_api,
+        ):
+            return False
+        self.strategy.layer_1_olas_balances.on_emptied(contract_address, self.tx_settler.last_receipt["blockNumber"])
+        return True
+
     def is_triggered(self) -> bool:
         """Check if the condition is met to trigger this behaviour."""
         self.log.debug("Checking if there are bridged tokens to finalize...")
-        self.balance_of_unstake_relayer = self.get_token_balance(self.strategy.lst_unstake_relayer_address)
-        self.balance_of_distributor = self.get_token_balance(self.strategy.lst_distributor_address)
+        balances = self.strategy.layer_1_olas_balances
+        self.sync_token_balances(balances)
+        self.balance_of_unstake_relayer = balances.balance_of(self.strategy.lst_unstake_relayer_address)
+        self.balance_of_distributor = balances.balance_of(self.strategy.lst_distributor_address)
         return any([self.balance_of_unstake_relayer, self.balance_of_distributor])
 
-    def get_token_balance(self, contract_address) -> int:
-        """Get the balance of the contract."""
-        return cast(
-            int,
-            self.strategy.layer_1_olas_contract.balance_of(
-                self.strategy.layer_1_api,
-                self.strategy.layer_1_olas_token_address,
-                contract_address,
-            )["int"],
+    def sync_token_balances(self, balances: TokenBalances) -> None:
+        """Bring the OLAS balance mirror of the watched addresses up to the latest confirmed block."""
+        watched = self.strategy.layer_1_watched_addresses
+        indexer = self.strategy.layer_1_indexer
+        to_block = indexer.begin(balances)
+        if to_block is None:
+            return
+        token_address, from_block = self.strategy.layer_1_olas_token_address, balances.last_block + 1
+        if balances.last_block and indexer.may_have_logs(token_address, from_block, to_block.number):
+            balances.apply_events(indexer.logs.iter_events(token_address, "Transfer", from_block, to_block))
+
+        missing = balances.missing(watched)
+        interval = self.strategy.layer_1_balance_reconcile_interval
+        if missing or balances.needs_reconciliation(to_block.number, interval):
+            for address in watched:
+                balances.reconcile(address, self.get_token_balance(address, block_number=to_block.number))
+            balances.last_reconciled_block = to_block.number
+        indexer.commit(balances, to_block)
+
+    def get_token_balance(self, contract_address, block_number: int | None = None) -> int:
+        """Get the balance of the contract, as of the given block so it lines up with the indexed transfers."""
+        if block_number is None:
+            return cast(
+                int,
+                self.strategy.layer_1_olas_contract.balance_of(
+                    self.strategy.layer_1_api,
+                    self.strategy.layer_1_olas_token_address,
+                    contract_address,
+                )["int"],
+            )
+        instance = self.strategy.layer_1_olas_contract.get_instance(
+            self.strategy.layer_1_api, self.strategy.layer_1_olas_token_address
         )
+        return cast(int, instance.functions.balanceOf(contract_address).call(block_identifier=block_number))
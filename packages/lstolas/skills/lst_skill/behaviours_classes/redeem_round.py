@@ -1,10 +1,10 @@
 """Behaviour class for the state RedeemRound of the LstAbciApp."""
 
-from enum import Enum
+import heapq
+import operator
 
-from pydantic import BaseModel
-
-from packages.lstolas.skills.lst_skill.events_processing import EventsPayload
+from packages.lstolas.skills.lst_skill.multicall import aggregate, decode_bool, encode_call
+from packages.lstolas.skills.lst_skill.redeem_queue import RedeemQueue, QueuedRequest, OperationStatus
 from packages.lstolas.skills.lst_skill.behaviours_classes.base_behaviour import (
     BaseState,
     LstabciappEvents,
@@ -12,34 +12,12 @@ from packages.lstolas.skills.lst_skill.behaviours_classes.base_behaviour import
 )
 
 
-class OperationStatus(Enum):
-    """Status of the operation."""
-
-    NON_EXISTENT = 0
-    EXTERNAL_CALLED_FAILED = 1
-    INSUFFICIENT_OLAS_BALANCE = 2
-    UNSUPPORTED_OPERATION_TYPE = 3
-    CONTRACT_IS_PAUSED = 4
-
-
-class PendingRequest(BaseModel):
-    """A pending request to be processed."""
-
-    batch_hash: str
-    target: str
-    amount: int
-    operation: str
-    status: OperationStatus
-
-
 class RedeemRound(BaseState):
     """This class implements the behaviour of the state RedeemRound."""
 
     _state = LstabciappStates.REDEEMROUND
-    last_scanned_block: int | None = None
-    last_completed_block: int | None = None
 
-    events_to_process: list[PendingRequest] = []
+    events_to_process: list[QueuedRequest] = []
 
     def act(self) -> None:
         """Perform the act."""
@@ -61,80 +39,90 @@ class RedeemRound(BaseState):
                 failures.append(event)
             else:
                 self.log.info("Transaction successfully sent.")
+                self.strategy.redeem_queue.remove(event.queued_hash)
                 succeses.append(event)
+        self.strategy.redeem_queue.save()
         if failures:
             self.log.info(f"{len(failures)} requests failed to be processed. They will be retried in the next round.")
             self._event = LstabciappEvents.FATAL_ERROR
         else:
             self.log.info(f"All {len(succeses)} requests were successfully processed.")
             self._event = LstabciappEvents.DONE
-            self.last_completed_block = self.last_scanned_block
         self._is_done = True
 
     def is_triggered(self) -> bool:
         """Check if the condition is met to trigger this behaviour."""
         # we check if there are tokens to be redeemed here;
-        queued_requests = EventsPayload(
-            dictionary=self.strategy.lst_staking_processor_l2_contract.get_request_queued_events(
-                self.strategy.layer_2_api,
-                self.strategy.lst_staking_processor_l2_address,
-                from_block=17590111 if self.last_completed_block is None else self.last_completed_block,
+        self.events_to_process = []
+        queue = self.strategy.redeem_queue
+        self.sync_redeem_queue(queue)
+
+        for request in list(queue.pending.values()):
+            if OperationStatus(request.status) is not OperationStatus.INSUFFICIENT_OLAS_BALANCE:
+                # only requests waiting for OLAS can be redeemed, the others were stored by earlier versions
+                queue.remove(request.queued_hash)
+        open_requests = list(queue.pending.values())
+        if open_requests:
+            self.log.info(f"Found {len(open_requests)} open requests to be checked.")
+
+        # we now check if the requests are still queued, in a single call
+        for request, (is_still_queued, is_processed) in zip(
+            open_requests, self.get_request_states(open_requests), strict=True
+        ):
+            if is_still_queued:
+                self.events_to_process.append(request)
+                self.log.info(f"Request with batch hash {request.batch_hash} is still queued and will be processed.")
+            elif is_processed or is_still_queued is False:
+                self.log.info(f"Request with batch hash {request.batch_hash} is no longer queued and will be dropped.")
+                queue.remove(request.queued_hash)
+        queue.save()
+        return len(self.events_to_process) > 0
+
+    def sync_redeem_queue(self, queue: RedeemQueue) -> None:
+        """Apply the `RequestQueued` and `RequestExecuted` events confirmed since the last indexed block."""
+        indexer = self.strategy.layer_2_indexer
+        to_block = indexer.begin(queue)
+        if to_block is None:
+            return
+        address, from_block = self.strategy.lst_staking_processor_l2_address, queue.last_block + 1
+        if not indexer.may_have_logs(address, from_block, to_block.number):
+            indexer.commit(queue, to_block)
+            return
+        # both streams are in chain order, merged so that a request queued again after its execution stays open
+        events = heapq.merge(
+            indexer.logs.iter_events(address, "RequestQueued", from_block, to_block),
+            indexer.logs.iter_events(address, "RequestExecuted", from_block, to_block),
+            key=operator.attrgetter("blockNumber", "logIndex"),
+        )
+        queued, skipped = queue.apply_events(events)
+        for request in skipped:
+            self.log.info(
+                f"Request with batch hash {request.batch_hash} has status {OperationStatus(request.status)}"
+                " and will be skipped."
+            )
+        for request in queued:
+            self.send_notification_to_user(
+                title="Redeem request detected",
+                msg=f"Detected a redeem request with batch hash {request.batch_hash}. Attempting to process it.",
             )
+        indexer.commit(queue, to_block)
+
+    def get_request_states(self, requests: list[QueuedRequest]) -> list[tuple[bool | None, bool | None]]:
+        """Get the `queuedHashes` and `processedHashes` flags of each request, batched into one multicall."""
+        if not requests:
+            return []
+        processor = self.strategy.lst_staking_processor_l2_contract.get_instance(
+            self.strategy.layer_2_api, self.strategy.lst_staking_processor_l2_address
         )
-        self.last_scanned_block = queued_requests.to_block
-        if queued_requests.events:
-            self.log.info(f"Found {len(queued_requests.events)} queued requests to be processed.")
-            potential_events_to_process = [
-                PendingRequest(
-                    batch_hash="0x" + event.args.batchHash.hex(),
-                    target=event.args.target,
-                    amount=event.args.amount,
-                    operation="0x" + event.args.operation.hex(),
-                    status=OperationStatus(event.args.status),
-                )
-                for event in queued_requests.events
-            ]
-
-            for event in potential_events_to_process:
-                if event.status is not OperationStatus.INSUFFICIENT_OLAS_BALANCE:
-                    self.log.info(
-                        f"Request with batch hash {event.batch_hash} has status {event.status} and will be skipped."
-                    )
-                    continue
-                self.send_notification_to_user(
-                    title="Redeem request detected",
-                    msg=f"Detected a redeem request with batch hash {event.batch_hash}. Attempting to process it.",
-                )
-                self.context.logger.info(f"Checking on event: {event}")
-
-                queued_hash = (
-                    self.strategy.lst_staking_processor_l2_contract.get_queued_hash(
-                        self.strategy.layer_2_api,
-                        self.strategy.lst_staking_processor_l2_address,
-                        batch_hash=event.batch_hash,
-                        target=event.target,
-                        amount=event.amount,
-                        operation=event.operation,
-                    )
-                    .get("str")
-                    .hex()  # type: ignore
-                )
-                # we now check if the request is still queued
-                is_still_queued = self.strategy.lst_staking_processor_l2_contract.queued_hashes(
-                    self.strategy.layer_2_api,
-                    self.strategy.lst_staking_processor_l2_address,
-                    "0x" + queued_hash,
-                ).get("bool")
-                if is_still_queued:
-                    self.events_to_process.append(event)
-                    self.log.info(
-                        f"Request with batch hash {event.batch_hash} is state: {is_still_queued} and will be processed."
-                    )
-                else:
-                    self.log.info(
-                        f"Request with batch hash {event.batch_hash} is no longer queued and will be skipped."
-                    )
-            if self.events_to_process:
-                return True
-        self.last_completed_block = self.last_scanned_block
-        return False
+        calls = [
+            encode_call(processor, fn_name, request.queued_hash)
+            for request in requests
+            for fn_name in ("queuedHashes", "processedHashes")
+        ]
+        flags = [
+            decode_bool(self.strategy.layer_2_api, result)
+            for result in aggregate(
+                self.strategy.multicall_contract, self.strategy.layer_2_api, self.strategy.multicall_address, calls
+            )
+        ]
+        return list(zip(flags[::2], flags[1::2], strict=True))
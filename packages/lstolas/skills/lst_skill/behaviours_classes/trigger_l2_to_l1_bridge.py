@@ -1,11 +1,16 @@
 """Trigger the bridge from L2 to L1 if there are pending transfers."""
 
+import heapq
+import operator
 from enum import Enum
 from typing import cast
 
 from pydantic import BaseModel
 from aea_ledger_ethereum import Address
+from eth_utils.conversions import to_hex
 
+from packages.lstolas.skills.lst_skill.indexing import BlockRef
+from packages.lstolas.skills.lst_skill.collector_balances import CollectorBalances
 from packages.lstolas.skills.lst_skill.behaviours_classes.base_behaviour import (
     BaseState,
     LstabciappEvents,
@@ -57,26 +62,78 @@ class TriggerL2ToL1BridgeRound(BaseState):
             self._event = LstabciappEvents.FATAL_ERROR
         else:
             self._event = LstabciappEvents.DONE
+        # the relayed balance is read again from the contract on the next check
+        self.strategy.collector_balances.forget(self.current_operation.value)
+        self.strategy.collector_balances.save()
         self._is_done = True
 
     def is_triggered(self) -> bool:
         """Check if the state is triggered."""
         # Implement the condition to trigger this state
         self.current_balance, self.current_operation = None, None
-        min_olas_balance = self.get_min_olas_balance()
-        if not min_olas_balance:
+        balances = self.strategy.collector_balances
+        self.sync_collector_balances(balances)
+        if not balances.min_olas_balance:
             self.log.warning("No minimal OLAS balance set, skipping bridge trigger.")
             return False
 
-        for operation in TriggerOperations:
-            operation_balance = self.get_operation_balance(operation)
-            if operation_balance.balance >= min_olas_balance:
-                self.log.info(f"Operation {operation} triggered with balance of {operation_balance.balance}.")
-                self.current_operation = operation
-                self.current_balance = operation_balance
-                return True
-            self.log.debug(f"Operation {operation} has insufficient balance {operation_balance}.")
-        return False
+        triggered = balances.first_above_threshold([operation.value for operation in TriggerOperations])
+        if triggered is None:
+            self.log.debug(f"No operation has reached the minimal balance of {balances.min_olas_balance}.")
+            return False
+        operation, operation_balance = triggered
+        self.log.info(f"Operation {operation} triggered with balance of {operation_balance.balance}.")
+        self.current_operation = TriggerOperations(operation)
+        self.current_balance = BalanceResponse(
+            balance=operation_balance.balance, receiver=cast(Address, operation_balance.receiver)
+        )
+        return True
+
+    def sync_collector_balances(self, balances: CollectorBalances) -> None:
+        """Bring the collector balance mirror up to the latest confirmed block."""
+        indexer = self.strategy.layer_2_indexer
+        to_block = indexer.begin(balances)
+        if to_block is None:
+            return
+        from_block = balances.last_block + 1
+        if balances.last_block and indexer.may_have_logs(
+            self.strategy.lst_collector_address, from_block, to_block.number
+        ):
+            self.apply_collector_events(balances, from_block, to_block)
+        if balances.min_olas_balance is None:
+            balances.min_olas_balance = self.get_min_olas_balance()
+        for operation in balances.missing([operation.value for operation in TriggerOperations]):
+            operation_balance = self.get_operation_balance(TriggerOperations(operation))
+            balances.on_operation_receiver_balances_updated(
+                operation, operation_balance.receiver, operation_balance.balance
+            )
+        indexer.commit(balances, to_block)
+
+    def apply_collector_events(self, balances: CollectorBalances, from_block: int, to_block: BlockRef) -> None:
+        """Apply the collector events emitted in the block range to the mirror."""
+        logs, address = self.strategy.layer_2_indexer.logs, self.strategy.lst_collector_address
+        # both streams set receivers, merged in chain order so that the latest receiver of an operation is kept
+        operation_updates = heapq.merge(
+            logs.iter_events(address, "OperationReceiverBalancesUpdated", from_block, to_block),
+            logs.iter_events(address, "OperationReceiversSet", from_block, to_block),
+            key=operator.attrgetter("blockNumber", "logIndex"),
+        )
+        protocol_updates = logs.iter_events(address, "ProtocolBalanceUpdated", from_block, to_block)
+        implementation_updates = logs.iter_events(address, "ImplementationUpdated", from_block, to_block)
+        for event in operation_updates:
+            if event.event == "OperationReceiversSet":
+                balances.on_operation_receivers_set(
+                    [to_hex(operation) for operation in event.args.operations], list(event.args.receivers)
+                )
+                continue
+            balances.on_operation_receiver_balances_updated(
+                to_hex(event.args.operation), event.args.receiver, event.args.balance
+            )
+        for event in protocol_updates:
+            balances.on_protocol_balance_updated(event.args.protocolBalance)
+        if next(implementation_updates, None) is not None:
+            self.log.info("Collector implementation updated, refreshing its configuration.")
+            balances.on_implementation_updated()
 
     def get_min_olas_balance(self) -> int:
         """Get the minimal balance to trigger the bridge."""
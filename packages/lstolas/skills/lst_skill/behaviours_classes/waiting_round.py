@@ -1,7 +1,5 @@
 """Waiting Round Behaviour Class."""
 
-import time
-
 from packages.lstolas.skills.lst_skill.behaviours_classes.base_behaviour import (
     BaseState,
     LstabciappEvents,
@@ -17,6 +15,7 @@ class WaitingRound(BaseState):
     def act(self) -> None:
         """Perform the act."""
         self.log.info("No work to be done. Waiting...")
-        time.sleep(10)  # wait for 10 seconds before checking again
+        # wait for 10 seconds, or for the next block when subscribed to the chains
+        self.strategy.wait_for_new_block(timeout=10)
         self._is_done = True
         self._event = LstabciappEvents.DONE
@@ -0,0 +1,72 @@
+"""Pre-screening of block ranges against the `logsBloom` of their headers."""
+
+from typing import Any
+from collections.abc import Iterable
+
+from eth_utils.crypto import keccak
+from eth_utils.conversions import to_bytes
+
+from packages.lstolas.skills.lst_skill.rate_limit import RequestClass, send_batch, request_class
+
+
+BLOOM_BYTES = 256
+HEADER_BATCH_SIZE = 100  # headers requested per JSON-RPC batch
+
+
+def bloom_bits(value: bytes) -> tuple[tuple[int, int], ...]:
+    """Get the (byte index, mask) pairs a value sets in a 2048 bit logs bloom."""
+    digest = keccak(value)
+    bits = (((digest[i] << 8) | digest[i + 1]) & 2047 for i in (0, 2, 4))
+    return tuple((BLOOM_BYTES - 1 - bit // 8, 1 << (bit % 8)) for bit in bits)
+
+
+class BloomScreen:
+    """Tests logs blooms against a set of addresses and topics.
+
+    A bloom may match when it may contain one of the addresses and one of the topics. False
+    positives are possible, false negatives are not.
+    """
+
+    def __init__(self, addresses: Iterable[str], topics: Iterable[str]) -> None:
+        """Precompute the bits of the addresses and topics."""
+        self._addresses = [bloom_bits(to_bytes(hexstr=address)) for address in addresses]
+        self._topics = [bloom_bits(to_bytes(hexstr=topic)) for topic in topics]
+
+    @staticmethod
+    def _contains(bloom: bytes, bits: tuple[tuple[int, int], ...]) -> bool:
+        return all(bloom[index] & mask for index, mask in bits)
+
+    def may_match(self, bloom: bytes) -> bool:
+        """Whether a block with this bloom may contain a log of the watched addresses and topics."""
+        return any(self._contains(bloom, bits) for bits in self._addresses) and any(
+            self._contains(bloom, bits) for bits in self._topics
+        )
+
+
+def candidate_ranges(blocks: Iterable[int]) -> list[tuple[int, int]]:
+    """Merge block numbers into the contiguous ranges they form."""
+    ranges: list[tuple[int, int]] = []
+    for block in sorted(blocks):
+        if ranges and ranges[-1][1] == block - 1:
+            ranges[-1] = (ranges[-1][0], block)
+        else:
+            ranges.append((block, block))
+    return ranges
+
+
+def fetch_blooms(
+    ledger_api: Any, from_block: int, to_block: int, batch_size: int = HEADER_BATCH_SIZE
+) -> dict[int, bytes]:
+    """Get the logs bloom of every block in the range, with batched requests through the provider of the client."""
+    provider = ledger_api.api.provider
+    blooms: dict[int, bytes] = {}
+    with request_class(RequestClass.BACKFILL):
+        for start in range(from_block, to_block + 1, batch_size):
+            numbers = range(start, min(start + batch_size, to_block + 1))
+            responses = send_batch(provider, [("eth_getBlockByNumber", [hex(number), False]) for number in numbers])
+            for number, response in zip(numbers, responses, strict=True):
+                if "error" in response or response.get("result") is None:
+                    msg = f"Failed to fetch the header of block {number}: {response.get('error')}"
+                    raise ValueError(msg)
+                blooms[number] = to_bytes(hexstr=response["result"]["logsBloom"])
+    return blooms
@@ -0,0 +1,38 @@
+"""Bridge messages sent from layer 2 by the collector, kept current from the layer 2 events."""
+
+from typing import Any
+
+from eth_utils.conversions import to_hex
+
+from packages.lstolas.skills.lst_skill.indexing import IndexedModel
+
+
+class BridgeMessages(IndexedModel):
+    """Messages the collector sent over the AMB that have not been executed on layer 1 yet.
+
+    A message is the `UserRequestForSignature` emitted by the layer 2 AMB in the same transaction
+    as a `TokensRelayed` event of the collector. Messages are keyed by message id and map to their
+    encoded data.
+    """
+
+    pending: dict[str, str] = {}
+
+    def apply_events(self, events: list[Any]) -> None:
+        """Apply the `UserRequestForSignature` events emitted along a `TokensRelayed` event of the collector."""
+        relay_transactions = {to_hex(event.transactionHash) for event in events if event.event == "TokensRelayed"}
+        self.on_tokens_relayed(
+            [
+                (to_hex(event.args.messageId), to_hex(event.args.encodedData))
+                for event in events
+                if event.event == "UserRequestForSignature" and to_hex(event.transactionHash) in relay_transactions
+            ]
+        )
+
+    def on_tokens_relayed(self, requests: list[tuple[str, str]]) -> None:
+        """Apply the `UserRequestForSignature` events of a `TokensRelayed` transaction."""
+        for message_id, encoded_data in requests:
+            self.pending[message_id] = encoded_data
+
+    def remove(self, message_id: str) -> None:
+        """Drop a message that was executed on layer 1."""
+        self.pending.pop(message_id, None)
@@ -0,0 +1,162 @@
+"""Record and replay of the JSON-RPC traffic of the chain clients, for deterministic offline runs."""
+
+import gzip
+import json
+import time
+import threading
+from enum import StrEnum
+from typing import Any
+from pathlib import Path
+from collections import deque
+
+from web3.types import RPCEndpoint, RPCResponse
+from web3.providers import JSONBaseProvider
+from web3._utils.encoding import Web3JsonEncoder  # noqa: PLC2701
+
+from packages.lstolas.skills.lst_skill.rate_limit import send_batch
+
+
+class CassetteMode(StrEnum):
+    """Whether a cassette records the traffic to the endpoints or replays it instead."""
+
+    RECORD = "record"
+    REPLAY = "replay"
+
+
+class ReplayTiming(StrEnum):
+    """How long a replayed response takes."""
+
+    ORIGINAL = "original"  # as long as the recorded request took
+    NONE = "none"
+
+
+class CassetteMiss(KeyError):
+    """A request was replayed that the cassette did not record."""
+
+
+def request_key(chain: str, method: str, params: Any) -> str:
+    """Get the key a request is recorded under, whatever its JSON-RPC id."""
+    return json.dumps([chain, method, params], cls=Web3JsonEncoder, sort_keys=True, separators=(",", ":"))
+
+
+def batch_key(chain: str, requests: list[tuple[RPCEndpoint, Any]]) -> str:
+    """Get the key a batch of requests is recorded under, as a whole."""
+    return request_key(chain, "batch", [[method, params] for method, params in requests])
+
+
+class Cassette:
+    """The requests of a session and their responses, in the order they were made.
+
+    The file holds one compact JSON line per request, gzipped. A request made several times
+    replays its recorded responses in order, then keeps replaying the last one, so a replayed
+    session may poll a head or receipt more often than the recorded one did.
+    """
+
+    def __init__(self, path: Path) -> None:
+        """Load the cassette, if it was recorded already."""
+        self.path = path
+        self._lock = threading.Lock()
+        self._recorded: list[tuple[str, float, Any]] = []
+        self._replays: dict[str, deque[tuple[float, Any]]] = {}
+        if path.exists():
+            with gzip.open(path, "rt", encoding="utf-8") as f:
+                for line in f:
+                    key, elapsed, response = json.loads(line)
+                    self._recorded.append((key, elapsed, response))
+                    self._replays.setdefault(key, deque()).append((elapsed, response))
+
+    def __len__(self) -> int:
+        """The number of recorded requests."""
+        return len(self._recorded)
+
+    def record(self, key: str, elapsed: float, response: Any) -> None:
+        """Record the response to a request."""
+        with self._lock:
+            self._recorded.append((key, elapsed, response))
+
+    def replay(self, key: str) -> tuple[float, Any]:
+        """Get the next recorded response to a request, and how long it took."""
+        with self._lock:
+            responses = self._replays.get(key)
+            if not responses:
+                raise CassetteMiss(key)
+            return responses.popleft() if len(responses) > 1 else responses[0]
+
+    def save(self) -> None:
+        """Write the recorded requests to the file."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._lock, gzip.open(self.path, "wt", encoding="utf-8") as f:
+            for entry in self._recorded:
+                f.write(json.dumps(entry, cls=Web3JsonEncoder, separators=(",", ":")) + "\n")
+
+
+class RecordingProvider(JSONBaseProvider):
+    """A web3 provider recording the traffic of another one to a cassette."""
+
+    def __init__(self, provider: Any, cassette: Cassette, chain: str) -> None:
+        """Initialize the provider."""
+        super().__init__()
+        self.provider = provider
+        self.cassette = cassette
+        self.chain = chain
+
+    def make_request(self, method: RPCEndpoint, params: Any) -> RPCResponse:
+        """Send a request and record its response."""
+        started = time.monotonic()
+        response = self.provider.make_request(method, params)
+        self.cassette.record(request_key(self.chain, method, params), time.monotonic() - started, response)
+        return response
+
+    def make_batch_request(self, requests: list[tuple[RPCEndpoint, Any]]) -> list[RPCResponse]:
+        """Send a batch and record its responses."""
+        started = time.monotonic()
+        responses = send_batch(self.provider, requests)
+        self.cassette.record(batch_key(self.chain, requests), time.monotonic() - started, responses)
+        return responses
+
+    @property
+    def endpoint_uri(self) -> str | None:
+        """The url of the wrapped provider."""
+        return getattr(self.provider, "endpoint_uri", None)
+
+    def is_connected(self, show_traceback: bool = False) -> bool:
+        """Whether the wrapped provider is connected."""
+        return self.provider.is_connected(show_traceback)
+
+
+class ReplayProvider(JSONBaseProvider):
+    """A web3 provider answering from a cassette, without any network access."""
+
+    def __init__(self, cassette: Cassette, chain: str, timing: ReplayTiming = ReplayTiming.NONE) -> None:
+        """Initialize the provider."""
+        super().__init__()
+        self.cassette = cassette
+        self.chain = chain
+        self.timing = timing
+
+    def make_request(self, method: RPCEndpoint, params: Any) -> RPCResponse:
+        """Answer a request with its recorded response."""
+        elapsed, response = self.cassette.replay(request_key(self.chain, method, params))
+        if self.timing is ReplayTiming.ORIGINAL:
+            time.sleep(elapsed)
+        return response
+
+    def make_batch_request(self, requests: list[tuple[RPCEndpoint, Any]]) -> list[RPCResponse]:
+        """Answer a batch with its recorded responses."""
+        elapsed, responses = self.cassette.replay(batch_key(self.chain, requests))
+        if self.timing is ReplayTiming.ORIGINAL:
+            time.sleep(elapsed)
+        return responses
+
+    def is_connected(self, show_traceback: bool = False) -> bool:  # noqa: ARG002
+        """A cassette is always connected."""
+        return True
+
+
+def use_cassette(ledger_api: Any, cassette: Cassette, chain: str, mode: CassetteMode, timing: ReplayTiming) -> None:
+    """Record the traffic of a ledger api to a cassette, or replay it from there instead."""
+    web3 = ledger_api.api
+    if mode is CassetteMode.RECORD:
+        web3.provider = RecordingProvider(web3.provider, cassette, chain)
+    else:
+        web3.provider = ReplayProvider(cassette, chain, timing)
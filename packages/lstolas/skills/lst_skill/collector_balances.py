@@ -0,0 +1,59 @@
+"""Local mirror of the collector balances, kept current from the collector events."""
+
+from pydantic import BaseModel
+
+from packages.lstolas.skills.lst_skill.indexing import IndexedModel
+
+
+class OperationBalance(BaseModel):
+    """The balance accrued by the collector for an operation and its receiver."""
+
+    balance: int
+    receiver: str
+
+
+class CollectorBalances(IndexedModel):
+    """Operation and protocol balances of the collector as of `last_block`."""
+
+    min_olas_balance: int | None = None
+    protocol_balance: int | None = None
+    operation_balances: dict[str, OperationBalance] = {}
+
+    def on_operation_receiver_balances_updated(self, operation: str, receiver: str, balance: int) -> None:
+        """Apply an `OperationReceiverBalancesUpdated` event."""
+        self.operation_balances[operation] = OperationBalance(balance=balance, receiver=receiver)
+
+    def on_operation_receivers_set(self, operations: list[str], receivers: list[str]) -> None:
+        """Apply an `OperationReceiversSet` event to the mirrored operations, whose balance it leaves unchanged."""
+        for operation, receiver in zip(operations, receivers, strict=True):
+            operation_balance = self.operation_balances.get(operation)
+            if operation_balance is not None:
+                self.operation_balances[operation] = OperationBalance(
+                    balance=operation_balance.balance, receiver=receiver
+                )
+
+    def on_protocol_balance_updated(self, protocol_balance: int) -> None:
+        """Apply a `ProtocolBalanceUpdated` event."""
+        self.protocol_balance = protocol_balance
+
+    def on_implementation_updated(self) -> None:
+        """Drop the cached configuration, as a new implementation may change it."""
+        self.min_olas_balance = None
+
+    def forget(self, operation: str) -> None:
+        """Drop an operation balance so that it is read again from the contract."""
+        self.operation_balances.pop(operation, None)
+
+    def missing(self, operations: list[str]) -> list[str]:
+        """Get the operations whose balance is not mirrored yet."""
+        return [operation for operation in operations if operation not in self.operation_balances]
+
+    def first_above_threshold(self, operations: list[str]) -> tuple[str, OperationBalance] | None:
+        """Get the first operation whose balance reaches the minimal OLAS balance."""
+        if not self.min_olas_balance:
+            return None
+        for operation in operations:
+            operation_balance = self.operation_balances.get(operation)
+            if operation_balance is not None and operation_balance.balance >= self.min_olas_balance:
+                return operation, operation_balance
+        return None
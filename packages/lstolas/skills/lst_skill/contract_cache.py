@@ -0,0 +1,90 @@
+"""Bounded cache of the web3 contract instances built by the contract wrappers."""
+
+import threading
+from typing import Any
+from collections import OrderedDict
+
+from eth_utils.address import to_checksum_address
+from aea_ledger_ethereum import EthereumApi
+
+
+CACHE_SIZE = 256  # contract instances kept across all chains
+
+
+class ContractInstanceCache:
+    """Least recently used web3 contract instances, keyed by chain id, address and contract interface.
+
+    The contract interface stands for the wrapper class it belongs to. Entries hold on to their
+    interface, so that an interface reloaded along with its package never matches a stale entry.
+    """
+
+    def __init__(self, maxsize: int = CACHE_SIZE) -> None:
+        """Initialize the cache."""
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[tuple[int, str, int], tuple[dict, Any]] = OrderedDict()
+
+    def get(self, chain_id: int, address: str, contract_interface: dict, build: Any) -> Any:
+        """Get the instance of a contract, building it on a miss."""
+        key = (chain_id, address, id(contract_interface))
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] is contract_interface:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+        instance = build()
+        with self._lock:
+            self.misses += 1
+            self._entries[key] = (contract_interface, instance)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return instance
+
+    def clear(self) -> None:
+        """Drop every instance, when the contract packages are reloaded."""
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        """The number of cached instances."""
+        return len(self._entries)
+
+
+INSTANCE_CACHE = ContractInstanceCache()  # shared by every ledger api of the agent
+
+
+class CachedEthereumApi(EthereumApi):
+    """An ethereum ledger api reusing the contract instances its contract wrappers get.
+
+    Every wrapper method starts with `cls.get_instance(ledger_api, address)`, which builds a web3
+    contract from the ABI through `get_contract_instance`; the built instance is reused instead.
+    """
+
+    def __init__(self, cache: ContractInstanceCache = INSTANCE_CACHE, **kwargs: Any) -> None:
+        """Initialize the ledger api."""
+        super().__init__(**kwargs)
+        self.instance_cache = cache
+        self._chain_id: int | None = None
+
+    @property
+    def chain_id(self) -> int:
+        """The id of the chain, read once from the endpoint."""
+        if self._chain_id is None:
+            self._chain_id = self.api.eth.chain_id
+        return self._chain_id
+
+    def get_contract_instance(self, contract_interface: dict[str, str], contract_address: str | None = None) -> Any:
+        """Get the instance of a contract, from the cache when it was already built."""
+        if contract_address is None:
+            return super().get_contract_instance(contract_interface, contract_address)
+        address = to_checksum_address(contract_address)
+        return self.instance_cache.get(
+            self.chain_id,
+            address,
+            contract_interface,
+            lambda: super(CachedEthereumApi, self).get_contract_instance(contract_interface, address),
+        )
@@ -23,6 +23,8 @@
 - DefaultDialogues: The dialogues class keeps track of all dialogues of type default.
 - HttpDialogue: The dialogue class maintains state of a dialogue of type http and manages it.
 - HttpDialogues: The dialogues class keeps track of all dialogues of type http.
+- PrometheusDialogue: The dialogue class maintains state of a dialogue of type prometheus and manages it.
+- PrometheusDialogues: The dialogues class keeps track of all dialogues of type prometheus.
 """
 
 from packages.eightballer.protocols.http.dialogues import (
@@ -33,6 +35,10 @@ from packages.eightballer.protocols.default.dialogues import (
     DefaultDialogue as BaseDefaultDialogue,
     DefaultDialogues as BaseDefaultDialogues,
 )
+from packages.eightballer.protocols.prometheus.dialogues import (
+    PrometheusDialogue as BasePrometheusDialogue,
+    PrometheusDialogues as BasePrometheusDialogues,
+)
 from packages.eightballer.protocols.user_interaction.dialogues import (
     UserInteractionDialogues as BaseUserInteractionDialogues,
 )
@@ -47,3 +53,7 @@ DefaultDialogues = BaseDefaultDialogues
 
 HttpDialogue = BaseHttpDialogue
 HttpDialogues = BaseHttpDialogues
+
+
+PrometheusDialogue = BasePrometheusDialogue
+PrometheusDialogues = BasePrometheusDialogues
@@ -0,0 +1,228 @@
+"""Columnar, memory-mapped on-disk store of the raw logs of the watched contract events."""
+
+import mmap
+import struct
+from bisect import bisect_left, bisect_right
+from pathlib import Path
+from collections.abc import Iterator
+
+from hexbytes import HexBytes
+from eth_utils.address import to_checksum_address
+from web3.datastructures import AttributeDict
+from eth_utils.conversions import to_hex
+
+from packages.lstolas.skills.lst_skill.storage import PersistentModel
+
+
+HASH_BYTES = 32
+COLUMNS = {  # name: struct format of a fixed-width value
+    "block_number": "Q",
+    "log_index": "I",
+    "transaction_index": "I",
+    "transaction_hash": f"{HASH_BYTES}s",
+    "block_hash": f"{HASH_BYTES}s",
+    "contract": "H",
+    "event": "H",
+    "data_offset": "Q",
+    "data_length": "I",
+}
+SIDECAR = "data.bin"  # the indexed topics and data of each log, after its topic 0
+MAX_GAPS = 256  # beyond this, the coverage starts after the oldest gap
+
+
+class EventCatalog(PersistentModel):
+    """The streams stored and the block range covered, which commits an append once saved.
+
+    Contracts and events are stored as ids into `contracts` and `events`; a stream is a pair of
+    them. The blocks of `gaps` were never fetched, so the range they split is not covered as a
+    whole. Rows past `count`, left by an interrupted append, are discarded on open.
+    """
+
+    contracts: list[str] = []
+    events: list[str] = []
+    streams: list[tuple[str, str]] = []
+    first_block: int | None = None
+    last_block: int = 0
+    gaps: list[tuple[int, int]] = []
+    count: int = 0
+
+
+class EventStore:
+    """Append-only columns of the logs of a chain, in chain order, with the block number column as index.
+
+    Each column is a file of fixed-width values memory-mapped for reads, and a sidecar file holds
+    the variable-width part of each log. Logs of a block range are located by binary search on the
+    block numbers, so range scans cost O(log n) plus the rows returned.
+    """
+
+    def __init__(self, path: Path) -> None:
+        """Open the store, discarding any partially appended rows."""
+        self.path = path
+        self.path.mkdir(parents=True, exist_ok=True)
+        self.catalog = EventCatalog.load(path / "catalog.json")
+        self._maps: dict[str, tuple[mmap.mmap, memoryview]] = {}
+        self._trim()
+
+    def _trim(self) -> None:
+        """Cut the files down to the rows committed in the catalog."""
+        sizes = {name: self.catalog.count * struct.calcsize(fmt) for name, fmt in COLUMNS.items()}
+        sizes[SIDECAR] = self._data_size()
+        self._unmap()
+        for name, size in sizes.items():
+            file_path = self._file(name)
+            file_path.touch()
+            if file_path.stat().st_size > size:
+                with file_path.open("r+b") as f:
+                    f.truncate(size)
+
+    def _file(self, name: str) -> Path:
+        return self.path / (name if name == SIDECAR else f"{name}.col")
+
+    def _data_size(self) -> int:
+        if not self.catalog.count:
+            return 0
+        last = self.catalog.count - 1
+        return self._value("data_offset", last) + self._value("data_length", last)
+
+    def _column(self, name: str) -> memoryview:
+        if name not in self._maps:
+            with self._file(name).open("rb") as f:
+                mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            fmt = COLUMNS.get(name, "B")
+            view = memoryview(mapped) if fmt.endswith("s") or name == SIDECAR else memoryview(mapped).cast(fmt)
+            self._maps[name] = (mapped, view)
+        return self._maps[name][1]
+
+    def _value(self, name: str, row: int) -> int:
+        return self._column(name)[row]
+
+    def _hash(self, name: str, row: int) -> bytes:
+        return bytes(self._column(name)[row * HASH_BYTES : (row + 1) * HASH_BYTES])
+
+    def _unmap(self) -> None:
+        for mapped, view in self._maps.values():
+            view.release()
+            mapped.close()
+        self._maps = {}
+
+    def close(self) -> None:
+        """Release the memory maps."""
+        self._unmap()
+
+    def covers(self, streams: list[tuple[str, str]], from_block: int, to_block: int) -> bool:
+        """Whether every log of the streams in the range is stored."""
+        catalog = self.catalog
+        return (
+            catalog.streams == streams
+            and catalog.first_block is not None
+            and catalog.first_block <= from_block
+            and to_block <= catalog.last_block
+            and not any(start <= to_block and from_block <= end for start, end in catalog.gaps)
+        )
+
+    def append(self, streams: list[tuple[str, str]], logs: list[dict], from_block: int, to_block: int) -> None:
+        """Store the logs of the streams fetched for a range, as far as it extends the stored range.
+
+        The store is reset when the streams change. A range starting after the stored one, when the
+        windows in between were skipped, is stored with the blocks in between recorded as a gap.
+        """
+        if self.catalog.streams != streams:
+            self.clear(streams)
+        catalog = self.catalog
+        if catalog.first_block is not None and to_block <= catalog.last_block:
+            return
+        if catalog.first_block is not None and from_block > catalog.last_block + 1:
+            catalog.gaps.append((catalog.last_block + 1, from_block - 1))
+            if len(catalog.gaps) > MAX_GAPS:
+                catalog.first_block = catalog.gaps.pop(0)[1] + 1
+        contract_ids = {address: index for index, address in enumerate(catalog.contracts)}
+        event_ids = {topic: index for index, topic in enumerate(catalog.events)}
+        offset = self._data_size()
+        rows = {name: bytearray() for name in COLUMNS}
+        data = bytearray()
+        new_logs = [log for log in logs if catalog.first_block is None or log["blockNumber"] > catalog.last_block]
+        for log in new_logs:
+            topics = [bytes(HexBytes(topic)) for topic in log["topics"]]
+            payload = bytes([len(topics) - 1]) + b"".join(topics[1:]) + bytes(HexBytes(log["data"]))
+            values = {
+                "block_number": log["blockNumber"],
+                "log_index": log["logIndex"],
+                "transaction_index": log["transactionIndex"],
+                "transaction_hash": bytes(HexBytes(log["transactionHash"])),
+                "block_hash": bytes(HexBytes(log["blockHash"])),
+                "contract": contract_ids[to_checksum_address(log["address"])],
+                "event": event_ids[to_hex(topics[0])],
+                "data_offset": offset + len(data),
+                "data_length": len(payload),
+            }
+            for name, fmt in COLUMNS.items():
+                rows[name] += struct.pack(fmt, values[name])
+            data += payload
+        self._unmap()
+        for name in COLUMNS:
+            with self._file(name).open("ab") as f:
+                f.write(rows[name])
+        with self._file(SIDECAR).open("ab") as f:
+            f.write(data)
+        if catalog.first_block is None:
+            catalog.first_block = from_block
+        catalog.last_block = to_block
+        catalog.count += len(new_logs)
+        catalog.save()
+
+    def scan(self, from_block: int, to_block: int) -> Iterator[AttributeDict]:
+        """Iterate over the stored logs of a block range, in chain order."""
+        if not self.catalog.count:
+            return
+        blocks = self._column("block_number")
+        start, end = bisect_left(blocks, from_block), bisect_right(blocks, to_block)
+        sidecar = self._column(SIDECAR)
+        for row in range(start, end):
+            offset = self._value("data_offset", row)
+            payload = bytes(sidecar[offset : offset + self._value("data_length", row)])
+            topic_count = payload[0]
+            topics = [
+                HexBytes(self.catalog.events[self._value("event", row)]),
+                *(HexBytes(payload[1 + i * HASH_BYTES : 1 + (i + 1) * HASH_BYTES]) for i in range(topic_count)),
+            ]
+            yield AttributeDict(
+                {
+                    "address": self.catalog.contracts[self._value("contract", row)],
+                    "topics": topics,
+                    "data": HexBytes(payload[1 + topic_count * HASH_BYTES :]),
+                    "blockNumber": blocks[row],
+                    "logIndex": self._value("log_index", row),
+                    "transactionIndex": self._value("transaction_index", row),
+                    "transactionHash": HexBytes(self._hash("transaction_hash", row)),
+                    "blockHash": HexBytes(self._hash("block_hash", row)),
+                    "removed": False,
+                }
+            )
+
+    def truncate(self, block: int) -> None:
+        """Drop the logs after a block, when the chain reorganised past it."""
+        catalog = self.catalog
+        if catalog.first_block is None or block >= catalog.last_block:
+            return
+        if block < catalog.first_block:
+            self.clear(catalog.streams)
+            return
+        count = bisect_right(self._column("block_number"), block) if catalog.count else 0
+        catalog.count, catalog.last_block = count, block
+        catalog.gaps = [(start, min(end, block)) for start, end in catalog.gaps if start <= block]
+        if catalog.gaps and catalog.gaps[-1][1] == block:
+            catalog.last_block = catalog.gaps.pop()[0] - 1
+        catalog.save()
+        self._trim()
+
+    def clear(self, streams: list[tuple[str, str]]) -> None:
+        """Drop every stored log and start storing the given streams."""
+        self._unmap()
+        for name in [*COLUMNS, SIDECAR]:
+            self._file(name).write_bytes(b"")
+        self.catalog.contracts = sorted({address for address, _ in streams})
+        self.catalog.events = sorted({topic for _, topic in streams})
+        self.catalog.streams = streams
+        self.catalog.first_block, self.catalog.last_block, self.catalog.count = None, 0, 0
+        self.catalog.gaps = []
+        self.catalog.save()
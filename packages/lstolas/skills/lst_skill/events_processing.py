@@ -1,10 +1,13 @@
 """Processing of Ethereum events."""
-# ruff: noqa: D105, N815
+# ruff: noqa: D105, N803, N815
 
 from typing import Any, Protocol
-from collections.abc import Mapping, Iterator, Sequence
+from collections import namedtuple
+from collections.abc import Mapping, Callable, Iterator, Sequence
 
 from eth_typing import HexStr
+from eth_utils.abi import event_abi_to_log_topic
+from eth_utils.address import to_checksum_address
 from aea_ledger_ethereum import HexBytes
 from web3.datastructures import AttributeDict
 from eth_utils.conversions import to_hex
@@ -55,3 +58,168 @@ class EventsPayload(AttributeDict):
     events: list[Event] = []
     from_block: int
     to_block: int
+
+
+class HexArgs:
+    """A view of the arguments of an event record that hex-encodes its bytes fields on access."""
+
+    __slots__ = ("_args",)
+
+    def __init__(self, args: tuple) -> None:
+        self._args = args
+
+    def __getitem__(self, key: int | str) -> Any:
+        position = self._args.positions[key] if isinstance(key, str) else key  # type: ignore[attr-defined]
+        value = tuple.__getitem__(self._args, position)
+        convert = self._args.hex_converters[position]  # type: ignore[attr-defined]
+        return value if convert is None else convert(value)
+
+    def __getattr__(self, name: str) -> Any:
+        try:
+            return self[name]
+        except KeyError as e:
+            raise AttributeError(name) from e
+
+
+class EventRecord:
+    """A decoded log of a contract event, holding native ints and bytes.
+
+    Hex conversion is deferred to `to_dict`, `repr` and the `hex_args` view, and only touches the
+    fields the event ABI declares as bytes.
+    """
+
+    __slots__ = (
+        "address",
+        "args",
+        "blockHash",
+        "blockNumber",
+        "event",
+        "logIndex",
+        "transactionHash",
+        "transactionIndex",
+    )
+
+    def __init__(
+        self,
+        event: str,
+        args: tuple,
+        address: str,
+        blockNumber: int,
+        logIndex: int,
+        transactionIndex: int,
+        transactionHash: bytes,
+        blockHash: bytes,
+    ) -> None:
+        self.event = event
+        self.args = args
+        self.address = address
+        self.blockNumber = blockNumber
+        self.logIndex = logIndex
+        self.transactionIndex = transactionIndex
+        self.transactionHash = transactionHash
+        self.blockHash = blockHash
+
+    @property
+    def hex_args(self) -> HexArgs:
+        """The arguments, with bytes fields hex-encoded on access."""
+        return HexArgs(self.args)
+
+    def to_dict(self) -> dict[str, Any]:
+        """Get the record as a dict of json serialisable values."""
+        names, converters = self.args.names, self.args.hex_converters  # type: ignore[attr-defined]
+        return {
+            "event": self.event,
+            "args": {
+                name: value if convert is None else convert(value)
+                for name, value, convert in zip(names, self.args, converters, strict=True)
+            },
+            "address": self.address,
+            "blockNumber": self.blockNumber,
+            "logIndex": self.logIndex,
+            "transactionIndex": self.transactionIndex,
+            "transactionHash": to_hex(self.transactionHash),
+            "blockHash": to_hex(self.blockHash),
+        }
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self.to_dict()})"
+
+
+def _is_dynamic(abi_type: str) -> bool:
+    return abi_type in {"string", "bytes"} or abi_type.endswith("]") or abi_type.startswith("tuple")
+
+
+def _hex_items(values: Sequence[bytes]) -> list[str]:
+    return [to_hex(value) for value in values]
+
+
+def _hex_converter(item: dict[str, Any]) -> Callable[[Any], Any] | None:
+    """Get how a decoded input is hex-encoded, from its ABI type."""
+    abi_type = item["type"]
+    if item.get("indexed") and _is_dynamic(abi_type):
+        return to_hex  # the topic holds the hash of the value
+    if abi_type.startswith("tuple"):
+        return hexify
+    if abi_type.startswith("bytes"):
+        return _hex_items if abi_type.endswith("]") else to_hex
+    return None
+
+
+class EventDecoder:
+    """Decodes the logs of one contract event into records of a type generated from its ABI.
+
+    The arguments are a named tuple of the event inputs, also indexable by input name for inputs
+    whose name is a keyword, such as `args["from"]`. Indexed inputs of a dynamic type are left as
+    the topic hash. The hex encoding of each input is resolved once from its ABI type.
+    """
+
+    def __init__(self, event_abi: dict[str, Any], codec: Any) -> None:
+        """Derive the record type and the decoding plan of the event."""
+        self.name = event_abi["name"]
+        self.topic = to_hex(event_abi_to_log_topic(event_abi))
+        self.codec = codec
+        inputs = event_abi["inputs"]
+        names = tuple(item["name"] for item in inputs)
+        positions = {name: index for index, name in enumerate(names)}
+
+        def getitem(args: tuple, key: int | str) -> Any:
+            return tuple.__getitem__(args, positions[key] if isinstance(key, str) else key)
+
+        base = namedtuple(f"{self.name}Args", names, rename=True)
+        self.args_type = type(
+            base.__name__,
+            (base,),
+            {
+                "__slots__": (),
+                "__getitem__": getitem,
+                "names": names,
+                "positions": positions,
+                "hex_converters": tuple(_hex_converter(item) for item in inputs),
+            },
+        )
+        self._indexed = [(positions[item["name"]], item["type"]) for item in inputs if item["indexed"]]
+        self._data = [(positions[item["name"]], item["type"]) for item in inputs if not item["indexed"]]
+        self._addresses = [positions[item["name"]] for item in inputs if item["type"] == "address"]
+
+    def decode(self, log: Mapping[str, Any]) -> EventRecord:
+        """Decode a raw log of the event."""
+        values: list[Any] = [None] * len(self.args_type.names)
+        for (position, abi_type), topic in zip(self._indexed, log["topics"][1:], strict=True):
+            topic = bytes(topic)
+            values[position] = topic if _is_dynamic(abi_type) else self.codec.decode([abi_type], topic)[0]
+        if self._data:
+            decoded = self.codec.decode([abi_type for _, abi_type in self._data], bytes(HexBytes(log["data"])))
+            for (position, _), value in zip(self._data, decoded, strict=True):
+                values[position] = value
+        for position in self._addresses:
+            values[position] = to_checksum_address(values[position])
+        return EventRecord(
+            event=self.name,
+            args=self.args_type(*values),
+            address=to_checksum_address(log["address"]),
+            blockNumber=log["blockNumber"],
+            logIndex=log["logIndex"],
+            transactionIndex=log["transactionIndex"],
+            transactionHash=bytes(HexBytes(log["transactionHash"])),
+            blockHash=bytes(HexBytes(log["blockHash"])),
+        )
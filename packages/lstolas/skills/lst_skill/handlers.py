@@ -21,6 +21,8 @@
 
 import json
 from typing import cast
+from urllib.parse import parse_qs, urlparse
+from collections.abc import Callable
 
 from aea.skills.base import Handler
 from aea.protocols.base import Message
@@ -31,7 +33,21 @@ from packages.lstolas.skills.lst_skill.dialogues import (
     HttpDialogue,
     HttpDialogues,
     DefaultDialogues,
+    PrometheusDialogues,
 )
+from packages.lstolas.skills.lst_skill.profiling import (
+    STATS_LIMIT,
+    TRACEMALLOC_FRAMES,
+    Profiler,
+    ProfileMode,
+    MemoryTracer,
+    ProfilingError,
+    thread_stacks,
+)
+from packages.eightballer.protocols.prometheus.message import PrometheusMessage
+
+
+ADMIN_PREFIX = "/admin/"
 
 
 class HttpHandler(Handler):
@@ -77,7 +93,10 @@ class HttpHandler(Handler):
         self.context.logger.info(
             f"received http request with method={http_msg.method}, url={http_msg.url} and body={http_msg.body}"
         )
-        if http_msg.method == "get" and http_msg.url.find("/metrics"):
+        path = urlparse(http_msg.url).path
+        if self.enable_profiling and path.startswith(ADMIN_PREFIX):
+            self._handle_admin(http_msg, http_dialogue, path)
+        elif http_msg.method == "get" and http_msg.url.find("/metrics"):
             self._handle_get(http_msg, http_dialogue)
         else:
             self._handle_invalid(http_msg, http_dialogue)
@@ -104,6 +123,63 @@ class HttpHandler(Handler):
         self.context.logger.info(f"responding with: {http_response}")
         self.context.outbox.put_message(message=http_response)
 
+    @property
+    def admin_routes(self) -> dict[tuple[str, str], Callable[[dict[str, str]], str]]:
+        """Get the admin routes, by method and path, answering with the text they return."""
+        return {
+            ("post", "/admin/profile/start"): self._start_profile,
+            ("post", "/admin/profile/stop"): lambda query: self.profiler.stop(int(query.get("limit", STATS_LIMIT))),
+            ("get", "/admin/profile"): lambda query: self.profiler.get_result(int(query.get("limit", STATS_LIMIT))),
+            ("post", "/admin/memory/start"): self._start_memory_tracing,
+            ("post", "/admin/memory/stop"): self._stop_memory_tracing,
+            ("get", "/admin/memory/top"): lambda query: self.memory.top(int(query.get("limit", STATS_LIMIT))),
+            ("get", "/admin/memory/diff"): lambda query: self.memory.diff(int(query.get("limit", STATS_LIMIT))),
+            ("get", "/admin/threads"): lambda _: thread_stacks(),
+        }
+
+    def _handle_admin(self, http_msg: HttpMessage, http_dialogue: HttpDialogue, path: str) -> None:
+        """Handle a request to an admin route, answering with plain text."""
+        route = self.admin_routes.get((http_msg.method.lower(), path.rstrip("/")))
+        query = {name: values[-1] for name, values in parse_qs(urlparse(http_msg.url).query).items()}
+        status_code, status_text = 200, "Success"
+        if route is None:
+            status_code, status_text, body = 404, "Not Found", f"No admin route {http_msg.method.upper()} {path}.\n"
+        else:
+            try:
+                body = route(query)
+            except ProfilingError as e:
+                status_code, status_text, body = 409, "Conflict", f"{e}\n"
+            except ValueError as e:
+                status_code, status_text, body = 400, "Bad Request", f"{e}\n"
+        self.context.logger.info(f"admin route {http_msg.method.upper()} {path} answered {status_code}")
+        http_response = http_dialogue.reply(
+            performative=HttpMessage.Performative.RESPONSE,
+            target_message=http_msg,
+            version=http_msg.version,
+            status_code=status_code,
+            status_text=status_text,
+            headers="Content-Type: text/plain; charset=utf-8\n",
+            body=body.encode("utf-8"),
+        )
+        self.context.outbox.put_message(message=http_response)
+
+    def _start_profile(self, query: dict[str, str]) -> str:
+        """Start a profiling session."""
+        mode = ProfileMode(query.get("mode", ProfileMode.SAMPLER))
+        seconds = float(query.get("seconds", 30))
+        self.profiler.start(mode, seconds)
+        return f"Started a {mode} session for {seconds:g} seconds, get its result from /admin/profile.\n"
+
+    def _start_memory_tracing(self, query: dict[str, str]) -> str:
+        """Start tracing the allocations."""
+        self.memory.start(int(query.get("frames", TRACEMALLOC_FRAMES)))
+        return "Started tracing the allocations.\n"
+
+    def _stop_memory_tracing(self, _: dict[str, str]) -> str:
+        """Stop tracing the allocations."""
+        self.memory.stop()
+        return "Stopped tracing the allocations.\n"
+
     def _handle_post(self, http_msg: HttpMessage, http_dialogue: HttpDialogue) -> None:
         """Handle a Http request of verb POST."""
         http_response = http_dialogue.reply(
@@ -129,9 +205,41 @@ class HttpHandler(Handler):
         )
 
     def teardown(self) -> None:
-        """Implement the handler teardown."""
+        """Stop the profiling session and the tracing of the allocations left running."""
+        if self.profiler.session is not None:
+            self.profiler.stop()
+        if self.memory.tracing:
+            self.memory.stop()
 
     def __init__(self, **kwargs):
         """Initialise the handler."""
         self.enable_cors = kwargs.pop("enable_cors", False)
+        # the admin routes profile the live agent, and are only served when enabled
+        self.enable_profiling = kwargs.pop("enable_profiling", False)
+        self.profiler = Profiler()
+        self.memory = MemoryTracer()
         super().__init__(**kwargs)
+
+
+class PrometheusHandler(Handler):
+    """This implements the handler of the responses of the prometheus connection to the metric updates."""
+
+    SUPPORTED_PROTOCOL = PrometheusMessage.protocol_id
+
+    def setup(self) -> None:
+        """Implement the setup."""
+
+    def handle(self, message: Message) -> None:
+        """Log the updates the connection failed to apply."""
+        prometheus_msg = cast(PrometheusMessage, message)
+        prometheus_dialogues = cast(PrometheusDialogues, self.context.prometheus_dialogues)
+        if prometheus_dialogues.update(prometheus_msg) is None:
+            self.context.logger.info(f"received invalid prometheus message={prometheus_msg}, unidentified dialogue.")
+            return
+        if prometheus_msg.performative == PrometheusMessage.Performative.RESPONSE and prometheus_msg.code != 200:
+            self.context.logger.warning(
+                f"metric update failed with code {prometheus_msg.code}: {prometheus_msg.message}"
+            )
+
+    def teardown(self) -> None:
+        """Implement the handler teardown."""
@@ -0,0 +1,27 @@
+"""Offline reproductions of pure hashing functions exposed by the lst contracts."""
+
+from eth_abi import encode
+from eth_typing import HexStr
+from eth_utils.crypto import keccak
+from eth_utils.conversions import to_hex, to_bytes
+
+
+QUEUED_HASH_TYPES = ["bytes32", "address", "uint256", "bytes32"]
+
+
+def _as_bytes32(value: bytes | str) -> bytes:
+    """Convert a hex string or bytes value to a 32 byte value."""
+    raw = value if isinstance(value, bytes) else to_bytes(hexstr=HexStr(value))
+    if len(raw) != 32:
+        msg = f"Expected a 32 byte value, got {len(raw)} bytes."
+        raise ValueError(msg)
+    return raw
+
+
+def get_queued_hash(batch_hash: bytes | str, target: str, amount: int, operation: bytes | str) -> str:
+    """Reproduce `LstStakingProcessorL2.getQueuedHash` locally.
+
+    The contract computes `keccak256(abi.encode(batchHash, target, amount, operation))`.
+    """
+    encoded = encode(QUEUED_HASH_TYPES, [_as_bytes32(batch_hash), target, amount, _as_bytes32(operation)])
+    return to_hex(keccak(encoded))
@@ -0,0 +1,161 @@
+"""Shared, tuned HTTP sessions of the JSON-RPC endpoints the chain clients talk to."""
+
+import gzip
+import json
+import socket
+import threading
+from typing import Any
+from dataclasses import field, dataclass
+
+import requests
+from web3 import HTTPProvider
+from web3.types import RPCEndpoint, RPCResponse
+from web3.exceptions import BadResponseFormat
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection
+from web3._utils.encoding import Web3JsonEncoder  # noqa: PLC2701
+
+from packages.lstolas.skills.lst_skill.rate_limit import RequestClass, classify
+
+
+POOL_SIZE = 10  # connections kept open per endpoint
+KEEP_ALIVE = 60  # seconds a connection stays idle before tcp keepalive probes start
+TIMEOUTS = {  # seconds to wait for an answer, per request class
+    RequestClass.TRANSACTION: 10.0,
+    RequestClass.RECEIPT: 10.0,
+    RequestClass.READ: 15.0,
+    RequestClass.BACKFILL: 60.0,
+}
+COMPRESSION_THRESHOLD = 1_024  # bytes of request body from which it is gzipped, when enabled
+
+
+@dataclass(frozen=True)
+class SessionConfig:
+    """How the connections to an endpoint are pooled, kept alive and timed out."""
+
+    pool_size: int = POOL_SIZE
+    keep_alive: int = KEEP_ALIVE
+    compress_requests: bool = False
+    timeouts: dict[RequestClass, float] = field(default_factory=lambda: dict(TIMEOUTS))
+
+    @classmethod
+    def from_args(cls, args: dict | None) -> "SessionConfig":
+        """Get the config from the strategy args, with the timeouts keyed by lower case class name."""
+        args = dict(args or {})
+        timeouts = dict(TIMEOUTS)
+        for name, timeout in args.pop("timeouts", {}).items():
+            timeouts[RequestClass[name.upper()]] = float(timeout)
+        return cls(**args, timeouts=timeouts)
+
+
+class PooledAdapter(HTTPAdapter):
+    """An adapter keeping `pool_size` connections per host open, with tcp keepalive probes."""
+
+    def __init__(self, config: SessionConfig) -> None:
+        """Initialize the adapter."""
+        self.session_config = config  # `config` is taken by the base adapter
+        super().__init__(pool_connections=1, pool_maxsize=config.pool_size)
+
+    def init_poolmanager(self, connections: int, maxsize: int, block: bool = False, **pool_kwargs: Any) -> None:
+        """Create the pool manager, with keepalive set on the sockets it opens."""
+        socket_options = [*HTTPConnection.default_socket_options, (socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)]
+        if hasattr(socket, "TCP_KEEPIDLE"):
+            socket_options.append((socket.IPPROTO_TCP, socket.TCP_KEEPIDLE, self.session_config.keep_alive))
+        super().init_poolmanager(connections, maxsize, block, socket_options=socket_options, **pool_kwargs)
+
+    @property
+    def counts(self) -> tuple[int, int]:
+        """The requests sent and connections opened by the pools of the adapter."""
+        pools = list(self.poolmanager.pools._container.values())  # noqa: SLF001
+        return sum(pool.num_requests for pool in pools), sum(pool.num_connections for pool in pools)
+
+
+class EndpointSession:
+    """The session every chain client of the agent shares for an endpoint."""
+
+    def __init__(self, url: str, config: SessionConfig) -> None:
+        """Initialize the session."""
+        self.url = url
+        self.config = config
+        self.adapter = PooledAdapter(config)
+        self.session = requests.Session()
+        self.session.headers.update({"Content-Type": "application/json", "Connection": "keep-alive"})
+        self.session.mount("http://", self.adapter)
+        self.session.mount("https://", self.adapter)
+
+    def post(self, data: bytes, timeout: float) -> bytes:
+        """Post a request body and get the response body."""
+        headers = {}
+        if self.config.compress_requests and len(data) >= COMPRESSION_THRESHOLD:
+            data, headers = gzip.compress(data), {"Content-Encoding": "gzip"}
+        response = self.session.post(self.url, data=data, headers=headers, timeout=timeout)
+        response.raise_for_status()
+        return response.content
+
+    @property
+    def reuse_rate(self) -> float:
+        """The share of requests sent over an already open connection."""
+        requests_sent, connections = self.adapter.counts
+        return 1 - connections / requests_sent if requests_sent else 0.0
+
+    def close(self) -> None:
+        """Close the connections of the session."""
+        self.session.close()
+
+
+SESSIONS: dict[str, EndpointSession] = {}  # endpoint url: session, shared by every chain client of the agent
+_sessions_lock = threading.Lock()
+
+
+def endpoint_session(url: str, config: SessionConfig) -> EndpointSession:
+    """Get the shared session of an endpoint, opening it on first use."""
+    with _sessions_lock:
+        if url not in SESSIONS:
+            SESSIONS[url] = EndpointSession(url, config)
+        return SESSIONS[url]
+
+
+def close_sessions() -> None:
+    """Close every shared session."""
+    with _sessions_lock:
+        for session in SESSIONS.values():
+            session.close()
+        SESSIONS.clear()
+
+
+class PooledHTTPProvider(HTTPProvider):
+    """An HTTP provider sending its requests over the shared session of its endpoint.
+
+    The default provider keeps a session per thread, so the worker threads of an RPC pool each
+    open their own connections; sharing one pool of connections per endpoint avoids the extra TLS
+    handshakes. The timeout of a request depends on its class.
+    """
+
+    def __init__(self, url: str, config: SessionConfig) -> None:
+        """Initialize the provider."""
+        super().__init__(url)
+        self.session = endpoint_session(url, config)
+
+    def make_request(self, method: RPCEndpoint, params: Any) -> RPCResponse:
+        """Send a request over the shared session."""
+        timeout = self.session.config.timeouts[classify(method)]
+        return self.decode_rpc_response(self.session.post(self.encode_rpc_request(method, params), timeout))
+
+    def make_batch_request(self, rpc_requests: list[tuple[RPCEndpoint, Any]]) -> list[RPCResponse]:
+        """Send rpc_requests as one JSON-RPC batch over the shared session, and get their responses in order."""
+        timeout = self.session.config.timeouts[classify(rpc_requests[0][0])]
+        batch = [
+            {"jsonrpc": "2.0", "method": method, "params": params, "id": request_id}
+            for request_id, (method, params) in enumerate(rpc_requests)
+        ]
+        responses = self.decode_rpc_response(
+            self.session.post(json.dumps(batch, cls=Web3JsonEncoder).encode(), timeout)
+        )
+        if not isinstance(responses, list):
+            msg = f"The batch was rejected by {self.endpoint_uri}: {responses.get('error')}"
+            raise BadResponseFormat(msg)
+        by_id = {response.get("id"): response for response in responses}
+        if len(by_id.keys() & set(range(len(rpc_requests)))) < len(rpc_requests):
+            msg = f"The batch answered by {self.endpoint_uri} misses some of its responses."
+            raise BadResponseFormat(msg)
+        return [by_id[request_id] for request_id in range(len(rpc_requests))]
@@ -0,0 +1,307 @@
+"""Reorg-aware incremental indexing of chain events."""
+
+import time
+from enum import StrEnum
+from typing import TYPE_CHECKING, Any, Self
+from pathlib import Path
+from collections.abc import Callable
+
+from pydantic import Field, BaseModel, PrivateAttr
+from aea_ledger_ethereum import EthereumApi
+from eth_utils.conversions import to_hex
+
+from packages.lstolas.skills.lst_skill.storage import PersistentModel, write_atomically
+from packages.lstolas.skills.lst_skill.event_store import EventStore
+from packages.lstolas.skills.lst_skill.log_collector import LogCollector
+
+
+if TYPE_CHECKING:
+    from packages.lstolas.skills.lst_skill.subscriptions import ChainSubscription
+
+
+REORG_WINDOW = 16  # number of indexed blocks whose hash is kept to detect reorgs
+MAX_BLOCKS_PER_SYNC = 10_000  # blocks indexed per sync, so that a gap is backfilled in chunks
+HEAD_TTL = 2  # seconds the confirmed head is reused for, so that the models synced in a tick share it
+
+
+class BlockTag(StrEnum):
+    """Block tags the confirmed head of a chain can be resolved from."""
+
+    LATEST = "latest"
+    SAFE = "safe"
+    FINALIZED = "finalized"
+
+
+class BlockRef(BaseModel):
+    """A block identified by both its number and its hash."""
+
+    number: int
+    hash: str
+
+
+class FieldUndo(BaseModel):
+    """How to restore a field of an indexed model to its value as of the previous checkpoint.
+
+    A dict field only keeps the previous values of the keys that changed, and the keys that were
+    added; any other field keeps its whole previous value.
+    """
+
+    value: Any = None
+    items: dict[str, Any] | None = None
+    added: list[str] = []
+
+
+class Checkpoint(BaseModel):
+    """An indexed block, and how to undo the changes of the state since the previous checkpoint."""
+
+    block: BlockRef
+    undo: dict[str, FieldUndo] = {}
+
+
+class CheckpointJournal(BaseModel):
+    """The checkpoints of an indexed model, persisted apart from its state."""
+
+    last_block: int = 0
+    checkpoints: list[Checkpoint] = []
+
+
+def undo_changes(before: dict[str, Any], after: dict[str, Any]) -> dict[str, FieldUndo]:
+    """Get how to restore the fields that changed from one state to the next."""
+    undo = {}
+    for name, value in after.items():
+        previous = before.get(name)
+        if previous == value:
+            continue
+        if isinstance(previous, dict) and isinstance(value, dict):
+            undo[name] = FieldUndo(
+                items={key: item for key, item in previous.items() if key not in value or value[key] != item},
+                added=[key for key in value if key not in previous],
+            )
+        else:
+            undo[name] = FieldUndo(value=previous)
+    return undo
+
+
+def apply_undo(state: dict[str, Any], undo: dict[str, FieldUndo]) -> None:
+    """Restore in place the fields of a state to their value as of the previous checkpoint."""
+    for name, field_undo in undo.items():
+        if field_undo.items is None:
+            state[name] = field_undo.value
+            continue
+        items = state[name]
+        for key in field_undo.added:
+            items.pop(key, None)
+        items.update(field_undo.items)
+
+
+class IndexedModel(PersistentModel):
+    """A model built incrementally from events, which can be rolled back when the chain reorganises.
+
+    Each of the last indexed blocks is checkpointed with the changes needed to undo it. When one of
+    those blocks is no longer canonical, the blocks after the latest canonical checkpoint are undone,
+    so that only the affected range has to be indexed again. The checkpoints are kept in a journal
+    next to the state file, and the state file is only written again when the state changed.
+    """
+
+    last_block: int = 0
+    checkpoints: list[Checkpoint] = Field(default=[], exclude=True)
+
+    _defaults: dict[str, Any] = PrivateAttr(default_factory=dict)
+    _committed: dict[str, Any] = PrivateAttr(default_factory=dict)  # the state as of the last checkpoint
+    _unsaved: bool = PrivateAttr(default=False)  # whether the state was rolled back since it was saved
+
+    def model_post_init(self, context: Any, /) -> None:  # noqa: ARG002
+        """Take the initial state as the base of the first checkpoint."""
+        self._committed = self._state()
+
+    @classmethod
+    def load(cls, path: Path, **defaults: Any) -> Self:
+        """Load the model and its checkpoints, keeping the defaults to rebuild it from after a deep reorg."""
+        model = super().load(path, **defaults)
+        model._defaults = defaults  # noqa: SLF001
+        journal_path = model.journal_path
+        if journal_path is not None and journal_path.exists():
+            journal = CheckpointJournal.model_validate_json(journal_path.read_text(encoding="utf-8"))
+            model.checkpoints = journal.checkpoints
+            # the state file is not written again for blocks that left the state unchanged
+            model.last_block = max(model.last_block, journal.last_block)
+        return model
+
+    @property
+    def journal_path(self) -> Path | None:
+        """The file the checkpoints are persisted to."""
+        return None if self._path is None else self._path.with_name(f"{self._path.stem}.checkpoints.json")
+
+    def _state(self) -> dict[str, Any]:
+        return self.model_dump(mode="json", exclude={"last_block"})
+
+    def checkpoint(self, block: BlockRef, window: int = REORG_WINDOW) -> bool:
+        """Record a newly indexed block, returning whether the state changed since the previous checkpoint."""
+        state = self._state()
+        undo = undo_changes(self._committed, state)
+        self._committed = state
+        self.last_block = block.number
+        self.checkpoints = [*self.checkpoints, Checkpoint(block=block, undo=undo)][-window:]
+        return bool(undo) or self._unsaved
+
+    def rollback(self, is_canonical: Callable[[BlockRef], bool]) -> int | None:
+        """Undo the blocks after the latest checkpoint still on the canonical chain.
+
+        Returns the block the state was rolled back to, or None if no indexed block was reorganised.
+        """
+        for index in range(len(self.checkpoints) - 1, -1, -1):
+            checkpoint = self.checkpoints[index]
+            if not is_canonical(checkpoint.block):
+                continue
+            if index == len(self.checkpoints) - 1:
+                return None
+            state = self._committed
+            for undone in reversed(self.checkpoints[index + 1 :]):
+                apply_undo(state, undone.undo)
+            self._restore(state, checkpoint.block.number)
+            self.checkpoints = self.checkpoints[: index + 1]
+            return self.last_block
+        if not self.checkpoints:
+            return None
+        # the reorg is deeper than the window, the model is rebuilt from scratch
+        rebuilt = type(self)(**self._defaults)
+        self._restore(rebuilt._state(), rebuilt.last_block)  # noqa: SLF001
+        self.checkpoints = []
+        return self.last_block
+
+    def _restore(self, state: dict[str, Any], last_block: int) -> None:
+        restored = self.model_validate({**state, "last_block": last_block})
+        for name in type(self).model_fields:
+            if name != "checkpoints":
+                setattr(self, name, getattr(restored, name))
+        self._committed = self._state()
+        self._unsaved = True
+
+    def save(self) -> None:
+        """Write the state and the checkpoints."""
+        super().save()
+        self._unsaved = False
+        self.save_checkpoints()
+
+    def save_checkpoints(self) -> None:
+        """Write the checkpoints, and the block they index the state up to."""
+        journal_path = self.journal_path
+        if journal_path is not None:
+            journal = CheckpointJournal(last_block=self.last_block, checkpoints=self.checkpoints)
+            write_atomically(journal_path, journal.model_dump_json())
+
+
+class ChainIndexer:
+    """Resolves the confirmed head of a chain and rolls indexed models back across reorgs.
+
+    When a subscription is connected, heads and block hashes are taken from it and ranges in which
+    it pushed no log of a contract are skipped; otherwise the chain is polled. Logs are fetched
+    through a single collector for the whole chain, backed by an on-disk event store if given.
+    """
+
+    def __init__(
+        self,
+        ledger_api: EthereumApi,
+        block_tag: BlockTag = BlockTag.LATEST,
+        confirmations: int = 0,
+        reorg_window: int = REORG_WINDOW,
+        max_blocks: int = MAX_BLOCKS_PER_SYNC,
+        head_ttl: float = HEAD_TTL,
+        prescreen: bool = False,
+        store: EventStore | None = None,
+        subscription: "ChainSubscription | None" = None,
+        logger: Any = None,
+    ) -> None:
+        """Initialize the indexer."""
+        self.ledger_api = ledger_api
+        self.block_tag = BlockTag(block_tag)
+        self.confirmations = confirmations
+        self.reorg_window = reorg_window
+        self.max_blocks = max_blocks
+        self.head_ttl = head_ttl
+        self.subscription = subscription
+        self.logger = logger
+        self.logs = LogCollector(ledger_api, prescreen=prescreen, store=store)
+        self._head: BlockRef | None = None
+        self._head_expiry = 0.0
+        self._canonical_hashes: dict[int, str] = {}
+        self._canonical_expiry = 0.0
+
+    def get_block(self, block_identifier: int | str) -> BlockRef:
+        """Get a block by number or tag."""
+        if isinstance(block_identifier, int) and self.subscription is not None:
+            block_hash = self.subscription.block_hash(block_identifier)
+            if block_hash is not None:
+                return BlockRef(number=block_identifier, hash=block_hash)
+        block = self.ledger_api.api.eth.get_block(block_identifier)
+        return BlockRef(number=block["number"], hash=to_hex(block["hash"]))
+
+    def confirmed_block(self) -> BlockRef:
+        """Get the latest block considered final enough to be indexed."""
+        if self._head is None or time.monotonic() >= self._head_expiry:
+            self._head = self._resolve_confirmed_block()
+            self._head_expiry = time.monotonic() + self.head_ttl
+        return self._head
+
+    @property
+    def last_confirmed_block(self) -> BlockRef | None:
+        """The confirmed block last resolved, without asking the chain again."""
+        return self._head
+
+    def _resolve_confirmed_block(self) -> BlockRef:
+        head = None
+        if self.block_tag is BlockTag.LATEST and self.subscription is not None and self.subscription.connected:
+            head = self.subscription.head
+        if head is None:
+            head = self.get_block(self.block_tag.value)
+        if not self.confirmations:
+            return head
+        return self.get_block(max(head.number - self.confirmations, 0))
+
+    def is_canonical(self, block: BlockRef) -> bool:
+        """Whether the block is still part of the canonical chain.
+
+        The canonical hashes are reused for as long as the confirmed head, so that the models
+        indexed up to the same block in a tick share one lookup.
+        """
+        if time.monotonic() >= self._canonical_expiry:
+            self._canonical_hashes.clear()
+            self._canonical_expiry = time.monotonic() + self.head_ttl
+        block_hash = self._canonical_hashes.get(block.number)
+        if block_hash is None:
+            block_hash = self._canonical_hashes[block.number] = self.get_block(block.number).hash
+        return block_hash == block.hash
+
+    def may_have_logs(self, address: str, from_block: int, to_block: int) -> bool:
+        """Whether the contract may have emitted logs in the range, so that it has to be queried."""
+        if self.subscription is None or not self.subscription.covers(from_block, to_block):
+            return True
+        return self.subscription.has_logs(address, from_block, to_block)
+
+    def begin(self, model: IndexedModel) -> BlockRef | None:
+        """Roll back any reorganised blocks and get the block to index the model up to.
+
+        Returns None if there is no newly confirmed block to index.
+        """
+        rolled_back_to = model.rollback(self.is_canonical)
+        if rolled_back_to is not None:
+            self._head = None
+            self._canonical_hashes.clear()
+            self.logs.truncate(rolled_back_to)
+        if rolled_back_to is not None and self.logger is not None:
+            self.logger.warning(
+                f"Chain reorganisation detected, {type(model).__name__} rolled back to block {rolled_back_to}."
+            )
+        head = self.confirmed_block()
+        if head.number <= model.last_block:
+            return None
+        if model.last_block and head.number - model.last_block > self.max_blocks:
+            return self.get_block(model.last_block + self.max_blocks)
+        return head
+
+    def commit(self, model: IndexedModel, block: BlockRef) -> None:
+        """Checkpoint the model as indexed up to the block and persist it, its state only if it changed."""
+        if model.checkpoint(block, self.reorg_window):
+            model.save()
+        else:
+            model.save_checkpoints()
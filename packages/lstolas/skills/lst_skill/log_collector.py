@@ -0,0 +1,113 @@
+"""Unified fetching of the logs of the watched contract events of a chain."""
+
+import operator
+from bisect import bisect_left
+from typing import TYPE_CHECKING, Any
+from collections.abc import Callable, Iterator
+
+from eth_utils.address import to_checksum_address
+from aea_ledger_ethereum import EthereumApi
+from eth_utils.conversions import to_hex
+
+from packages.lstolas.skills.lst_skill.bloom import BloomScreen, fetch_blooms, candidate_ranges
+from packages.lstolas.skills.lst_skill.event_store import EventStore
+from packages.lstolas.skills.lst_skill.events_processing import EventRecord, EventDecoder
+
+
+if TYPE_CHECKING:
+    from packages.lstolas.skills.lst_skill.indexing import BlockRef
+
+
+class LogCollector:
+    """Fetches the logs of every watched contract event of a chain with a single `eth_getLogs` per window.
+
+    The raw logs of the last window are kept, keyed on its end block, and routed to the stream of
+    their contract event. Every indexed model syncing up to the same block shares the one query.
+    Logs are only decoded as their stream is iterated, one at a time.
+    With `prescreen`, the window is first narrowed down to the blocks whose header bloom may match.
+    With a `store`, fetched logs are kept on disk and ranges it already covers are read back from it.
+    Listeners are told the contract and event of every log routed, as soon as its window is fetched.
+    """
+
+    def __init__(self, ledger_api: EthereumApi, prescreen: bool = False, store: EventStore | None = None) -> None:
+        """Initialize the collector."""
+        self.ledger_api = ledger_api
+        self.prescreen = prescreen
+        self.store = store
+        self.listeners: list[Callable[[str, str], None]] = []
+        self._decoders: dict[tuple[str, str], EventDecoder] = {}
+        self._to_block: BlockRef | None = None
+        self._from_block = 0
+        self._logs: dict[tuple[str, str], list[Any]] = {}
+
+    def watch(self, instance: Any, *event_names: str) -> None:
+        """Watch events of a web3 contract instance."""
+        address = to_checksum_address(instance.address)
+        for event_abi in instance.abi:
+            if event_abi.get("type") == "event" and event_abi["name"] in event_names:
+                decoder = EventDecoder(event_abi, self.ledger_api.api.codec)
+                self._decoders[address, decoder.topic] = decoder
+        self._to_block = None
+
+    @property
+    def addresses(self) -> list[str]:
+        """The addresses of the watched contracts."""
+        return sorted({address for address, _ in self._decoders})
+
+    def iter_events(
+        self, address: str, event_name: str, from_block: int, to_block: "BlockRef"
+    ) -> Iterator[EventRecord]:
+        """Iterate over the events of a watched contract event emitted in the range, in chain order."""
+        if self._to_block != to_block or from_block < self._from_block:
+            self._fetch(from_block, to_block)
+        address = to_checksum_address(address)
+        logs = self._logs.get((address, event_name), [])
+        for index in range(bisect_left(logs, from_block, key=operator.itemgetter("blockNumber")), len(logs)):
+            log = logs[index]
+            yield self._decoders[address, to_hex(log["topics"][0])].decode(log)
+
+    def get_events(self, address: str, event_name: str, from_block: int, to_block: "BlockRef") -> list[EventRecord]:
+        """Get the events of a watched contract event emitted in the range, in chain order."""
+        return list(self.iter_events(address, event_name, from_block, to_block))
+
+    def truncate(self, block: int) -> None:
+        """Forget the logs after a block, when the chain reorganised past it."""
+        self._to_block = None
+        if self.store is not None:
+            self.store.truncate(block)
+
+    def _fetch(self, from_block: int, to_block: "BlockRef") -> None:
+        """Fetch and route the logs of every watched contract event in the range."""
+        streams = sorted(self._decoders)
+        if self.store is not None and self.store.covers(streams, from_block, to_block.number):
+            logs = list(self.store.scan(from_block, to_block.number))
+        else:
+            logs = self._get_logs(from_block, to_block.number)
+            if self.store is not None:
+                self.store.append(streams, logs, from_block, to_block.number)
+        routed: dict[tuple[str, str], list[Any]] = {}
+        for log in logs:
+            address = to_checksum_address(log["address"])
+            decoder = self._decoders.get((address, to_hex(log["topics"][0])))
+            if decoder is None:
+                continue
+            routed.setdefault((address, decoder.name), []).append(log)
+            for listener in self.listeners:
+                listener(address, decoder.name)
+        self._logs, self._from_block, self._to_block = routed, from_block, to_block
+
+    def _get_logs(self, from_block: int, to_block: int) -> list[Any]:
+        """Query the logs of every watched contract event in the range."""
+        topics = sorted({topic for _, topic in self._decoders})
+        ranges = [(from_block, to_block)]
+        if self.prescreen and to_block > from_block:
+            screen = BloomScreen(self.addresses, topics)
+            blooms = fetch_blooms(self.ledger_api, from_block, to_block)
+            ranges = candidate_ranges(number for number, bloom in blooms.items() if screen.may_match(bloom))
+        return [
+            log
+            for start, end in ranges
+            for log in self.ledger_api.api.eth.get_logs(
+                {"fromBlock": start, "toBlock": end, "address": self.addresses, "topics": [topics]}
+            )
+        ]
@@ -0,0 +1,343 @@
+"""Built-in metrics of the agent, buffered until they are pushed to the prometheus connection."""
+
+import math
+import time
+import bisect
+import threading
+import contextlib
+from enum import StrEnum
+from typing import Any, NamedTuple
+from urllib.parse import urlsplit
+from collections.abc import Iterator
+
+from web3.types import RPCEndpoint, RPCResponse
+from web3.providers import JSONBaseProvider
+
+from packages.lstolas.skills.lst_skill.rate_limit import QueueWaits, RequestClass, send_batch
+from packages.lstolas.skills.lst_skill.http_session import EndpointSession
+
+
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0, math.inf)  # seconds
+OTHER_CONTRACT = "other"  # contract label of the addresses the agent does not know by name
+
+
+class MetricType(StrEnum):
+    """The prometheus client class of a metric."""
+
+    COUNTER = "Counter"
+    GAUGE = "Gauge"
+    HISTOGRAM = "Histogram"
+
+
+class MetricSpec(NamedTuple):
+    """A metric of the agent, and the names of its labels."""
+
+    type: MetricType
+    name: str
+    description: str
+    labels: tuple[str, ...]
+
+
+class MetricUpdate(NamedTuple):
+    """An update of a metric, named after the method of the prometheus client applying it."""
+
+    name: str
+    callable: str
+    value: float
+    labels: tuple[tuple[str, str], ...]
+
+
+IS_TRIGGERED_SECONDS = MetricSpec(
+    MetricType.HISTOGRAM, "lst_is_triggered_seconds", "Time taken to check a round for work.", ("state",)
+)
+ACT_SECONDS = MetricSpec(MetricType.HISTOGRAM, "lst_act_seconds", "Time taken by the act of a round.", ("state",))
+RPC_REQUESTS = MetricSpec(
+    MetricType.COUNTER, "lst_rpc_requests", "JSON-RPC requests sent.", ("chain", "method", "contract")
+)
+RPC_ERRORS = MetricSpec(
+    MetricType.COUNTER, "lst_rpc_errors", "JSON-RPC requests answered with an error.", ("chain", "method", "contract")
+)
+RPC_SECONDS = MetricSpec(
+    MetricType.HISTOGRAM, "lst_rpc_seconds", "Time taken by a JSON-RPC request.", ("chain", "method", "contract")
+)
+WORK_DISCOVERED = MetricSpec(
+    MetricType.COUNTER, "lst_work_discovered", "Checks that found work for a round.", ("state",)
+)
+WORK_SETTLED = MetricSpec(
+    MetricType.COUNTER, "lst_work_settled", "Work items settled by a successful transaction.", ("state",)
+)
+TX_CONFIRMATION_SECONDS = MetricSpec(
+    MetricType.HISTOGRAM, "lst_tx_confirmation_seconds", "Time from sending a transaction to its receipt.", ("chain",)
+)
+NONCE_GAPS = MetricSpec(
+    MetricType.COUNTER, "lst_nonce_gaps", "Nonces skipped between two transactions of the agent.", ("chain",)
+)
+CACHE_HIT_RATE = MetricSpec(
+    MetricType.GAUGE, "lst_cache_hit_rate", "Share of the lookups of a cache answered from it.", ("cache",)
+)
+RPC_QUEUE_WAITS = MetricSpec(
+    MetricType.GAUGE,
+    "lst_rpc_queue_waits",
+    "Requests that waited for a token of a rate limited endpoint.",
+    ("chain", "endpoint", "request_class"),
+)
+RPC_QUEUE_WAIT_SECONDS = MetricSpec(
+    MetricType.GAUGE,
+    "lst_rpc_queue_wait_seconds",
+    "Total time requests waited for a token of a rate limited endpoint.",
+    ("chain", "endpoint", "request_class"),
+)
+RPC_QUEUE_MAX_WAIT_SECONDS = MetricSpec(
+    MetricType.GAUGE,
+    "lst_rpc_queue_max_wait_seconds",
+    "Longest time a request waited for a token of a rate limited endpoint.",
+    ("chain", "endpoint", "request_class"),
+)
+HTTP_REQUESTS = MetricSpec(
+    MetricType.GAUGE, "lst_http_requests", "HTTP requests sent over the shared session of an endpoint.", ("endpoint",)
+)
+HTTP_CONNECTIONS = MetricSpec(
+    MetricType.GAUGE, "lst_http_connections", "Connections opened by the shared session of an endpoint.", ("endpoint",)
+)
+HTTP_REUSE_RATE = MetricSpec(
+    MetricType.GAUGE,
+    "lst_http_reuse_rate",
+    "Share of the HTTP requests to an endpoint sent over an already open connection.",
+    ("endpoint",),
+)
+
+METRICS = (
+    IS_TRIGGERED_SECONDS,
+    ACT_SECONDS,
+    RPC_REQUESTS,
+    RPC_ERRORS,
+    RPC_SECONDS,
+    WORK_DISCOVERED,
+    WORK_SETTLED,
+    TX_CONFIRMATION_SECONDS,
+    NONCE_GAPS,
+    CACHE_HIT_RATE,
+    RPC_QUEUE_WAITS,
+    RPC_QUEUE_WAIT_SECONDS,
+    RPC_QUEUE_MAX_WAIT_SECONDS,
+    HTTP_REQUESTS,
+    HTTP_CONNECTIONS,
+    HTTP_REUSE_RATE,
+)
+
+
+def series(spec: MetricSpec) -> tuple[MetricSpec, ...]:
+    """Get the metrics registered with the prometheus connection for a metric of the agent.
+
+    A histogram is aggregated before it is pushed, so it is registered as the gauges of its
+    `_bucket`, `_sum` and `_count` series, only ever incremented: gauges keep the names prometheus
+    histograms expose, where counters would be suffixed with `_total`.
+    """
+    if spec.type is not MetricType.HISTOGRAM:
+        return (spec,)
+    return (
+        MetricSpec(
+            MetricType.GAUGE,
+            f"{spec.name}_bucket",
+            f"{spec.description} Observations up to `le`.",
+            (*spec.labels, "le"),
+        ),
+        MetricSpec(MetricType.GAUGE, f"{spec.name}_sum", f"{spec.description} Sum of the observations.", spec.labels),
+        MetricSpec(MetricType.GAUGE, f"{spec.name}_count", f"{spec.description} Number of observations.", spec.labels),
+    )
+
+
+def endpoint_label(url: str | None) -> str:
+    """Get the label of an endpoint, its host and port, leaving out the path and credentials it may hold."""
+    parts = urlsplit(url or "")
+    if parts.hostname is None:
+        return ""
+    return parts.hostname if parts.port is None else f"{parts.hostname}:{parts.port}"
+
+
+def bucket_label(bound: float) -> str:
+    """Get the `le` label of a bucket."""
+    return "+Inf" if math.isinf(bound) else str(bound)
+
+
+class Metrics:
+    """The updates of the metrics of the agent since they were last drained.
+
+    Updates may be recorded from any thread. Increments of a counter with the same labels are
+    summed until the next drain, and the observations of a histogram are counted in `BUCKETS`
+    and summed, so the messages of a push depend on the labels used, not on the traffic.
+    """
+
+    def __init__(self, enabled: bool = True, buckets: tuple[float, ...] = BUCKETS) -> None:
+        """Initialize the metrics, recording nothing unless enabled."""
+        self.enabled = enabled
+        self.buckets = buckets
+        self._lock = threading.Lock()
+        self._histograms: dict[tuple[str, tuple], list[float]] = {}  # observations per bucket, then their sum
+        self._counters: dict[tuple[str, tuple], float] = {}
+        self._gauges: dict[tuple[str, tuple], float] = {}
+        self._nonces: dict[str, int] = {}
+
+    def observe(self, spec: MetricSpec, value: float, **labels: str) -> None:
+        """Record an observation of a histogram."""
+        if not self.enabled:
+            return
+        key = (spec.name, tuple(sorted(labels.items())))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = [0] * (len(self.buckets) + 1)
+            histogram[bisect.bisect_left(self.buckets, value)] += 1
+            histogram[-1] += value
+
+    def inc(self, spec: MetricSpec, value: float = 1, **labels: str) -> None:
+        """Increment a counter."""
+        if not self.enabled:
+            return
+        key = (spec.name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def set(self, spec: MetricSpec, value: float, **labels: str) -> None:
+        """Set a gauge."""
+        if not self.enabled:
+            return
+        with self._lock:
+            self._gauges[spec.name, tuple(sorted(labels.items()))] = value
+
+    @contextlib.contextmanager
+    def timed(self, spec: MetricSpec, **labels: str) -> Iterator[None]:
+        """Observe how long the block takes, even when it raises."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(spec, time.perf_counter() - started, **labels)
+
+    def on_nonce(self, chain: str, nonce: int) -> None:
+        """Count the nonces skipped since the previous transaction of the agent on a chain."""
+        with self._lock:
+            previous = self._nonces.get(chain)
+            self._nonces[chain] = nonce
+        if previous is not None and nonce > previous + 1:
+            self.inc(NONCE_GAPS, nonce - previous - 1, chain=chain)
+
+    def set_hit_rate(self, cache: str, hits: int, misses: int) -> None:
+        """Set the hit rate of a cache, once it was looked up."""
+        if hits + misses:
+            self.set(CACHE_HIT_RATE, hits / (hits + misses), cache=cache)
+
+    def set_queue_waits(self, chain: str, url: str | None, waits: dict[RequestClass, QueueWaits]) -> None:
+        """Set how many requests of each class waited for a token of a rate limited endpoint, and for how long."""
+        for cls, class_waits in waits.items():
+            labels = {"chain": chain, "endpoint": endpoint_label(url), "request_class": cls.name.lower()}
+            self.set(RPC_QUEUE_WAITS, class_waits.count, **labels)
+            self.set(RPC_QUEUE_WAIT_SECONDS, class_waits.total, **labels)
+            self.set(RPC_QUEUE_MAX_WAIT_SECONDS, class_waits.max, **labels)
+
+    def set_session(self, url: str, session: EndpointSession) -> None:
+        """Set the requests sent and connections opened by the shared session of an endpoint."""
+        requests_sent, connections = session.adapter.counts
+        self.set(HTTP_REQUESTS, requests_sent, endpoint=endpoint_label(url))
+        self.set(HTTP_CONNECTIONS, connections, endpoint=endpoint_label(url))
+        self.set(HTTP_REUSE_RATE, session.reuse_rate, endpoint=endpoint_label(url))
+
+    def drain(self) -> list[MetricUpdate]:
+        """Get the updates recorded since the previous drain, and forget them."""
+        updates = []
+        with self._lock:
+            for (name, labels), histogram in self._histograms.items():
+                count = 0
+                for bound, observations in zip(self.buckets, histogram, strict=False):
+                    count += observations
+                    if count:
+                        bucket_labels = tuple(sorted((*labels, ("le", bucket_label(bound)))))
+                        updates.append(MetricUpdate(f"{name}_bucket", "inc", count, bucket_labels))
+                updates.extend(
+                    (
+                        MetricUpdate(f"{name}_sum", "inc", histogram[-1], labels),
+                        MetricUpdate(f"{name}_count", "inc", count, labels),
+                    )
+                )
+            updates.extend(MetricUpdate(name, "inc", value, labels) for (name, labels), value in self._counters.items())
+            updates.extend(MetricUpdate(name, "set", value, labels) for (name, labels), value in self._gauges.items())
+            self._histograms.clear()
+            self._counters.clear()
+            self._gauges.clear()
+        return updates
+
+
+def request_contract(method: str, params: Any, contracts: dict[str, str]) -> str:
+    """Get the name of the contract a request is about, or an empty label when it is about none."""
+    if method in {"eth_call", "eth_estimateGas"}:
+        address = params[0].get("to")
+    elif method == "eth_getLogs":
+        address = params[0].get("address")
+    else:
+        return ""
+    if isinstance(address, list):
+        if len(address) > 1:
+            return OTHER_CONTRACT
+        address = address[0] if address else None
+    if not address:
+        return ""
+    return contracts.get(str(address).lower(), OTHER_CONTRACT)
+
+
+class MeasuredProvider(JSONBaseProvider):
+    """A web3 provider counting and timing the requests of another one, by method and contract."""
+
+    def __init__(self, provider: Any, metrics: Metrics, chain: str, contracts: dict[str, str]) -> None:
+        """Initialize the provider, with the names of the known contracts by lower case address."""
+        super().__init__()
+        self.provider = provider
+        self.metrics = metrics
+        self.chain = chain
+        self.contracts = contracts
+
+    @property
+    def endpoint_uri(self) -> str | None:
+        """The url of the wrapped provider."""
+        return getattr(self.provider, "endpoint_uri", None)
+
+    def make_request(self, method: RPCEndpoint, params: Any) -> RPCResponse:
+        """Send a request, and record how long it took and whether it failed."""
+        labels = {"chain": self.chain, "method": method, "contract": request_contract(method, params, self.contracts)}
+        started = time.perf_counter()
+        try:
+            response = self.provider.make_request(method, params)
+        except Exception:
+            self.metrics.inc(RPC_ERRORS, **labels)
+            raise
+        finally:
+            self.metrics.observe(RPC_SECONDS, time.perf_counter() - started, **labels)
+            self.metrics.inc(RPC_REQUESTS, **labels)
+        if "error" in response:
+            self.metrics.inc(RPC_ERRORS, **labels)
+        return response
+
+    def make_batch_request(self, requests: list[tuple[RPCEndpoint, Any]]) -> list[RPCResponse]:
+        """Send a batch, counting each of its requests and timing it as a whole under its first request."""
+        labels = [
+            {"chain": self.chain, "method": method, "contract": request_contract(method, params, self.contracts)}
+            for method, params in requests
+        ]
+        started = time.perf_counter()
+        try:
+            responses = send_batch(self.provider, requests)
+        except Exception:
+            for request_labels in labels:
+                self.metrics.inc(RPC_ERRORS, **request_labels)
+            raise
+        finally:
+            self.metrics.observe(RPC_SECONDS, time.perf_counter() - started, **labels[0])
+            for request_labels in labels:
+                self.metrics.inc(RPC_REQUESTS, **request_labels)
+        for request_labels, response in zip(labels, responses, strict=True):
+            if "error" in response:
+                self.metrics.inc(RPC_ERRORS, **request_labels)
+        return responses
+
+    def is_connected(self, show_traceback: bool = False) -> bool:
+        """Whether the wrapped provider is connected."""
+        return self.provider.is_connected(show_traceback)
@@ -1,5 +1,7 @@
 """Strategy for the lst agent."""
 
+import time
+import threading
 from typing import Any, cast
 from pathlib import Path
 from textwrap import dedent
@@ -7,6 +9,7 @@ from functools import cached_property
 from collections.abc import Callable
 
 from aea.skills.base import Model
+from eth_utils.address import to_checksum_address
 from aea.contracts.base import Contract, contract_registry
 from aea_ledger_ethereum import Address, EthereumApi, EthereumCrypto
 from aea.configurations.base import ContractConfig
@@ -16,20 +19,50 @@ from aea.configurations.data_types import ComponentType
 from packages.eightballer.contracts.erc_20 import PUBLIC_ID as ERC20_PUBLIC_ID
 from packages.lstolas.contracts.lst_collector import PUBLIC_ID as LST_COLLECTOR_PUBLIC_ID
 from packages.eightballer.contracts.amb_gnosis import PUBLIC_ID as AMB_LAYER_2_PUBLIC_ID
+from packages.eightballer.contracts.multicall3 import PUBLIC_ID as MULTICALL3_PUBLIC_ID
+from packages.lstolas.skills.lst_skill.metrics import (
+    METRICS,
+    WORK_SETTLED,
+    TX_CONFIRMATION_SECONDS,
+    Metrics,
+    MeasuredProvider,
+    series,
+)
 from packages.eightballer.contracts.amb_mainnet import PUBLIC_ID as AMB_MAINNET_PUBLIC_ID
 from packages.lstolas.contracts.lst_distributor import PUBLIC_ID as LST_DISTRIBUTOR_PUBLIC_ID
+from packages.lstolas.skills.lst_skill.cassette import Cassette, CassetteMode, ReplayTiming, use_cassette
+from packages.lstolas.skills.lst_skill.indexing import BlockTag, ChainIndexer
+from packages.lstolas.skills.lst_skill.rpc_pool import RpcPool, build_rpc_pool
+from packages.lstolas.skills.lst_skill.multicall import MULTICALL3_ADDRESS
+from packages.lstolas.skills.lst_skill.rate_limit import RateLimitedProvider, rate_limited
+from packages.lstolas.skills.lst_skill.view_cache import ViewCache
+from packages.lstolas.skills.lst_skill.async_chain import AsyncChain, AsyncLimits
+from packages.lstolas.skills.lst_skill.event_store import EventStore
 from packages.eightballer.contracts.erc_20.contract import Erc20
 from packages.lstolas.contracts.lst_activity_module import PUBLIC_ID as LST_ACTIVITY_MODULE_PUBLIC_ID
 from packages.lstolas.contracts.lst_staking_manager import PUBLIC_ID as LST_STAKING_MANAGER_PUBLIC_ID
 from packages.lstolas.contracts.lst_unstake_relayer import PUBLIC_ID as LST_UNSTAKE_RELAYER_PUBLIC_ID
+from packages.lstolas.skills.lst_skill.http_session import SESSIONS, SessionConfig, PooledHTTPProvider, close_sessions
+from packages.lstolas.skills.lst_skill.redeem_queue import RedeemQueue
 from packages.lstolas.skills.lst_skill.transactions import signed_tx_to_dict, try_send_signed_transaction
+from packages.lstolas.skills.lst_skill.subscriptions import ChainSubscription
 from packages.eightballer.contracts.amb_gnosis_helper import PUBLIC_ID as AMB_GNOSIS_HELPER_PUBLIC_ID
+from packages.lstolas.skills.lst_skill.contract_cache import INSTANCE_CACHE, CachedEthereumApi
+from packages.lstolas.skills.lst_skill.token_balances import TokenBalances
+from packages.eightballer.protocols.prometheus.message import PrometheusMessage
 from packages.lstolas.contracts.lst_collector.contract import LstCollector
+from packages.lstolas.skills.lst_skill.bridge_messages import BridgeMessages
+from packages.lstolas.skills.lst_skill.staked_services import StakedServices
 from packages.eightballer.contracts.amb_gnosis.contract import AmbGnosis as AmbLayer2
+from packages.eightballer.contracts.multicall3.contract import Multicall3
 from packages.eightballer.contracts.amb_mainnet.contract import AmbMainnet
+from packages.eightballer.protocols.prometheus.dialogues import PrometheusDialogues
 from packages.lstolas.contracts.lst_distributor.contract import LstDistributor
 from packages.lstolas.contracts.lst_staking_processor_l2 import PUBLIC_ID as LST_STAKING_PROCESSOR_L2_PUBLIC_ID
 from packages.lstolas.contracts.lst_staking_token_locked import PUBLIC_ID as LST_STAKING_TOKEN_LOCKED_PUBLIC_ID
+from packages.lstolas.skills.lst_skill.collector_balances import CollectorBalances
+from packages.lstolas.skills.lst_skill.signature_readiness import SignatureReadiness
+from packages.eightballer.connections.prometheus.connection import PUBLIC_ID as PROMETHEUS_PUBLIC_ID
 from packages.eightballer.protocols.user_interaction.message import UserInteractionMessage
 from packages.lstolas.contracts.lst_activity_module.contract import LstActivityModule
 from packages.lstolas.contracts.lst_staking_manager.contract import LstStakingManager
@@ -46,6 +79,10 @@ ROOT = Path(__file__).parent.parent.parent.parent
 GAS_PREMIUM = 1.2  # multiplier to add to the gas price
 TX_MINING_TIMEOUT = 300  # seconds
 TXN_ATTEMPTS = 3  # number of attempts to send a transaction
+REDEEM_QUEUE_START_BLOCK = 17590111  # first layer 2 block scanned for redeem requests
+BRIDGE_MESSAGES_START_BLOCK = 17590111  # first layer 2 block scanned for relayed tokens
+STAKED_SERVICES_START_BLOCK = 17497117  # layer 2 deployment block of the staking manager
+BALANCE_RECONCILE_INTERVAL = 7200  # layer 1 blocks between checks of the mirrored balances against the token
 
 
 def retry_decorator(attempts: int = TXN_ATTEMPTS):
@@ -76,9 +113,11 @@ def load_contract(contract_path: Path) -> Contract:
     return contract_registry.make(str(configuration.public_id))
 
 
-class LstStrategy(Model):
+class LstStrategy(Model):  # noqa: PLR0904
     """This class implements the strategy of the lst agent."""
 
+    layer_1_rpc_endpoint: str
+    layer_2_rpc_endpoint: str
     layer_1_api: EthereumApi
     layer_2_api: EthereumApi
 
@@ -94,11 +133,70 @@ class LstStrategy(Model):
     layer_2_amb_helper: Address
     # token contract address
     layer_1_olas_token_address: Address
+    # multicall contract address, deployed at the same address on both layers
+    multicall_address: Address
+    # directory in which indexed state is persisted across restarts
+    data_dir: Path
+    # addresses whose layer 1 OLAS balance is mirrored from transfer events
+    layer_1_watched_addresses: list[Address]
+    # block tag and number of confirmations after which events are indexed
+    layer_1_block_tag: BlockTag
+    layer_1_confirmations: int
+    layer_2_block_tag: BlockTag
+    layer_2_confirmations: int
+    # whether block ranges are screened against the header logs blooms before fetching their logs
+    layer_1_bloom_prescreen: bool
+    layer_2_bloom_prescreen: bool
+    # optional websocket endpoints, to be pushed heads and logs instead of polling for them
+    layer_1_ws_endpoint: str | None
+    layer_2_ws_endpoint: str | None
+    # pooling, keepalive, compression and per request class timeouts of the endpoint connections
+    rpc_session_config: SessionConfig
+    # optional pools of extra endpoints the requests of each layer are spread over, each endpoint
+    # optionally rate limited as `{requests_per_second, burst}` like the main one (layer_N_rpc_rate_limit)
+    layer_1_rpc_pool: RpcPool | None
+    layer_2_rpc_pool: RpcPool | None
+    # whether the checkpoint round reads the staking proxies through the async chain access
+    async_reads: bool
+    # optional cassette the chain traffic is recorded to, or replayed from, as `{path, mode, timing}`
+    rpc_cassette: Cassette | None
+    # metrics of the rounds, chain requests and transactions, pushed to the prometheus connection when enabled
+    metrics: Metrics
 
     def __init__(self, **kwargs):
         """Initialize the strategy of the lst agent."""
-        self.layer_1_api = EthereumApi(address=kwargs.pop("layer_1_rpc_endpoint"))
-        self.layer_2_api = EthereumApi(address=kwargs.pop("layer_2_rpc_endpoint"))
+        self.layer_1_rpc_endpoint = kwargs.pop("layer_1_rpc_endpoint")
+        self.layer_2_rpc_endpoint = kwargs.pop("layer_2_rpc_endpoint")
+        self.layer_1_api = CachedEthereumApi(address=self.layer_1_rpc_endpoint)
+        self.layer_2_api = CachedEthereumApi(address=self.layer_2_rpc_endpoint)
+        self.rpc_session_config = SessionConfig.from_args(kwargs.pop("rpc_http", None))
+        layer_1_rate_limit = kwargs.pop("layer_1_rpc_rate_limit", None)
+        layer_2_rate_limit = kwargs.pop("layer_2_rpc_rate_limit", None)
+        self.layer_1_rpc_pool = build_rpc_pool(
+            self.layer_1_rpc_endpoint,
+            kwargs.pop("layer_1_rpc_endpoints", None),
+            kwargs.pop("layer_1_rpc_hedge_after", None),
+            layer_1_rate_limit,
+            self.rpc_session_config,
+        )
+        self.layer_2_rpc_pool = build_rpc_pool(
+            self.layer_2_rpc_endpoint,
+            kwargs.pop("layer_2_rpc_endpoints", None),
+            kwargs.pop("layer_2_rpc_hedge_after", None),
+            layer_2_rate_limit,
+            self.rpc_session_config,
+        )
+        self.rpc_endpoint_providers: dict[str, list[Any]] = {}  # chain: provider of each endpoint, under the pool
+        for chain, api, url, pool, rate_limit in (
+            ("layer_1", self.layer_1_api, self.layer_1_rpc_endpoint, self.layer_1_rpc_pool, layer_1_rate_limit),
+            ("layer_2", self.layer_2_api, self.layer_2_rpc_endpoint, self.layer_2_rpc_pool, layer_2_rate_limit),
+        ):
+            api.api.provider = (
+                pool if pool is not None else rate_limited(PooledHTTPProvider(url, self.rpc_session_config), rate_limit)
+            )
+            self.rpc_endpoint_providers[chain] = (
+                [endpoint.provider for endpoint in pool.endpoints] if pool is not None else [api.api.provider]
+            )
 
         self.lst_collector_address = kwargs.pop("lst_collector_address")
         self.lst_unstake_relayer_address = kwargs.pop("lst_unstake_relayer_address")
@@ -111,15 +209,106 @@ class LstStrategy(Model):
         self.layer_2_amb_helper = kwargs.pop("layer_2_amb_helper")
 
         self.layer_1_olas_token_address = kwargs.pop("layer_1_olas_address")
+        self.multicall_address = kwargs.pop("multicall_address", MULTICALL3_ADDRESS)
+        self.data_dir = Path(kwargs.pop("data_dir", "data"))
+        self.layer_1_watched_addresses = [
+            to_checksum_address(address)
+            for address in kwargs.pop("layer_1_watched_addresses", None)
+            or [self.lst_unstake_relayer_address, self.lst_distributor_address]
+        ]
+        self.layer_1_balance_reconcile_interval = kwargs.pop(
+            "layer_1_balance_reconcile_interval", BALANCE_RECONCILE_INTERVAL
+        )
+        self.layer_1_block_tag = BlockTag(kwargs.pop("layer_1_block_tag", BlockTag.LATEST))
+        self.layer_1_confirmations = kwargs.pop("layer_1_confirmations", 0)
+        self.layer_2_block_tag = BlockTag(kwargs.pop("layer_2_block_tag", BlockTag.LATEST))
+        self.layer_2_confirmations = kwargs.pop("layer_2_confirmations", 0)
+        self.layer_1_bloom_prescreen = kwargs.pop("layer_1_bloom_prescreen", False)
+        self.layer_2_bloom_prescreen = kwargs.pop("layer_2_bloom_prescreen", False)
+        self.layer_1_ws_endpoint = kwargs.pop("layer_1_ws_endpoint", None)
+        self.layer_2_ws_endpoint = kwargs.pop("layer_2_ws_endpoint", None)
+        self.async_reads = kwargs.pop("async_reads", False)
+        self.rpc_cassette_mode: CassetteMode | None = None
+        self.rpc_cassette = self._use_cassette(kwargs.pop("rpc_cassette", None))
+        self.metrics = Metrics(enabled=kwargs.pop("prometheus_metrics", False))
+        self._metrics_registered = False
+        if self.metrics.enabled:
+            contracts = self.contract_names
+            for api, chain in ((self.layer_1_api, "layer_1"), (self.layer_2_api, "layer_2")):
+                api.api.provider = MeasuredProvider(api.api.provider, self.metrics, chain, contracts)
+        self._new_block = threading.Event()
 
         super().__init__(**kwargs)
 
+    def _use_cassette(self, args: dict | None) -> Cassette | None:
+        """Record the chain traffic to the configured cassette, or replay it from there without network access."""
+        if not args:
+            return None
+        cassette = Cassette(Path(args["path"]))
+        mode = CassetteMode(args.get("mode", CassetteMode.REPLAY))
+        timing = ReplayTiming(args.get("timing", ReplayTiming.NONE))
+        use_cassette(self.layer_1_api, cassette, "layer_1", mode, timing)
+        use_cassette(self.layer_2_api, cassette, "layer_2", mode, timing)
+        # async reads do not go through the cassette, the synchronous clients record and replay them instead
+        self.async_reads = False
+        if mode is CassetteMode.REPLAY:
+            # pushed heads and logs are not replayed, the synchronous clients read the cassette instead
+            self.layer_1_ws_endpoint = self.layer_2_ws_endpoint = None
+        self.rpc_cassette_mode = mode
+        return cassette
+
+    @property
+    def contract_names(self) -> dict[str, str]:
+        """Get the names of the configured contracts, by lower case address."""
+        contracts = {
+            "lst_collector": self.lst_collector_address,
+            "lst_unstake_relayer": self.lst_unstake_relayer_address,
+            "lst_distributor": self.lst_distributor_address,
+            "lst_staking_manager": self.lst_staking_manager_address,
+            "lst_staking_processor_l2": self.lst_staking_processor_l2_address,
+            "amb_layer_1": self.layer_1_amb_home,
+            "amb_layer_2": self.layer_2_amb_home,
+            "amb_helper": self.layer_2_amb_helper,
+            "olas": self.layer_1_olas_token_address,
+            "multicall3": self.multicall_address,
+        }
+        return {address.lower(): name for name, address in contracts.items()}
+
+    def setup(self) -> None:
+        """Drop the contract instances of a previous load and start the configured subscriptions."""
+        INSTANCE_CACHE.clear()
+        for pool in (self.layer_1_rpc_pool, self.layer_2_rpc_pool):
+            if pool is not None:
+                pool.logger = self.context.logger
+        for subscription in self.subscriptions:
+            subscription.start()
+
+    def teardown(self) -> None:
+        """Stop the subscriptions and async chain access, release what the chain clients hold and save a recording."""
+        for subscription in self.subscriptions:
+            subscription.stop()
+        for pool in (self.layer_1_rpc_pool, self.layer_2_rpc_pool):
+            if pool is not None:
+                pool.close()
+        close_sessions()
+        if "async_chain" in self.__dict__:
+            self.async_chain.stop()
+        if self.rpc_cassette is not None and self.rpc_cassette_mode is CassetteMode.RECORD:
+            self.rpc_cassette.save()
+        INSTANCE_CACHE.clear()
+        for name in ("layer_1_indexer", "layer_2_indexer"):
+            indexer = self.__dict__.get(name)
+            if indexer is not None and indexer.logs.store is not None:
+                indexer.logs.store.close()
+
     @cached_property
     def lst_collector_contract(self) -> LstCollector:
         """Get the LST Collector contract."""
         return cast(
             LstCollector,
-            load_contract(ROOT / LST_COLLECTOR_PUBLIC_ID.author / "contracts" / LST_COLLECTOR_PUBLIC_ID.name),
+            self.view_cache.wrap(
+                load_contract(ROOT / LST_COLLECTOR_PUBLIC_ID.author / "contracts" / LST_COLLECTOR_PUBLIC_ID.name)
+            ),
         )
 
     @cached_property
@@ -167,8 +356,10 @@ class LstStrategy(Model):
         """Get the LST Staking Manager contract."""
         return cast(
             LstStakingManager,
-            load_contract(
-                ROOT / LST_STAKING_MANAGER_PUBLIC_ID.author / "contracts" / LST_STAKING_MANAGER_PUBLIC_ID.name
+            self.view_cache.wrap(
+                load_contract(
+                    ROOT / LST_STAKING_MANAGER_PUBLIC_ID.author / "contracts" / LST_STAKING_MANAGER_PUBLIC_ID.name
+                )
             ),
         )
 
@@ -187,8 +378,13 @@ class LstStrategy(Model):
         """Get the LST Staking Token Locked contract."""
         return cast(
             LstStakingTokenLocked,
-            load_contract(
-                ROOT / LST_STAKING_TOKEN_LOCKED_PUBLIC_ID.author / "contracts" / LST_STAKING_TOKEN_LOCKED_PUBLIC_ID.name
+            self.view_cache.wrap(
+                load_contract(
+                    ROOT
+                    / LST_STAKING_TOKEN_LOCKED_PUBLIC_ID.author
+                    / "contracts"
+                    / LST_STAKING_TOKEN_LOCKED_PUBLIC_ID.name
+                )
             ),
         )
 
@@ -207,6 +403,225 @@ class LstStrategy(Model):
         """Get the OLAS token contract."""
         return cast(Erc20, load_contract(ROOT / ERC20_PUBLIC_ID.author / "contracts" / ERC20_PUBLIC_ID.name))
 
+    @cached_property
+    def multicall_contract(self) -> Multicall3:
+        """Get the Multicall3 contract."""
+        return cast(
+            Multicall3, load_contract(ROOT / MULTICALL3_PUBLIC_ID.author / "contracts" / MULTICALL3_PUBLIC_ID.name)
+        )
+
+    @cached_property
+    def layer_1_subscription(self) -> ChainSubscription | None:
+        """Get the subscription to the layer 1 heads and watched logs, if a websocket endpoint is configured."""
+        if not self.layer_1_ws_endpoint:
+            return None
+        addresses = [self.layer_1_amb_home, self.layer_1_olas_token_address]
+        return ChainSubscription(
+            self.layer_1_ws_endpoint, addresses, on_head=lambda _: self._new_block.set(), logger=self.context.logger
+        )
+
+    @cached_property
+    def layer_2_subscription(self) -> ChainSubscription | None:
+        """Get the subscription to the layer 2 heads and watched logs, if a websocket endpoint is configured."""
+        if not self.layer_2_ws_endpoint:
+            return None
+        addresses = [
+            self.lst_collector_address,
+            self.lst_staking_processor_l2_address,
+            self.lst_staking_manager_address,
+            self.layer_2_amb_home,
+        ]
+        return ChainSubscription(
+            self.layer_2_ws_endpoint, addresses, on_head=lambda _: self._new_block.set(), logger=self.context.logger
+        )
+
+    @property
+    def subscriptions(self) -> list[ChainSubscription]:
+        """Get the configured subscriptions."""
+        return [
+            subscription
+            for subscription in (self.layer_1_subscription, self.layer_2_subscription)
+            if subscription is not None
+        ]
+
+    def wait_for_new_block(self, timeout: float) -> None:
+        """Wait until a subscription is pushed a new head, or for the timeout when none is connected."""
+        if not any(subscription.connected for subscription in self.subscriptions):
+            time.sleep(timeout)
+            return
+        self._new_block.clear()
+        self._new_block.wait(timeout)
+
+    @cached_property
+    def async_chain(self) -> AsyncChain:
+        """Get the async chain access, whose event loop starts with the first submitted coroutine.
+
+        Its requests draw from the rate limit of the main endpoint of each chain, are recorded in the
+        metrics, and are bounded in flight by the connection pool size of the synchronous sessions.
+        """
+        endpoints = {"layer_1": self.layer_1_rpc_endpoint, "layer_2": self.layer_2_rpc_endpoint}
+        limits = {
+            chain: AsyncLimits(
+                max_in_flight=self.rpc_session_config.pool_size,
+                bucket=next(
+                    (
+                        provider.bucket
+                        for provider in self.rpc_endpoint_providers[chain]
+                        if isinstance(provider, RateLimitedProvider) and provider.endpoint_uri == url
+                    ),
+                    None,
+                ),
+                metrics=self.metrics if self.metrics.enabled else None,
+                chain=chain,
+                contracts=self.contract_names,
+            )
+            for chain, url in endpoints.items()
+        }
+        return AsyncChain(endpoints, limits)
+
+    @cached_property
+    def view_cache(self) -> ViewCache:
+        """Get the read-through cache of the contract view calls."""
+        return ViewCache(block_number=self.known_head_number)
+
+    def known_head_number(self, ledger_api: EthereumApi) -> int | None:
+        """Get the number of the confirmed block the indexer of a chain last resolved, if any."""
+        block = self.get_indexer(ledger_api).last_confirmed_block
+        return None if block is None else block.number
+
+    def get_indexer(self, ledger_api: EthereumApi) -> ChainIndexer:
+        """Get the indexer of the chain of a ledger api."""
+        return self.layer_1_indexer if ledger_api is self.layer_1_api else self.layer_2_indexer
+
+    @cached_property
+    def layer_1_indexer(self) -> ChainIndexer:
+        """Get the reorg-aware indexer of the layer 1 events."""
+        indexer = ChainIndexer(
+            self.layer_1_api,
+            self.layer_1_block_tag,
+            self.layer_1_confirmations,
+            prescreen=self.layer_1_bloom_prescreen,
+            store=EventStore(self.data_dir / "events" / "layer_1"),
+            subscription=self.layer_1_subscription,
+            logger=self.context.logger,
+        )
+        indexer.logs.watch(
+            self.layer_1_olas_contract.get_instance(self.layer_1_api, self.layer_1_olas_token_address), "Transfer"
+        )
+        indexer.logs.listeners.append(self.view_cache.on_event)
+        return indexer
+
+    @cached_property
+    def layer_2_indexer(self) -> ChainIndexer:
+        """Get the reorg-aware indexer of the layer 2 events, fetching every watched event in one query."""
+        indexer = ChainIndexer(
+            self.layer_2_api,
+            self.layer_2_block_tag,
+            self.layer_2_confirmations,
+            prescreen=self.layer_2_bloom_prescreen,
+            store=EventStore(self.data_dir / "events" / "layer_2"),
+            subscription=self.layer_2_subscription,
+            logger=self.context.logger,
+        )
+        indexer.logs.watch(
+            self.lst_staking_processor_l2_contract.get_instance(
+                self.layer_2_api, self.lst_staking_processor_l2_address
+            ),
+            "RequestQueued",
+            "RequestExecuted",
+        )
+        indexer.logs.watch(
+            self.lst_collector_contract.get_instance(self.layer_2_api, self.lst_collector_address),
+            "OperationReceiverBalancesUpdated",
+            "OperationReceiversSet",
+            "ProtocolBalanceUpdated",
+            "ImplementationUpdated",
+            "TokensRelayed",
+        )
+        indexer.logs.watch(
+            self.layer_2_amb_home_contract.get_instance(self.layer_2_api, self.layer_2_amb_home),
+            "UserRequestForSignature",
+            "CollectedSignatures",
+        )
+        indexer.logs.watch(
+            self.lst_staking_manager_contract.get_instance(self.layer_2_api, self.lst_staking_manager_address),
+            "Staked",
+        )
+        indexer.logs.listeners.append(self.view_cache.on_event)
+        return indexer
+
+    @cached_property
+    def redeem_queue(self) -> RedeemQueue:
+        """Get the persistent queue of open redeem requests."""
+        return RedeemQueue.load(self.data_dir / "redeem_queue.json", last_block=REDEEM_QUEUE_START_BLOCK - 1)
+
+    @cached_property
+    def bridge_messages(self) -> BridgeMessages:
+        """Get the bridge messages sent by the collector that are not executed on layer 1 yet."""
+        return BridgeMessages.load(self.data_dir / "bridge_messages.json", last_block=BRIDGE_MESSAGES_START_BLOCK - 1)
+
+    @cached_property
+    def staked_services(self) -> StakedServices:
+        """Get the services staked through the staking manager."""
+        return StakedServices.load(self.data_dir / "staked_services.json", last_block=STAKED_SERVICES_START_BLOCK - 1)
+
+    @cached_property
+    def collector_balances(self) -> CollectorBalances:
+        """Get the mirror of the collector balances."""
+        return CollectorBalances.load(self.data_dir / "collector_balances.json")
+
+    @cached_property
+    def layer_1_olas_balances(self) -> TokenBalances:
+        """Get the mirror of the layer 1 OLAS balances of the watched addresses."""
+        return TokenBalances.load(self.data_dir / "layer_1_olas_balances.json")
+
+    @cached_property
+    def signature_readiness(self) -> SignatureReadiness:
+        """Get the readiness of the signatures of the pending bridge messages."""
+        return SignatureReadiness.load(self.data_dir / "signature_readiness.json")
+
+    def push_metrics(self) -> None:
+        """Send the metric updates recorded since the last push, registering the metrics on the first one."""
+        if not self.metrics.enabled:
+            return
+        if "view_cache" in self.__dict__:
+            self.metrics.set_hit_rate("view", self.view_cache.hits, self.view_cache.misses)
+        self.metrics.set_hit_rate("contract_instance", INSTANCE_CACHE.hits, INSTANCE_CACHE.misses)
+        for chain, providers in self.rpc_endpoint_providers.items():
+            for provider in providers:
+                if isinstance(provider, RateLimitedProvider):
+                    self.metrics.set_queue_waits(chain, provider.endpoint_uri, provider.bucket.waits)
+        for url, session in list(SESSIONS.items()):
+            self.metrics.set_session(url, session)
+        messages = []
+        if not self._metrics_registered:
+            messages.extend(
+                {
+                    "performative": PrometheusMessage.Performative.ADD_METRIC,
+                    "type": spec.type.value,
+                    "title": spec.name,
+                    "description": spec.description,
+                    "labels": dict.fromkeys(spec.labels, ""),
+                }
+                for metric in METRICS
+                for spec in series(metric)
+            )
+            self._metrics_registered = True
+        messages.extend(
+            {
+                "performative": PrometheusMessage.Performative.UPDATE_METRIC,
+                "title": update.name,
+                "callable": update.callable,
+                "value": float(update.value),
+                "labels": dict(update.labels),
+            }
+            for update in self.metrics.drain()
+        )
+        dialogues = cast(PrometheusDialogues, self.context.prometheus_dialogues)
+        for kwargs in messages:
+            msg, _ = dialogues.create(counterparty=str(PROMETHEUS_PUBLIC_ID), **kwargs)
+            self.context.outbox.put_message(message=msg)
+
     @cached_property
     def crypto(self) -> EthereumCrypto:
         """Get EthereumCrypto."""
@@ -221,10 +636,14 @@ class LstStrategy(Model):
 class TransactionSettler(Model):
     """Transaction Settler for building transactions."""
 
+    last_receipt: Any = None  # receipt of the last transaction settled successfully
+
     def build_transaction(self, ledger: EthereumApi, func: Any, value: int = 0) -> dict[str, Any] | None:
         """Build the transaction."""
 
         nonce = ledger._try_get_transaction_count(self.strategy.sender_address)  # noqa: SLF001
+        if nonce is not None:
+            self.strategy.metrics.on_nonce(self.chain_label(ledger), nonce)
 
         try:
             return func.build_transaction(
@@ -280,11 +699,16 @@ class TransactionSettler(Model):
             self.log.error("Transaction failed after maximum attempts.")
             return False
         self.context.logger.info(f"Transaction hash: {tx_hash.hex()}")
-        tx_receipt = ledger_api.api.eth.wait_for_transaction_receipt(tx_hash, timeout=TX_MINING_TIMEOUT)
+        with self.strategy.metrics.timed(TX_CONFIRMATION_SECONDS, chain=self.chain_label(ledger_api)):
+            tx_receipt = ledger_api.api.eth.wait_for_transaction_receipt(tx_hash, timeout=TX_MINING_TIMEOUT)
+        # the cached views of the contract may be changed by the transaction
+        self.strategy.view_cache.forget(contract_address)
         if tx_receipt is None or tx_receipt.get("status") != 1:
             self.log.error("Transaction failed...")
             return False
         self.log.info("Transaction successful!")
+        self.last_receipt = tx_receipt
+        self.strategy.metrics.inc(WORK_SETTLED, state=self.context.behaviours.main.round_name)
 
         chain_id_to_explorer = {
             11155111: "https://sepolia.etherscan.io/tx/",
@@ -307,6 +731,10 @@ class TransactionSettler(Model):
         """Get the strategy."""
         return cast(LstStrategy, self.context.lst_strategy)
 
+    def chain_label(self, ledger_api: EthereumApi) -> str:
+        """Get the metric label of the chain of a ledger api."""
+        return "layer_1" if ledger_api is self.strategy.layer_1_api else "layer_2"
+
     @property
     def log(self):
         """Get the logger."""
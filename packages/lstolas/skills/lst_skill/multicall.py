@@ -0,0 +1,55 @@
+"""Batching of contract view calls through Multicall3."""
+
+from typing import Any, NamedTuple
+from collections.abc import Sequence
+
+from aea_ledger_ethereum import EthereumApi
+
+from packages.eightballer.contracts.multicall3.contract import Multicall3
+
+
+MULTICALL3_ADDRESS = "0xcA11bde05977b3631167028862bE2a173976CA11"  # same address on every supported chain
+MAX_CALLS_PER_BATCH = 500
+
+
+class Call(NamedTuple):
+    """A single view call to be aggregated."""
+
+    target: str
+    call_data: str
+
+
+class CallResult(NamedTuple):
+    """The result of a single aggregated call."""
+
+    success: bool
+    return_data: bytes
+
+
+def aggregate(
+    multicall_contract: Multicall3,
+    ledger_api: EthereumApi,
+    multicall_address: str,
+    calls: Sequence[Call],
+    batch_size: int = MAX_CALLS_PER_BATCH,
+) -> list[CallResult]:
+    """Execute the calls through `aggregate3`, one eth_call per batch, without failing on reverts."""
+    results: list[CallResult] = []
+    for start in range(0, len(calls), batch_size):
+        batch = [(call.target, True, call.call_data) for call in calls[start : start + batch_size]]
+        function: Any = multicall_contract.aggregate3(ledger_api, multicall_address, calls=batch)
+        results.extend(CallResult(success, bytes(data)) for success, data in function.call())
+    return results
+
+
+def encode_call(instance: Any, fn_name: str, *args: Any) -> Call:
+    """Encode a call to a function of a web3 contract instance."""
+    return Call(target=instance.address, call_data=instance.encodeABI(fn_name=fn_name, args=list(args)))
+
+
+def decode_bool(ledger_api: EthereumApi, result: CallResult) -> bool | None:
+    """Decode a boolean return value, or None if the call reverted."""
+    if not result.success:
+        return None
+    (value,) = ledger_api.api.codec.decode(["bool"], result.return_data)
+    return bool(value)
@@ -0,0 +1,196 @@
+"""On-demand profiling of the running agent: call profiles, stack samples, allocations and thread stacks."""
+
+import io
+import sys
+import time
+import pstats
+import cProfile
+import threading
+import traceback
+import tracemalloc
+from enum import StrEnum
+from collections import Counter
+
+
+MAX_PROFILE_SECONDS = 600  # longest profiling session that can be requested
+SAMPLE_INTERVAL = 0.005  # seconds between two samples of the thread stacks
+STATS_LIMIT = 50  # functions or allocation sites listed by default
+TRACEMALLOC_FRAMES = 10  # frames kept per traced allocation
+
+
+class ProfileMode(StrEnum):
+    """How a profiling session observes the agent."""
+
+    CPROFILE = "cprofile"  # every call of the thread that started the session, as pstats
+    SAMPLER = "sampler"  # periodic samples of the stacks of every thread, as collapsed stacks
+
+
+class ProfilingError(Exception):
+    """A profiling request that cannot be served in the current state."""
+
+
+def collapse(frame, thread_name: str) -> str:
+    """Get a stack in the collapsed format of flame graphs, from the thread down to the given frame."""
+    names = [f"{caller.f_code.co_filename}:{caller.f_code.co_name}" for caller, _ in traceback.walk_stack(frame)]
+    return ";".join([thread_name, *reversed(names)])
+
+
+class ProfileSession:
+    """A profiling session ending once its duration has elapsed.
+
+    A sampler runs on its own thread and stops by itself. A cProfile session only sees the
+    thread that started it, and must be stopped from that thread, so it is stopped by the first
+    request for its result once its duration has elapsed.
+    """
+
+    def __init__(self, mode: ProfileMode, seconds: float, interval: float = SAMPLE_INTERVAL) -> None:
+        """Initialize the session."""
+        self.mode = mode
+        self.seconds = seconds
+        self.interval = interval
+        self.deadline = 0.0
+        self.samples: Counter[str] = Counter()
+        self._profile: cProfile.Profile | None = None
+        self._stopped = threading.Event()
+        self._sampler: threading.Thread | None = None
+
+    @property
+    def remaining(self) -> float:
+        """Seconds left before the session ends."""
+        return max(0.0, self.deadline - time.monotonic())
+
+    def start(self) -> None:
+        """Start observing the agent."""
+        self.deadline = time.monotonic() + self.seconds
+        if self.mode is ProfileMode.CPROFILE:
+            self._profile = cProfile.Profile()
+            self._profile.enable()
+        else:
+            self._sampler = threading.Thread(target=self._sample, name="profiling-sampler", daemon=True)
+            self._sampler.start()
+
+    def _sample(self) -> None:
+        """Sample the stacks of the other threads until the session ends."""
+        own = threading.get_ident()
+        while not self._stopped.wait(self.interval) and time.monotonic() < self.deadline:
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():  # noqa: SLF001
+                if ident != own:
+                    self.samples[collapse(frame, names.get(ident, str(ident)))] += 1
+
+    def stop(self, limit: int = STATS_LIMIT) -> str:
+        """Stop observing the agent, and get what was observed."""
+        self._stopped.set()
+        if self._sampler is not None:
+            self._sampler.join()
+            return "".join(f"{stack} {count}\n" for stack, count in self.samples.most_common())
+        self._profile.disable()
+        stream = io.StringIO()
+        pstats.Stats(self._profile, stream=stream).sort_stats(pstats.SortKey.CUMULATIVE).print_stats(limit)
+        return stream.getvalue()
+
+
+class Profiler:
+    """The profiling session of the agent, one at a time, and the result of the last one."""
+
+    def __init__(self) -> None:
+        """Initialize the profiler."""
+        self.session: ProfileSession | None = None
+        self.result: str | None = None
+
+    def start(self, mode: ProfileMode, seconds: float) -> None:
+        """Start a profiling session for a number of seconds."""
+        if self.session is not None:
+            msg = f"A {self.session.mode} session is already running."
+            raise ProfilingError(msg)
+        if not 0 < seconds <= MAX_PROFILE_SECONDS:
+            msg = f"The duration must be between 0 and {MAX_PROFILE_SECONDS} seconds."
+            raise ValueError(msg)
+        self.session = ProfileSession(mode, seconds)
+        self.session.start()
+
+    def stop(self, limit: int = STATS_LIMIT) -> str:
+        """Stop the running session early, and get its result."""
+        if self.session is None:
+            msg = "No profiling session is running."
+            raise ProfilingError(msg)
+        self.result = self.session.stop(limit)
+        self.session = None
+        return self.result
+
+    def get_result(self, limit: int = STATS_LIMIT) -> str:
+        """Get the result of the last session, stopping it if its duration has elapsed."""
+        if self.session is not None:
+            if self.session.remaining:
+                msg = f"The {self.session.mode} session is running for {self.session.remaining:.1f} more seconds."
+                raise ProfilingError(msg)
+            return self.stop(limit)
+        if self.result is None:
+            msg = "No profiling session was run."
+            raise ProfilingError(msg)
+        return self.result
+
+
+class MemoryTracer:
+    """Allocations traced by tracemalloc, and their growth between two snapshots."""
+
+    def __init__(self) -> None:
+        """Initialize the tracer."""
+        self.tracing = False
+        self.snapshot: tracemalloc.Snapshot | None = None
+
+    def start(self, frames: int = TRACEMALLOC_FRAMES) -> None:
+        """Start tracing the allocations."""
+        tracemalloc.start(frames)
+        self.tracing = True
+        self.snapshot = None
+
+    def stop(self) -> None:
+        """Stop tracing the allocations, freeing the traces."""
+        tracemalloc.stop()
+        self.tracing = False
+        self.snapshot = None
+
+    def take_snapshot(self) -> tracemalloc.Snapshot:
+        """Take a snapshot of the traced allocations, leaving out those of the tracing itself."""
+        if not tracemalloc.is_tracing():
+            msg = "Allocations are not traced, start tracing them first."
+            raise ProfilingError(msg)
+        return tracemalloc.take_snapshot().filter_traces(
+            (
+                tracemalloc.Filter(False, tracemalloc.__file__),
+                tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+                tracemalloc.Filter(False, "<unknown>"),
+            )
+        )
+
+    def top(self, limit: int = STATS_LIMIT) -> str:
+        """Get the allocation sites holding the most memory, keeping the snapshot as the base of the next diff."""
+        self.snapshot = self.take_snapshot()
+        current, peak = tracemalloc.get_traced_memory()
+        lines = [f"traced: {current / 1024:.1f} KiB, peak: {peak / 1024:.1f} KiB"]
+        lines.extend(str(stat) for stat in self.snapshot.statistics("lineno")[:limit])
+        return "\n".join(lines) + "\n"
+
+    def diff(self, limit: int = STATS_LIMIT) -> str:
+        """Get the allocation sites that grew the most since the previous snapshot, and take the next base."""
+        snapshot = self.take_snapshot()
+        previous, self.snapshot = self.snapshot, snapshot
+        if previous is None:
+            return "No previous snapshot, this one is the base of the next diff.\n"
+        stats = snapshot.compare_to(previous, "lineno")
+        return "".join(f"{stat}\n" for stat in stats[:limit])
+
+
+def thread_stacks() -> str:
+    """Get the current stack of every thread."""
+    names = {thread.ident: thread for thread in threading.enumerate()}
+    lines = []
+    for ident, frame in sys._current_frames().items():  # noqa: SLF001
+        thread = names.get(ident)
+        name = thread.name if thread is not None else "unknown"
+        daemon = " daemon" if thread is not None and thread.daemon else ""
+        lines.append(f'Thread "{name}" ({ident}){daemon}:\n')
+        lines.extend(traceback.format_stack(frame))
+        lines.append("\n")
+    return "".join(lines)
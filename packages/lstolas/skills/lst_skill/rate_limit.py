@@ -0,0 +1,160 @@
+"""Client-side rate limiting of the JSON-RPC requests sent to an endpoint, by request class."""
+
+import time
+import heapq
+import itertools
+import threading
+import contextlib
+from enum import IntEnum
+from typing import Any
+from contextvars import ContextVar
+from dataclasses import dataclass
+from collections.abc import Iterator
+
+from web3.types import RPCEndpoint, RPCResponse
+from web3.providers import JSONBaseProvider
+
+
+class RequestClass(IntEnum):
+    """The class of a request, a lower value being served first."""
+
+    TRANSACTION = 0
+    RECEIPT = 1
+    READ = 2
+    BACKFILL = 3
+
+
+METHOD_CLASSES = {
+    "eth_sendRawTransaction": RequestClass.TRANSACTION,
+    "eth_getTransactionReceipt": RequestClass.RECEIPT,
+    "eth_getTransactionByHash": RequestClass.RECEIPT,
+    "eth_getTransactionCount": RequestClass.RECEIPT,
+    "eth_getLogs": RequestClass.BACKFILL,
+}
+
+_request_class: ContextVar[RequestClass | None] = ContextVar("request_class", default=None)
+
+
+@contextlib.contextmanager
+def request_class(value: RequestClass) -> Iterator[None]:
+    """Send the requests made in the block as the given class, whatever their method."""
+    token = _request_class.set(value)
+    try:
+        yield
+    finally:
+        _request_class.reset(token)
+
+
+def classify(method: str) -> RequestClass:
+    """Get the class of a request, from the enclosing `request_class` block or else its method."""
+    value = _request_class.get()
+    if value is not None:
+        return value
+    return METHOD_CLASSES.get(method, RequestClass.READ)
+
+
+def send_batch(provider: Any, requests: list[tuple[RPCEndpoint, Any]]) -> list[RPCResponse]:
+    """Send requests as one batch through a provider able to, else one after the other, and get their responses."""
+    if hasattr(provider, "make_batch_request"):
+        return provider.make_batch_request(requests)
+    return list(itertools.starmap(provider.make_request, requests))
+
+
+@dataclass
+class QueueWaits:
+    """How long the requests of a class waited for a token."""
+
+    count: int = 0
+    total: float = 0.0
+    max: float = 0.0
+
+    @property
+    def mean(self) -> float:
+        """The mean wait, in seconds."""
+        return self.total / self.count if self.count else 0.0
+
+
+class TokenBucket:
+    """A token bucket refilled at `rate` tokens per second up to `burst`, served by request class.
+
+    Requests waiting for a token queue by class, then by arrival: a transaction never waits behind
+    a backlog of log scans, only behind the refill of the next token.
+    """
+
+    def __init__(self, rate: float, burst: int) -> None:
+        """Initialize the bucket, full."""
+        if rate <= 0 or burst < 1:
+            msg = f"Invalid rate limit of {rate} requests per second with a burst of {burst}."
+            raise ValueError(msg)
+        self.rate = rate
+        self.burst = burst
+        self.waits = {request_class: QueueWaits() for request_class in RequestClass}
+        self._tokens = float(burst)
+        self._refilled_at = time.monotonic()
+        self._queue: list[tuple[RequestClass, int]] = []
+        self._tickets = itertools.count()
+        self._condition = threading.Condition()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._refilled_at) * self.rate)
+        self._refilled_at = now
+
+    def acquire(self, request_class: RequestClass) -> float:
+        """Wait for a token, after every queued request of a higher class, and get the time waited."""
+        started = time.monotonic()
+        ticket = (request_class, next(self._tickets))
+        with self._condition:
+            heapq.heappush(self._queue, ticket)
+            while True:
+                self._refill()
+                first = self._queue[0] == ticket
+                if first and self._tokens >= 1:
+                    heapq.heappop(self._queue)
+                    self._tokens -= 1
+                    self._condition.notify_all()
+                    break
+                self._condition.wait((1 - self._tokens) / self.rate if first else None)
+            waited = time.monotonic() - started
+            waits = self.waits[request_class]
+            waits.count += 1
+            waits.total += waited
+            waits.max = max(waits.max, waited)
+        return waited
+
+
+class RateLimitedProvider(JSONBaseProvider):
+    """A web3 provider sending the requests of another one as the tokens of a bucket allow."""
+
+    def __init__(self, provider: Any, bucket: TokenBucket) -> None:
+        """Initialize the provider."""
+        super().__init__()
+        self.provider = provider
+        self.bucket = bucket
+
+    @property
+    def endpoint_uri(self) -> str | None:
+        """The url of the wrapped provider."""
+        return getattr(self.provider, "endpoint_uri", None)
+
+    def make_request(self, method: RPCEndpoint, params: Any) -> RPCResponse:
+        """Send a request once the bucket lets its class through."""
+        self.bucket.acquire(classify(method))
+        return self.provider.make_request(method, params)
+
+    def make_batch_request(self, requests: list[tuple[RPCEndpoint, Any]]) -> list[RPCResponse]:
+        """Send a batch once the bucket lets the class of its first request through, a token for the whole batch."""
+        self.bucket.acquire(classify(requests[0][0]))
+        return send_batch(self.provider, requests)
+
+    def is_connected(self, show_traceback: bool = False) -> bool:
+        """Whether the wrapped provider is connected."""
+        return self.provider.is_connected(show_traceback)
+
+
+def rate_limited(provider: Any, limit: dict | None) -> Any:
+    """Wrap a provider in a bucket configured as `{requests_per_second, burst}`, if a rate is given."""
+    if not limit or limit.get("requests_per_second") is None:
+        return provider
+    rate = float(limit["requests_per_second"])
+    return RateLimitedProvider(provider, TokenBucket(rate, int(limit.get("burst", max(1, round(rate))))))
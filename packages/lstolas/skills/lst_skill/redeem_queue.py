@@ -0,0 +1,85 @@
+"""Persistent queue of redeem requests reconciled from the staking processor events."""
+
+from enum import Enum
+from typing import Any
+from collections.abc import Iterable
+
+from pydantic import BaseModel
+from eth_utils.conversions import to_hex
+
+from packages.lstolas.skills.lst_skill.hashing import get_queued_hash
+from packages.lstolas.skills.lst_skill.indexing import IndexedModel
+
+
+class OperationStatus(Enum):
+    """Status of the operation."""
+
+    NON_EXISTENT = 0
+    EXTERNAL_CALLED_FAILED = 1
+    INSUFFICIENT_OLAS_BALANCE = 2
+    UNSUPPORTED_OPERATION_TYPE = 3
+    CONTRACT_IS_PAUSED = 4
+
+
+class QueuedRequest(BaseModel):
+    """A request queued on the staking processor that has not been executed yet."""
+
+    batch_hash: str
+    target: str
+    amount: int
+    operation: str
+    status: int
+    block_number: int
+
+    @property
+    def queued_hash(self) -> str:
+        """The key of the request in the processor `queuedHashes` and `processedHashes` mappings."""
+        return get_queued_hash(self.batch_hash, self.target, self.amount, self.operation)
+
+
+class RedeemQueue(IndexedModel):
+    """Redeem requests waiting for OLAS, keyed by queued hash, along with the last block they were indexed at."""
+
+    pending: dict[str, QueuedRequest] = {}
+
+    def apply_events(self, events: Iterable[Any]) -> tuple[list[QueuedRequest], list[QueuedRequest]]:
+        """Apply the `RequestQueued` and `RequestExecuted` events, in chain order.
+
+        Only requests waiting for OLAS are queued. Returns the newly queued requests, and the requests
+        skipped for having another status.
+        """
+        queued, skipped = [], []
+        for event in events:
+            if event.event == "RequestExecuted":
+                self.on_request_executed(
+                    to_hex(event.args.batchHash), event.args.target, event.args.amount, to_hex(event.args.operation)
+                )
+                continue
+            request = QueuedRequest(
+                batch_hash=to_hex(event.args.batchHash),
+                target=event.args.target,
+                amount=event.args.amount,
+                operation=to_hex(event.args.operation),
+                status=event.args.status,
+                block_number=event.blockNumber,
+            )
+            if OperationStatus(request.status) is not OperationStatus.INSUFFICIENT_OLAS_BALANCE:
+                skipped.append(request)
+            elif self.on_request_queued(request):
+                queued.append(request)
+        return queued, skipped
+
+    def on_request_queued(self, request: QueuedRequest) -> bool:
+        """Insert a request from a `RequestQueued` event, returning whether it was new."""
+        queued_hash = request.queued_hash
+        is_new = queued_hash not in self.pending
+        self.pending[queued_hash] = request
+        return is_new
+
+    def on_request_executed(self, batch_hash: str, target: str, amount: int, operation: str) -> QueuedRequest | None:
+        """Remove the request matching a `RequestExecuted` event."""
+        return self.remove(get_queued_hash(batch_hash, target, amount, operation))
+
+    def remove(self, queued_hash: str) -> QueuedRequest | None:
+        """Remove a request that is no longer open."""
+        return self.pending.pop(queued_hash, None)
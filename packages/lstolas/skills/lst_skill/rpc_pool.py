@@ -0,0 +1,235 @@
+"""Pool of JSON-RPC endpoints of a chain, routed by latency and health."""
+
+import time
+import threading
+import contextvars
+from typing import Any
+from collections import deque
+from dataclasses import field, dataclass
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+
+from web3 import HTTPProvider
+from web3.types import RPCEndpoint, RPCResponse
+from web3.providers import JSONBaseProvider
+
+from packages.lstolas.skills.lst_skill.rate_limit import send_batch, rate_limited
+from packages.lstolas.skills.lst_skill.http_session import SessionConfig, PooledHTTPProvider
+
+
+WINDOW = 100  # requests the latency and error rate of an endpoint are computed over
+FAILURE_THRESHOLD = 5  # consecutive failures that open the circuit breaker of an endpoint
+COOLDOWN = 30.0  # seconds an open circuit breaker waits before letting a trial request through
+MAX_COOLDOWN = 600.0
+REQUEST_TIMEOUT = 10.0
+BROADCAST_METHODS = frozenset({"eth_sendRawTransaction"})
+
+
+@dataclass
+class Endpoint:
+    """An endpoint of the pool and its rolling health."""
+
+    url: str
+    weight: float = 1.0
+    provider: Any = None
+    latencies: deque = field(default_factory=lambda: deque(maxlen=WINDOW))
+    outcomes: deque = field(default_factory=lambda: deque(maxlen=WINDOW))
+    consecutive_failures: int = 0
+    cooldown: float = COOLDOWN
+    open_until: float = 0.0
+
+    def __post_init__(self) -> None:
+        """Connect to the endpoint unless a provider is given."""
+        if self.provider is None:
+            self.provider = HTTPProvider(self.url, request_kwargs={"timeout": REQUEST_TIMEOUT})
+
+    def percentile(self, fraction: float) -> float:
+        """Get a percentile of the recent latencies, in seconds."""
+        if not self.latencies:
+            return 0.0
+        latencies = sorted(self.latencies)
+        return latencies[min(int(fraction * len(latencies)), len(latencies) - 1)]
+
+    @property
+    def p50(self) -> float:
+        """The median recent latency."""
+        return self.percentile(0.5)
+
+    @property
+    def p99(self) -> float:
+        """The 99th percentile recent latency."""
+        return self.percentile(0.99)
+
+    @property
+    def error_rate(self) -> float:
+        """The share of recent requests that failed."""
+        return self.outcomes.count(False) / len(self.outcomes) if self.outcomes else 0.0
+
+    def is_available(self, now: float) -> bool:
+        """Whether the circuit breaker lets requests through, possibly as a trial."""
+        return now >= self.open_until
+
+    @property
+    def score(self) -> float:
+        """The routing cost of the endpoint, lower is better."""
+        return self.p50 * (1 + self.error_rate) / self.weight
+
+
+class RpcPool(JSONBaseProvider):
+    """A web3 provider spreading requests over several endpoints of the same chain.
+
+    Reads go to the available endpoint with the lowest weighted median latency and fail over to the
+    next ones. With `hedge_after`, a read still pending after that many seconds is also sent to the
+    next endpoint, and the first answer wins. Transaction broadcasts go to every available endpoint.
+    An endpoint failing `failure_threshold` times in a row is skipped until its cooldown elapses,
+    after which one trial request decides whether it is closed again or its cooldown doubles.
+    """
+
+    def __init__(
+        self,
+        endpoints: list[Endpoint],
+        hedge_after: float | None = None,
+        failure_threshold: int = FAILURE_THRESHOLD,
+        logger: Any = None,
+    ) -> None:
+        """Initialize the pool."""
+        super().__init__()
+        if not endpoints:
+            msg = "An RPC pool needs at least one endpoint."
+            raise ValueError(msg)
+        self.endpoints = endpoints
+        self.hedge_after = hedge_after
+        self.failure_threshold = failure_threshold
+        self.logger = logger
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=2 * len(endpoints), thread_name_prefix="rpc-pool")
+
+    @property
+    def endpoint_uri(self) -> str:
+        """The url of the endpoint reads are currently routed to."""
+        return self.ranked()[0].url
+
+    def ranked(self) -> list[Endpoint]:
+        """Get the endpoints in routing order, those whose circuit breaker is open last."""
+        now = time.monotonic()
+        with self._lock:
+            return sorted(self.endpoints, key=lambda endpoint: (not endpoint.is_available(now), endpoint.score))
+
+    def make_request(self, method: RPCEndpoint, params: Any) -> RPCResponse:
+        """Route a request to the pool."""
+        if method in BROADCAST_METHODS:
+            return self._broadcast(method, params)
+        return self._read(method, params)
+
+    def _submit(self, endpoint: Endpoint, method: RPCEndpoint, params: Any) -> Future:
+        # the request class of a rate limited endpoint is read from the context of the caller
+        return self._executor.submit(contextvars.copy_context().run, self._call, endpoint, method, params)
+
+    def _call(self, endpoint: Endpoint, method: RPCEndpoint, params: Any) -> RPCResponse:
+        started = time.monotonic()
+        try:
+            response = endpoint.provider.make_request(method, params)
+        except Exception:
+            self._record(endpoint, time.monotonic() - started, success=False)
+            raise
+        # json-rpc errors, such as reverts, are answers of a healthy endpoint
+        self._record(endpoint, time.monotonic() - started, success=True)
+        return response
+
+    def _record(self, endpoint: Endpoint, latency: float, success: bool) -> None:
+        with self._lock:
+            endpoint.outcomes.append(success)
+            if success:
+                endpoint.latencies.append(latency)
+                endpoint.consecutive_failures, endpoint.cooldown = 0, COOLDOWN
+                return
+            endpoint.consecutive_failures += 1
+            if endpoint.consecutive_failures < self.failure_threshold:
+                return
+            endpoint.open_until = time.monotonic() + endpoint.cooldown
+            endpoint.cooldown = min(endpoint.cooldown * 2, MAX_COOLDOWN)
+        if self.logger is not None:
+            self.logger.warning(f"RPC endpoint {endpoint.url} keeps failing, skipping it for a while.")
+
+    def _read(self, method: RPCEndpoint, params: Any) -> RPCResponse:
+        candidates = self.ranked()
+        error: Exception | None = None
+        pending: set[Future] = set()
+        while candidates or pending:
+            if candidates:
+                pending.add(self._submit(candidates.pop(0), method, params))
+            timeout = self.hedge_after if candidates else None
+            done, pending = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    return future.result()
+                error = future.exception()
+        raise error or ConnectionError(f"No RPC endpoint answered {method}.")
+
+    def _broadcast(self, method: RPCEndpoint, params: Any) -> RPCResponse:
+        now = time.monotonic()
+        endpoints = [endpoint for endpoint in self.ranked() if endpoint.is_available(now)] or self.ranked()[:1]
+        futures = [self._submit(endpoint, method, params) for endpoint in endpoints]
+        responses, error = [], None
+        for future in futures:
+            try:
+                responses.append(future.result())
+            except Exception as e:  # noqa: BLE001
+                error = e
+        accepted = [response for response in responses if "error" not in response]
+        if accepted:
+            return accepted[0]
+        if responses:
+            return responses[0]
+        raise error or ConnectionError(f"No RPC endpoint accepted {method}.")
+
+    def make_batch_request(self, requests: list[tuple[RPCEndpoint, Any]]) -> list[RPCResponse]:
+        """Send a batch of reads to the endpoints in routing order, until one answers it."""
+        error: Exception | None = None
+        for endpoint in self.ranked():
+            started = time.monotonic()
+            try:
+                responses = send_batch(endpoint.provider, requests)
+            except Exception as e:  # noqa: BLE001
+                self._record(endpoint, time.monotonic() - started, success=False)
+                error = e
+                continue
+            self._record(endpoint, time.monotonic() - started, success=True)
+            return responses
+        raise error or ConnectionError("No RPC endpoint answered the batch.")
+
+    def is_connected(self, show_traceback: bool = False) -> bool:
+        """Whether any endpoint of the pool is connected."""
+        return any(endpoint.provider.is_connected(show_traceback) for endpoint in self.endpoints)
+
+    def close(self) -> None:
+        """Stop the threads of the pool."""
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+def build_rpc_pool(
+    url: str,
+    endpoints: list[dict] | None,
+    hedge_after: float | None = None,
+    rate_limit: dict | None = None,
+    session: SessionConfig | None = None,
+) -> RpcPool | None:
+    """Build the pool of a chain from its configured endpoints, along with its main endpoint url.
+
+    Each configured endpoint is a mapping with an `url`, an optional `weight` and an optional rate
+    limit as `requests_per_second` and `burst`; the rate limit of the main endpoint is given apart.
+    No pool is built when no endpoint is configured.
+    """
+    if not endpoints:
+        return None
+    configs = {url: {"url": url, **(rate_limit or {})}} | {endpoint["url"]: endpoint for endpoint in endpoints}
+    return RpcPool(
+        [
+            Endpoint(
+                url,
+                float(config.get("weight", 1.0)),
+                rate_limited(PooledHTTPProvider(url, session or SessionConfig()), config),
+            )
+            for url, config in configs.items()
+        ],
+        hedge_after=hedge_after,
+    )
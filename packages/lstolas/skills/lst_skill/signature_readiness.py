@@ -0,0 +1,58 @@
+"""Readiness of the validator signatures of pending AMB messages."""
+
+from pydantic import BaseModel
+
+from packages.lstolas.skills.lst_skill.indexing import IndexedModel
+
+
+RECHECK_INTERVAL = 60  # seconds before a message without signatures is checked again
+MAX_RECHECK_INTERVAL = 3600  # seconds, upper bound of the exponential re-check interval
+
+
+class Recheck(BaseModel):
+    """When a message whose signatures were not collected is due to be checked again."""
+
+    attempts: int = 0
+    next_check: float = 0
+
+
+class SignatureReadiness(IndexedModel):
+    """Tracks which pending messages have their signatures collected on the layer 2 AMB.
+
+    Messages are marked ready from the `CollectedSignatures` events of the AMB home contract.
+    Messages the events have not covered are checked against the helper with an exponential
+    re-check interval, so that signatures are only fetched once a message is known to be ready.
+    """
+
+    collected: set[str] = set()
+    rechecks: dict[str, Recheck] = {}
+
+    def on_collected_signatures(self, message_hash: str) -> None:
+        """Apply a `CollectedSignatures` event."""
+        self.collected.add(message_hash)
+        self.rechecks.pop(message_hash, None)
+
+    def should_check(self, message_hash: str, now: float) -> bool:
+        """Whether the signatures of the message should be fetched now."""
+        if message_hash in self.collected:
+            return True
+        recheck = self.rechecks.get(message_hash)
+        return recheck is None or now >= recheck.next_check
+
+    def on_not_ready(
+        self,
+        message_hash: str,
+        now: float,
+        interval: float = RECHECK_INTERVAL,
+        max_interval: float = MAX_RECHECK_INTERVAL,
+    ) -> None:
+        """Back off from a message whose signatures could not be fetched."""
+        self.collected.discard(message_hash)
+        recheck = self.rechecks.setdefault(message_hash, Recheck())
+        recheck.next_check = now + min(interval * 2**recheck.attempts, max_interval)
+        recheck.attempts += 1
+
+    def retain(self, message_hashes: set[str]) -> None:
+        """Drop the messages that are no longer pending."""
+        self.collected &= message_hashes
+        self.rechecks = {key: value for key, value in self.rechecks.items() if key in message_hashes}
@@ -0,0 +1,413 @@
+"""In-process simulated chain, answering the JSON-RPC requests the skill makes from synthetic state."""
+
+import json
+import threading
+from bisect import bisect_left, bisect_right
+from typing import Any
+from collections import Counter
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from collections.abc import Callable
+
+from eth_abi import decode, encode
+from hexbytes import HexBytes
+from web3.types import RPCEndpoint, RPCResponse
+from eth_account import Account
+from eth_utils.abi import event_abi_to_log_topic, function_abi_to_4byte_selector
+from web3.providers import JSONBaseProvider
+from web3._utils.abi import get_abi_input_types, get_abi_output_types  # noqa: PLC2701
+from eth_utils.crypto import keccak
+from eth_utils.address import to_checksum_address
+from web3._utils.encoding import Web3JsonEncoder  # noqa: PLC2701
+from eth_utils.conversions import to_hex, to_bytes
+from eth_account._utils.typed_transactions import TypedTransaction  # noqa: PLC2701
+from eth_account._utils.legacy_transactions import Transaction  # noqa: PLC2701
+
+from packages.lstolas.skills.lst_skill.bloom import BLOOM_BYTES, bloom_bits
+from packages.lstolas.skills.lst_skill.multicall import MULTICALL3_ADDRESS
+
+
+ERROR_SELECTOR = bytes.fromhex("08c379a0")  # Error(string)
+GAS_PRICE = 10**9
+GAS_ESTIMATE = 100_000
+AGGREGATE3_ABI = {
+    "type": "function",
+    "name": "aggregate3",
+    "stateMutability": "payable",
+    "inputs": [
+        {
+            "name": "calls",
+            "type": "tuple[]",
+            "components": [
+                {"name": "target", "type": "address"},
+                {"name": "allowFailure", "type": "bool"},
+                {"name": "callData", "type": "bytes"},
+            ],
+        }
+    ],
+    "outputs": [
+        {
+            "name": "returnData",
+            "type": "tuple[]",
+            "components": [{"name": "success", "type": "bool"}, {"name": "returnData", "type": "bytes"}],
+        }
+    ],
+}
+
+
+class Revert(Exception):
+    """Raised by a simulated contract function to revert the call."""
+
+
+class SimulatedContract:
+    """A contract answering calls to the functions of its ABI with Python handlers.
+
+    A handler gets the decoded arguments of a call and returns its outputs, a tuple when there
+    are several; a function without a handler reverts.
+    """
+
+    def __init__(self, chain: "SimulatedChain", address: str, abi: list[dict], handlers: dict[str, Callable]) -> None:
+        """Initialize the contract."""
+        self.chain = chain
+        self.address = to_checksum_address(address)
+        self.handlers = handlers
+        self.functions = {function_abi_to_4byte_selector(item): item for item in abi if item.get("type") == "function"}
+        self.events = {item["name"]: item for item in abi if item.get("type") == "event"}
+
+    def call(self, data: bytes) -> bytes:
+        """Run a call to the contract and get its encoded outputs."""
+        function_abi = self.functions.get(data[:4])
+        handler = function_abi and self.handlers.get(function_abi["name"])
+        if handler is None:
+            msg = "function not simulated"
+            raise Revert(msg)
+        args = decode(get_abi_input_types(function_abi), data[4:])
+        outputs = handler(*args)
+        output_types = get_abi_output_types(function_abi)
+        if not output_types:
+            return b""
+        return encode(output_types, outputs if len(output_types) > 1 else [outputs])
+
+    def emit(
+        self, event_name: str, block: int | None = None, transaction_hash: bytes | None = None, **args: Any
+    ) -> None:
+        """Emit an event of the contract."""
+        event_abi = self.events[event_name]
+        indexed = [item for item in event_abi["inputs"] if item.get("indexed")]
+        data = [item for item in event_abi["inputs"] if not item.get("indexed")]
+        topics = [event_abi_to_log_topic(event_abi)] + [
+            encode([item["type"]], [args[item["name"]]]) for item in indexed
+        ]
+        self.chain.add_log(
+            self.address,
+            topics,
+            encode([item["type"] for item in data], [args[item["name"]] for item in data]),
+            block,
+            transaction_hash,
+        )
+
+
+class SimulatedChain(JSONBaseProvider):
+    """A web3 provider serving a synthetic chain from memory.
+
+    It covers the requests the skill makes: heads and blocks, `eth_getLogs`, `eth_call` to the
+    simulated contracts and Multicall3, and sending, mining and looking up transactions with their
+    nonces and gas. Every request is counted by method in `requests`.
+
+    A transaction runs the handler of its function like a call does, in a block of its own, with
+    `transaction` set to its sender and hash: handlers only change their state when it is set.
+    """
+
+    def __init__(self, chain_id: int, block_time: int = 12, genesis_timestamp: int = 1_700_000_000) -> None:
+        """Initialize the chain at block 0."""
+        super().__init__()
+        self.chain_id = chain_id
+        self.block_time = block_time
+        self.genesis_timestamp = genesis_timestamp
+        self.head = 0
+        self.requests: Counter[str] = Counter()
+        self.contracts: dict[str, SimulatedContract] = {}
+        self.nonces: Counter[str] = Counter()
+        self.receipts: dict[str, dict] = {}
+        self.transaction: dict[str, str] | None = None
+        self._logs: dict[int, list[dict]] = {}
+        self._log_blocks: list[int] = []
+        self._transactions: dict[int, list[str]] = {}
+
+    def deploy(self, address: str, abi: list[dict], **handlers: Callable) -> SimulatedContract:
+        """Add a contract answering the functions of its ABI with the given handlers."""
+        contract = SimulatedContract(self, address, abi, handlers)
+        self.contracts[contract.address] = contract
+        return contract
+
+    def mine(self, blocks: int = 1) -> int:
+        """Advance the head, and get the new head block number."""
+        self.head += blocks
+        return self.head
+
+    def block_timestamp(self, number: int) -> int:
+        """Get the timestamp of a block."""
+        return self.genesis_timestamp + number * self.block_time
+
+    def block_hash(self, number: int) -> bytes:
+        """Get the hash of a block."""
+        return keccak(self.chain_id.to_bytes(8, "big") + number.to_bytes(8, "big"))
+
+    def add_log(
+        self, address: str, topics: list[bytes], data: bytes, block: int | None, transaction_hash: bytes | None
+    ) -> None:
+        """Add a log to a block, the head one by default."""
+        block = self.head if block is None else block
+        if transaction_hash is None and self.transaction is not None:
+            transaction_hash = HexBytes(self.transaction["hash"])
+        logs = self._logs.get(block)
+        if logs is None:
+            logs = self._logs[block] = []
+            self._log_blocks.insert(bisect_left(self._log_blocks, block), block)
+        transaction_hash = transaction_hash or keccak(self.block_hash(block) + len(logs).to_bytes(4, "big"))
+        logs.append(
+            {
+                "address": address,
+                "topics": [to_hex(topic) for topic in topics],
+                "data": to_hex(data),
+                "blockNumber": hex(block),
+                "blockHash": to_hex(self.block_hash(block)),
+                "transactionHash": to_hex(transaction_hash),
+                "transactionIndex": "0x0",
+                "logIndex": hex(len(logs)),
+                "removed": False,
+            }
+        )
+
+    def make_request(self, method: RPCEndpoint, params: Any) -> RPCResponse:
+        """Answer a request from the simulated state."""
+        self.requests[method] += 1
+        handler = getattr(self, f"_{method}", None)
+        if handler is None:
+            return {"jsonrpc": "2.0", "id": 1, "error": {"code": -32601, "message": f"{method} not simulated"}}
+        try:
+            return {"jsonrpc": "2.0", "id": 1, "result": handler(*params)}
+        except Revert as e:
+            reason = str(e)
+            return {
+                "jsonrpc": "2.0",
+                "id": 1,
+                "error": {
+                    "code": 3,
+                    "message": f"execution reverted: {reason}",
+                    "data": to_hex(ERROR_SELECTOR + encode(["string"], [reason])),
+                },
+            }
+
+    def is_connected(self, show_traceback: bool = False) -> bool:  # noqa: ARG002
+        """A simulated chain is always connected."""
+        return True
+
+    def _block_number(self, tag: str | int) -> int:
+        if isinstance(tag, int):
+            return tag
+        if tag == "earliest":
+            return 0
+        if tag in {"latest", "pending", "safe", "finalized"}:
+            return self.head
+        return int(tag, 16)
+
+    def _eth_chainId(self) -> str:  # noqa: N802
+        return hex(self.chain_id)
+
+    def _eth_blockNumber(self) -> str:  # noqa: N802
+        return hex(self.head)
+
+    def _eth_gasPrice(self) -> str:  # noqa: N802
+        return hex(GAS_PRICE)
+
+    def _eth_estimateGas(self, transaction: dict, *_: Any) -> str:  # noqa: N802
+        self._eth_call(transaction)  # a transaction that would revert fails to estimate
+        return hex(GAS_ESTIMATE)
+
+    def _eth_getTransactionCount(self, address: str, _block: str = "latest") -> str:  # noqa: N802
+        return hex(self.nonces[to_checksum_address(address)])
+
+    def _eth_getBalance(self, *_: Any) -> str:  # noqa: N802
+        return hex(10**21)
+
+    def _eth_getBlockByNumber(self, tag: str, _full: bool = False) -> dict | None:  # noqa: N802
+        number = self._block_number(tag)
+        if number > self.head:
+            return None
+        bloom = bytearray(BLOOM_BYTES)
+        for log in self._logs.get(number, []):
+            for value in [log["address"], *log["topics"]]:
+                for index, mask in bloom_bits(to_bytes(hexstr=value)):
+                    bloom[index] |= mask
+        return {
+            "number": hex(number),
+            "hash": to_hex(self.block_hash(number)),
+            "parentHash": to_hex(self.block_hash(number - 1) if number else bytes(32)),
+            "timestamp": hex(self.block_timestamp(number)),
+            "logsBloom": to_hex(bytes(bloom)),
+            "transactions": self._transactions.get(number, []),
+            "gasLimit": hex(30_000_000),
+            "gasUsed": "0x0",
+            "baseFeePerGas": hex(GAS_PRICE),
+            "miner": "0x" + "00" * 20,
+            "extraData": "0x",
+            "difficulty": "0x0",
+            "size": "0x0",
+            "uncles": [],
+        }
+
+    def _eth_getLogs(self, log_filter: dict) -> list[dict]:  # noqa: N802
+        from_block = self._block_number(log_filter.get("fromBlock", "latest"))
+        to_block = self._block_number(log_filter.get("toBlock", "latest"))
+        addresses = log_filter.get("address")
+        if isinstance(addresses, str):
+            addresses = [addresses]
+        addresses = {to_checksum_address(address) for address in addresses} if addresses else None
+        topics = [[topic] if isinstance(topic, str) else topic for topic in log_filter.get("topics") or []]
+        start, end = bisect_left(self._log_blocks, from_block), bisect_right(self._log_blocks, to_block)
+        return [
+            log
+            for block in self._log_blocks[start:end]
+            for log in self._logs[block]
+            if (addresses is None or log["address"] in addresses)
+            and all(
+                not wanted or (position < len(log["topics"]) and log["topics"][position] in wanted)
+                for position, wanted in enumerate(topics)
+            )
+        ]
+
+    def _call(self, to: str, data: bytes) -> bytes:
+        address = to_checksum_address(to)
+        if address == MULTICALL3_ADDRESS:
+            (calls,) = decode(get_abi_input_types(AGGREGATE3_ABI), data[4:])
+            results = []
+            for target, allow_failure, call_data in calls:
+                try:
+                    results.append((True, self._call(target, call_data)))
+                except Revert:
+                    if not allow_failure:
+                        raise
+                    results.append((False, b""))
+            return encode(get_abi_output_types(AGGREGATE3_ABI), [results])
+        contract = self.contracts.get(address)
+        if contract is None:
+            return b""
+        return contract.call(data)
+
+    def _eth_call(self, transaction: dict, _block: str = "latest") -> str:
+        return to_hex(self._call(transaction["to"], to_bytes(hexstr=transaction.get("data") or transaction["input"])))
+
+    def _eth_sendRawTransaction(self, raw_transaction: str) -> str:  # noqa: N802
+        raw = HexBytes(raw_transaction)
+        typed = raw[0] <= 0x7F  # an EIP-2718 type byte, where a legacy transaction starts with an RLP list
+        fields = TypedTransaction.from_bytes(raw).as_dict() if typed else Transaction.from_bytes(raw).as_dict()
+        sender = Account.recover_transaction(raw)
+        tx_hash = to_hex(keccak(raw))
+        block = self.mine()
+        self.nonces[sender] += 1
+        self._transactions.setdefault(block, []).append(tx_hash)
+        status = 1
+        self.transaction = {"from": sender, "hash": tx_hash}
+        try:
+            self._call(to_hex(fields["to"]), bytes(fields["data"]))
+        except Revert:
+            status = 0
+        finally:
+            self.transaction = None
+        self.receipts[tx_hash] = {
+            "transactionHash": tx_hash,
+            "transactionIndex": "0x0",
+            "blockHash": to_hex(self.block_hash(block)),
+            "blockNumber": hex(block),
+            "from": sender,
+            "to": to_checksum_address(to_hex(fields["to"])),
+            "gasUsed": hex(GAS_ESTIMATE),
+            "cumulativeGasUsed": hex(GAS_ESTIMATE),
+            "effectiveGasPrice": hex(GAS_PRICE),
+            "contractAddress": None,
+            "logs": [log for log in self._logs.get(block, []) if log["transactionHash"] == tx_hash],
+            "logsBloom": self._eth_getBlockByNumber(hex(block))["logsBloom"],  # type: ignore
+            "status": hex(status),
+            "type": hex(raw[0]) if typed else "0x0",
+        }
+        return tx_hash
+
+    def _eth_getTransactionReceipt(self, tx_hash: str) -> dict | None:  # noqa: N802
+        return self.receipts.get(tx_hash)
+
+
+class _RpcRequestHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep the connections of the pooled sessions alive
+    server: "_RpcServer"
+
+    def do_POST(self) -> None:  # noqa: N802
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        response = json.dumps(self.server.node.answer(body), cls=Web3JsonEncoder).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(response)))
+        self.end_headers()
+        self.wfile.write(response)
+
+    def log_message(self, *_: Any) -> None:
+        pass
+
+
+class _RpcServer(ThreadingHTTPServer):
+    daemon_threads = True
+    node: "SimulatedNode"
+
+
+class SimulatedNode:
+    """A simulated chain served over JSON-RPC on localhost, standing in for a node.
+
+    With a `block_interval`, an empty block is mined every so many seconds, so that the blocks
+    of the transactions sent to it get confirmations.
+    """
+
+    def __init__(self, chain: SimulatedChain, block_interval: float | None = None, port: int = 0) -> None:
+        """Initialize the node, on a free port by default."""
+        self.chain = chain
+        self.block_interval = block_interval
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._server = _RpcServer(("127.0.0.1", port), _RpcRequestHandler)
+        self._server.node = self
+        self._threads: list[threading.Thread] = []
+
+    @property
+    def url(self) -> str:
+        """The url of the node."""
+        host, port = self._server.server_address[:2]
+        return f"http://{host!s}:{port}"
+
+    def answer(self, body: Any) -> Any:
+        """Answer a JSON-RPC request, or a batch of them."""
+        if isinstance(body, list):
+            return [self.answer(request) for request in body]
+        with self._lock:
+            response = dict(self.chain.make_request(body["method"], body.get("params") or []))
+        response["id"] = body.get("id")
+        return response
+
+    def start(self) -> None:
+        """Serve the chain, and mine blocks at the interval if one is set."""
+        self._threads.append(threading.Thread(target=self._server.serve_forever, daemon=True))
+        if self.block_interval:
+            self._threads.append(threading.Thread(target=self._mine, daemon=True))
+        for thread in self._threads:
+            thread.start()
+
+    def stop(self) -> None:
+        """Stop serving and mining."""
+        self._stopped.set()
+        self._server.shutdown()
+        self._server.server_close()
+        for thread in self._threads:
+            thread.join(timeout=5)
+        self._threads.clear()
+
+    def _mine(self) -> None:
+        while not self._stopped.wait(self.block_interval):
+            with self._lock:
+                self.chain.mine()
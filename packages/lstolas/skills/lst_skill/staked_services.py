@@ -0,0 +1,35 @@
+"""Services staked through the staking manager, kept current from the `Staked` events."""
+
+from typing import Any
+from collections.abc import Iterable
+
+from pydantic import BaseModel
+
+from packages.lstolas.skills.lst_skill.indexing import IndexedModel
+
+
+class StakedService(BaseModel):
+    """The staking proxy and activity module of a staked service."""
+
+    staking_proxy: str
+    activity_module: str
+
+
+class StakedServices(IndexedModel):
+    """Services staked through the staking manager, keyed by service id."""
+
+    services: dict[int, StakedService] = {}
+
+    def on_staked(self, service_id: int, staking_proxy: str, activity_module: str) -> None:
+        """Apply a `Staked` event."""
+        self.services[service_id] = StakedService(staking_proxy=staking_proxy, activity_module=activity_module)
+
+    def apply_events(self, events: Iterable[Any]) -> None:
+        """Apply the `Staked` events of the staking manager."""
+        for event in events:
+            self.on_staked(event.args.serviceId, event.args.stakingProxy, event.args.activityModule)
+
+    @property
+    def staking_proxies(self) -> list[str]:
+        """The distinct staking proxies of the staked services."""
+        return sorted({service.staking_proxy for service in self.services.values()})
@@ -0,0 +1,33 @@
+"""Persistence of skill state on disk."""
+
+from typing import Any, Self
+from pathlib import Path
+
+from pydantic import BaseModel, PrivateAttr
+
+
+class PersistentModel(BaseModel):
+    """A model persisted as json, so state survives agent restarts."""
+
+    _path: Path | None = PrivateAttr(default=None)
+
+    @classmethod
+    def load(cls, path: Path, **defaults: Any) -> Self:
+        """Load the model from disk, or create it from the defaults if it was never saved."""
+        model = cls.model_validate_json(path.read_text(encoding="utf-8")) if path.exists() else cls(**defaults)
+        model._path = path  # noqa: SLF001
+        return model
+
+    def save(self) -> None:
+        """Atomically write the model to disk."""
+        if self._path is None:
+            return
+        write_atomically(self._path, self.model_dump_json())
+
+
+def write_atomically(path: Path, text: str) -> None:
+    """Write a file through a temporary one, so that a crash never leaves it half written."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(path.suffix + ".tmp")
+    tmp_path.write_text(text, encoding="utf-8")
+    tmp_path.replace(path)
@@ -0,0 +1,174 @@
+"""Push-based chain updates from `eth_subscribe` over a websocket."""
+
+import json
+import asyncio
+import threading
+import contextlib
+from typing import Any
+from collections.abc import Callable
+
+import websockets
+from eth_utils.address import to_checksum_address
+
+from packages.lstolas.skills.lst_skill.indexing import BlockRef
+
+
+HEAD_WINDOW = 256  # number of recent heads whose hash and logs are kept
+RECONNECT_DELAY = 5  # seconds to wait before reconnecting a dropped socket
+
+
+class ChainSubscription:
+    """Follows the `newHeads` of a chain and the `logs` of the watched addresses, in a background thread.
+
+    The blocks received since the socket last (re)connected are covered: every log the watched
+    addresses emitted in them has been pushed. Ranges that are not covered, such as the gap left
+    while the socket was down, are polled by the indexer instead.
+    """
+
+    def __init__(
+        self,
+        endpoint: str,
+        addresses: list[str],
+        head_window: int = HEAD_WINDOW,
+        reconnect_delay: float = RECONNECT_DELAY,
+        on_head: Callable[[BlockRef], None] | None = None,
+        logger: Any = None,
+    ) -> None:
+        """Initialize the subscription."""
+        self.endpoint = endpoint
+        self.addresses = [to_checksum_address(address) for address in addresses]
+        self.head_window = head_window
+        self.reconnect_delay = reconnect_delay
+        self.on_head = on_head
+        self.logger = logger
+        self._lock = threading.Lock()
+        self._heads: dict[int, str] = {}
+        self._log_blocks: dict[str, set[int]] = {address: set() for address in self.addresses}
+        self._covered_from: int | None = None
+        self._connected = False
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._stopped: asyncio.Event | None = None
+        self._thread: threading.Thread | None = None
+
+    @property
+    def connected(self) -> bool:
+        """Whether the socket is currently subscribed."""
+        return self._connected
+
+    @property
+    def head(self) -> BlockRef | None:
+        """The latest head received."""
+        with self._lock:
+            if not self._heads:
+                return None
+            number = max(self._heads)
+            return BlockRef(number=number, hash=self._heads[number])
+
+    def block_hash(self, number: int) -> str | None:
+        """Get the hash of a recent block, if its head was received."""
+        with self._lock:
+            return self._heads.get(number)
+
+    def covers(self, from_block: int, to_block: int) -> bool:
+        """Whether every log of the watched addresses in the range has been pushed.
+
+        The latest head is excluded, as its logs may still be in flight.
+        """
+        with self._lock:
+            if not self._connected or self._covered_from is None or not self._heads:
+                return False
+            return self._covered_from <= from_block and to_block < max(self._heads)
+
+    def has_logs(self, address: str, from_block: int, to_block: int) -> bool:
+        """Whether a log of the watched address was pushed for a block in the range."""
+        with self._lock:
+            blocks = self._log_blocks.get(to_checksum_address(address), set())
+            return any(from_block <= block <= to_block for block in blocks)
+
+    def start(self) -> None:
+        """Start following the chain in a background thread."""
+        if self._thread is not None:
+            return
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_until_complete, args=(self._run(),), daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Close the socket and stop the background thread."""
+        if self._thread is None or self._loop is None:
+            return
+        self._loop.call_soon_threadsafe(lambda: self._stopped.set() if self._stopped else None)
+        self._thread.join(timeout=self.reconnect_delay + 1)
+        self._thread = None
+
+    async def _run(self) -> None:
+        self._stopped = asyncio.Event()
+        while not self._stopped.is_set():
+            try:
+                async with websockets.connect(self.endpoint) as websocket:
+                    follow = asyncio.ensure_future(self._follow(websocket))
+                    stop = asyncio.ensure_future(self._stopped.wait())
+                    done, _ = await asyncio.wait({follow, stop}, return_when=asyncio.FIRST_COMPLETED)
+                    follow.cancel()
+                    stop.cancel()
+                    if follow in done and not follow.cancelled():
+                        follow.result()
+            except (TimeoutError, OSError, websockets.WebSocketException) as e:
+                if self.logger is not None:
+                    self.logger.warning(f"Subscription to {self.endpoint} dropped, falling back to polling: {e}")
+            finally:
+                self._disconnect()
+            with contextlib.suppress(TimeoutError):
+                await asyncio.wait_for(self._stopped.wait(), timeout=self.reconnect_delay)
+
+    async def _follow(self, websocket: Any) -> None:
+        heads_id = await self._subscribe(websocket, 1, ["newHeads"])
+        logs_id = await self._subscribe(websocket, 2, ["logs", {"address": self.addresses}])
+        self._connected = True
+        async for message in websocket:
+            params = json.loads(message).get("params", {})
+            if params.get("subscription") == heads_id:
+                self._on_head(params["result"])
+            elif params.get("subscription") == logs_id:
+                self._on_log(params["result"])
+
+    @staticmethod
+    async def _subscribe(websocket: Any, request_id: int, params: list) -> str:
+        await websocket.send(
+            json.dumps({"jsonrpc": "2.0", "id": request_id, "method": "eth_subscribe", "params": params})
+        )
+        while True:
+            response = json.loads(await websocket.recv())
+            if response.get("id") != request_id:
+                continue
+            if "error" in response:
+                msg = f"eth_subscribe {params[0]} failed: {response['error']}"
+                raise websockets.WebSocketException(msg)
+            return response["result"]
+
+    def _on_head(self, header: dict) -> None:
+        head = BlockRef(number=int(header["number"], 16), hash=header["hash"])
+        with self._lock:
+            # a head at or below a known one means the chain reorganised
+            for number in [number for number in self._heads if number > head.number]:
+                del self._heads[number]
+            self._heads[head.number] = head.hash
+            oldest = head.number - self.head_window + 1
+            for number in [number for number in self._heads if number < oldest]:
+                del self._heads[number]
+            for blocks in self._log_blocks.values():
+                blocks.difference_update([block for block in blocks if block < oldest])
+            # the logs of the first head may predate the logs subscription
+            self._covered_from = head.number + 1 if self._covered_from is None else max(self._covered_from, oldest)
+        if self.on_head is not None:
+            self.on_head(head)
+
+    def _on_log(self, log: dict) -> None:
+        # removed logs are recorded too, so the range they were in is indexed again
+        with self._lock:
+            self._log_blocks.setdefault(to_checksum_address(log["address"]), set()).add(int(log["blockNumber"], 16))
+
+    def _disconnect(self) -> None:
+        with self._lock:
+            self._connected = False
+            self._covered_from = None
@@ -0,0 +1,156 @@
+# ruff: noqa: ARG001, ARG002
+"""Test the asynchronous chain access."""
+
+import time
+import asyncio
+
+import pytest
+from web3 import AsyncHTTPProvider
+
+from packages.lstolas.skills.lst_skill.metrics import RPC_REQUESTS, Metrics
+from packages.lstolas.skills.lst_skill.rate_limit import TokenBucket, RequestClass
+from packages.lstolas.skills.lst_skill.async_chain import (
+    AsyncChain,
+    AsyncLimits,
+    AsyncContract,
+    LimitedAsyncHTTPProvider,
+    _AsyncInstance,
+)
+
+
+PROXY = "0x5aa3a2a8A1f6E1f2f3c3d4E5f6A7B8c9D0E1f2a3"
+
+
+class FakeFunction:
+    """A contract function answering after a delay."""
+
+    def __init__(self, result: object, delay: float) -> None:
+        """Initialize the function."""
+        self.result = result
+        self.delay = delay
+
+    async def call(self) -> object:
+        """Answer the call."""
+        await asyncio.sleep(self.delay)
+        return self.result
+
+
+class FakeFunctions:
+    """The functions of a fake contract, each answering after 50ms."""
+
+    def tsCheckpoint(self) -> FakeFunction:  # noqa: N802
+        """Get the last checkpoint."""
+        return FakeFunction(100, 0.05)
+
+    def mapOperationReceiverBalances(self) -> FakeFunction:  # noqa: N802
+        """Get a balance and receiver."""
+        return FakeFunction((5, PROXY), 0.05)
+
+
+class FakeLedgerApi:
+    """A ledger api building fake async contract instances."""
+
+    def get_contract_instance(self, contract_interface: dict, contract_address: str) -> _AsyncInstance:
+        """Get the instance of a contract."""
+        return _AsyncInstance(type("Contract", (), {"functions": FakeFunctions(), "address": contract_address})())
+
+
+class Wrapper:
+    """A contract wrapper written like the generated ones."""
+
+    @classmethod
+    def get_instance(cls, ledger_api: FakeLedgerApi, contract_address: str) -> _AsyncInstance:
+        """Get the contract instance."""
+        return ledger_api.get_contract_instance({}, contract_address)
+
+    @classmethod
+    def ts_checkpoint(cls, ledger_api: FakeLedgerApi, contract_address: str) -> dict:
+        """Handler method for the 'ts_checkpoint' requests."""
+        instance = cls.get_instance(ledger_api, contract_address)
+        result = instance.functions.tsCheckpoint().call()
+        return {"int": result, "copy": result}
+
+    @classmethod
+    def map_operation_receiver_balances(cls, ledger_api: FakeLedgerApi, contract_address: str) -> dict:
+        """Handler method for the 'map_operation_receiver_balances' requests."""
+        instance = cls.get_instance(ledger_api, contract_address)
+        result = instance.functions.mapOperationReceiverBalances().call()
+        return {"balance": result[0], "receiver": result[1]}
+
+
+def test_generated_wrappers_run_concurrently_on_the_event_loop():
+    """Test many wrapper calls are in flight at once and resolve to what the sync methods return."""
+    chain = AsyncChain({})
+    contract = AsyncContract(Wrapper, FakeLedgerApi())
+
+    async def read_all() -> list[dict]:
+        return await asyncio.gather(
+            *(contract.ts_checkpoint(PROXY) for _ in range(100)), contract.map_operation_receiver_balances(PROXY)
+        )
+
+    started = time.monotonic()
+    results = chain.submit(read_all()).result(timeout=5)
+    assert time.monotonic() - started < 1
+    assert results[0] == {"int": 100, "copy": 100}
+    assert results[-1] == {"balance": 5, "receiver": PROXY}
+    chain.stop()
+
+
+def test_polled_coroutines_are_picked_up_on_a_later_tick():
+    """Test a poll submits once, returns None while pending, then the result or exception once."""
+    chain = AsyncChain({})
+    submitted = []
+
+    async def read(value: int) -> int:
+        submitted.append(value)
+        await asyncio.sleep(0.05)
+        if value < 0:
+            msg = "reverted"
+            raise ValueError(msg)
+        return value
+
+    assert chain.poll("read", lambda: read(1)) is None
+    assert chain.poll("read", lambda: read(2)) is None
+    time.sleep(0.2)
+    assert chain.poll("read", lambda: read(3)) == 1
+    assert submitted == [1]
+
+    chain.poll("failing", lambda: read(-1))
+    time.sleep(0.2)
+    with pytest.raises(ValueError, match="reverted"):
+        chain.poll("failing", lambda: read(-1))
+    chain.stop()
+
+
+def test_async_requests_share_the_rate_limit_and_are_bounded_in_flight(monkeypatch):
+    """Test async requests draw from the bucket of the endpoint, a few at a time, and are counted."""
+    in_flight, peak = 0, 0
+
+    async def make_request(self, method, params) -> dict:
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        return {"result": "0x1"}
+
+    monkeypatch.setattr(AsyncHTTPProvider, "make_request", make_request)
+    bucket = TokenBucket(rate=100, burst=5)
+    metrics = Metrics(enabled=True)
+    provider = LimitedAsyncHTTPProvider(
+        "http://localhost:8545", AsyncLimits(3, bucket, metrics, "layer_2", {PROXY.lower(): "staking_token"})
+    )
+
+    async def send_all() -> list[dict]:
+        return await asyncio.gather(*(provider.make_request("eth_call", [{"to": PROXY}]) for _ in range(20)))
+
+    chain = AsyncChain({})
+    started = time.monotonic()
+    responses = chain.submit(send_all()).result(timeout=5)
+    chain.stop()
+    assert responses == [{"result": "0x1"}] * 20
+    assert peak == 3
+    assert bucket.waits[RequestClass.READ].count == 20
+    assert time.monotonic() - started >= 0.1  # 15 of the requests waited for the bucket to refill
+    requests = [update for update in metrics.drain() if update.name == RPC_REQUESTS.name]
+    assert [(update.value, dict(update.labels)["contract"]) for update in requests] == [(20, "staking_token")]
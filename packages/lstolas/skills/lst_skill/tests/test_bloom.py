@@ -0,0 +1,63 @@
+"""Test the logs bloom pre-screening."""
+
+from types import SimpleNamespace
+
+from web3 import Web3
+from eth_utils.conversions import to_hex, to_bytes
+
+from packages.lstolas.skills.lst_skill.bloom import BloomScreen, bloom_bits, fetch_blooms, candidate_ranges
+
+
+DISTRIBUTOR = "0x9D54Ce975f9B2aeF50a999f98C247a8a7b1cC24b"
+RELAYER = "0x789B8c39EFEc3bCaB1DB232eC4a86E5ae2797d27"
+TRANSFER = Web3.keccak(text="Transfer(address,address,uint256)").hex()
+
+
+def make_bloom(*values: str) -> bytes:
+    """Build the logs bloom of a block containing the given addresses and topics."""
+    bloom = bytearray(256)
+    for value in values:
+        for index, mask in bloom_bits(to_bytes(hexstr=value)):
+            bloom[index] |= mask
+    return bytes(bloom)
+
+
+class FakeProvider:
+    """Provider serving the headers of a few blocks, in batches."""
+
+    def __init__(self, blooms: dict[int, bytes]) -> None:
+        self.blooms = blooms
+        self.batches: list[int] = []
+
+    def make_batch_request(self, requests: list[tuple[str, list]]) -> list[dict]:
+        """Get a batch of headers."""
+        self.batches.append(len(requests))
+        return [
+            {"result": {"number": number, "logsBloom": to_hex(self.blooms.get(int(number, 16), bytes(256)))}}
+            for _, (number, _) in requests
+        ]
+
+
+def test_screen_requires_an_address_and_a_topic():
+    """Test a bloom only matches when both a watched address and a watched topic may be in it."""
+    screen = BloomScreen([DISTRIBUTOR], [TRANSFER])
+    assert screen.may_match(make_bloom(DISTRIBUTOR, TRANSFER))
+    assert not screen.may_match(make_bloom(DISTRIBUTOR))
+    assert not screen.may_match(make_bloom(RELAYER, TRANSFER))
+    assert not screen.may_match(bytes(256))
+
+
+def test_candidate_blocks_are_merged_into_ranges():
+    """Test only the blocks whose bloom may match are left to query, as contiguous ranges."""
+    blooms = {
+        12: make_bloom(DISTRIBUTOR, TRANSFER),
+        13: make_bloom(DISTRIBUTOR, TRANSFER),
+        18: make_bloom(DISTRIBUTOR, TRANSFER),
+    }
+    provider = FakeProvider(blooms)
+    ledger_api = SimpleNamespace(api=SimpleNamespace(provider=provider))
+    screen = BloomScreen([DISTRIBUTOR], [TRANSFER])
+    fetched = fetch_blooms(ledger_api, 10, 20, batch_size=4)
+    candidates = [number for number, bloom in fetched.items() if screen.may_match(bloom)]
+    assert candidate_ranges(candidates) == [(12, 13), (18, 18)]
+    assert provider.batches == [4, 4, 3]
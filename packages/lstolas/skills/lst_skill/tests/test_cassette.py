@@ -0,0 +1,82 @@
+# ruff: noqa: ARG002
+"""Test the record and replay of the JSON-RPC traffic."""
+
+import time
+from types import SimpleNamespace
+from pathlib import Path
+
+import pytest
+from web3 import Web3
+from web3.providers import JSONBaseProvider
+
+from packages.lstolas.skills.lst_skill.cassette import (
+    Cassette,
+    CassetteMiss,
+    CassetteMode,
+    ReplayTiming,
+    use_cassette,
+)
+from packages.lstolas.skills.lst_skill.rate_limit import send_batch
+
+
+class CountingProvider(JSONBaseProvider):
+    """A provider whose block number goes up with every request, after a delay."""
+
+    def __init__(self) -> None:
+        """Initialize the provider."""
+        super().__init__()
+        self.block = 100
+
+    def make_request(self, method: str, params: list) -> dict:
+        """Answer a request."""
+        time.sleep(0.02)
+        if method == "eth_chainId":
+            return {"jsonrpc": "2.0", "id": 1, "result": "0x1"}
+        self.block += 1
+        return {"jsonrpc": "2.0", "id": 1, "result": hex(self.block)}
+
+
+def make_ledger_api(provider: object) -> SimpleNamespace:
+    """Build a ledger api around a provider."""
+    return SimpleNamespace(api=Web3(provider))
+
+
+def test_a_recorded_session_replays_offline_in_order(tmp_path: Path):
+    """Test a recorded session replays the same responses without its provider, then repeats the last."""
+    path = tmp_path / "session.jsonl.gz"
+    recorded = make_ledger_api(CountingProvider())
+    use_cassette(recorded, Cassette(path), "layer_2", CassetteMode.RECORD, ReplayTiming.NONE)
+    blocks = [recorded.api.eth.block_number for _ in range(3)]
+    assert recorded.api.eth.chain_id == 1
+    batch = send_batch(recorded.api.provider, [("eth_blockNumber", []), ("eth_chainId", [])])
+    recorded.api.provider.cassette.save()
+
+    cassette = Cassette(path)
+    assert len(cassette) == 5
+    replayed = make_ledger_api(CountingProvider())
+    use_cassette(replayed, cassette, "layer_2", CassetteMode.REPLAY, ReplayTiming.NONE)
+    started = time.monotonic()
+    assert [replayed.api.eth.block_number for _ in range(4)] == [*blocks, blocks[-1]]
+    assert replayed.api.eth.chain_id == 1
+    assert send_batch(replayed.api.provider, [("eth_blockNumber", []), ("eth_chainId", [])]) == batch
+    assert time.monotonic() - started < 0.05
+
+    other_chain = make_ledger_api(CountingProvider())
+    use_cassette(other_chain, cassette, "layer_1", CassetteMode.REPLAY, ReplayTiming.NONE)
+    with pytest.raises(CassetteMiss):
+        other_chain.api.eth.block_number  # noqa: B018
+
+
+def test_replays_can_keep_the_recorded_timing(tmp_path: Path):
+    """Test a replay with the original timing takes as long as the recording did."""
+    cassette = Cassette(tmp_path / "session.jsonl.gz")
+    recorded = make_ledger_api(CountingProvider())
+    use_cassette(recorded, cassette, "layer_1", CassetteMode.RECORD, ReplayTiming.NONE)
+    recorded.api.eth.block_number  # noqa: B018
+    cassette.save()
+
+    replayed = make_ledger_api(CountingProvider())
+    use_cassette(replayed, Cassette(cassette.path), "layer_1", CassetteMode.REPLAY, ReplayTiming.ORIGINAL)
+    started = time.monotonic()
+    assert replayed.api.eth.block_number == 101
+    assert time.monotonic() - started >= 0.02
@@ -0,0 +1,50 @@
+"""Test the collector balance mirror."""
+
+from packages.lstolas.skills.lst_skill.collector_balances import CollectorBalances
+
+
+REWARD = "0x0b9821ae606ebc7c79bf3390bdd3dc93e1b4a7cda27aad60646e7b88ff55b001"
+UNSTAKE = "0x8ca9a95e41b5eece253c93f5b31eed1253aed6b145d8a6e14d913fdf8e732293"
+RECEIVER = "0x9D54Ce975f9B2aeF50a999f98C247a8a7b1cC24b"
+
+
+def test_threshold_crossed_by_event():
+    """Test the trigger fires as soon as an event pushes a balance over the threshold."""
+    balances = CollectorBalances(min_olas_balance=100)
+    balances.on_operation_receiver_balances_updated(REWARD, RECEIVER, 50)
+    balances.on_operation_receiver_balances_updated(UNSTAKE, RECEIVER, 99)
+    assert balances.first_above_threshold([REWARD, UNSTAKE]) is None
+
+    balances.on_operation_receiver_balances_updated(UNSTAKE, RECEIVER, 100)
+    operation, operation_balance = balances.first_above_threshold([REWARD, UNSTAKE])
+    assert operation == UNSTAKE
+    assert operation_balance.balance == 100
+
+
+def test_missing_and_invalidation():
+    """Test unknown balances and invalidated configuration are reported."""
+    balances = CollectorBalances(min_olas_balance=100)
+    assert balances.missing([REWARD, UNSTAKE]) == [REWARD, UNSTAKE]
+    balances.on_operation_receiver_balances_updated(REWARD, RECEIVER, 500)
+    assert balances.missing([REWARD, UNSTAKE]) == [UNSTAKE]
+
+    balances.forget(REWARD)
+    assert balances.missing([REWARD]) == [REWARD]
+
+    balances.on_implementation_updated()
+    assert balances.min_olas_balance is None
+    assert balances.first_above_threshold([REWARD]) is None
+
+
+def test_receivers_set_updates_the_mirrored_receivers():
+    """Test an `OperationReceiversSet` event changes the receiver of the mirrored operations only."""
+    new_receiver = "0x789B8c39EFEc3bCaB1DB232eC4a86E5ae2797d27"
+    balances = CollectorBalances(min_olas_balance=100)
+    balances.on_operation_receiver_balances_updated(REWARD, RECEIVER, 500)
+    balances.on_operation_receivers_set([REWARD, UNSTAKE], [new_receiver, new_receiver])
+
+    operation, operation_balance = balances.first_above_threshold([REWARD])
+    assert operation == REWARD
+    assert operation_balance.receiver == new_receiver
+    assert operation_balance.balance == 500
+    assert balances.missing([REWARD, UNSTAKE]) == [UNSTAKE]
@@ -1,36 +1,64 @@
-"""Test the metrics skill."""
+"""Test the conditional behaviours of the skill, against the chain traffic recorded in cassettes.
 
-from typing import cast
+The traffic of each test is replayed from `cassettes/`, so the tests run offline. Run them with
+`LST_RECORD_CASSETTES=1` to record the cassettes again against the endpoints of the skill config.
+"""
+
+import os
+import shutil
+import tempfile
+from typing import Any, cast
 from pathlib import Path
 
+import pytest
 from aea.test_tools.test_skill import BaseSkillTestCase
 
 from packages.lstolas.skills.lst_skill import PUBLIC_ID
-from packages.lstolas.skills.lst_skill.behaviours import (
-    FinalizeBridgedTokensRound,
-)
-from packages.lstolas.skills.lst_skill.behaviours_classes.redeem_round import RedeemRound
 from packages.lstolas.skills.lst_skill.behaviours_classes.base_behaviour import BaseState, LstabciappStates
-from packages.lstolas.skills.lst_skill.behaviours_classes.checkpoint_round import CheckpointRound
-from packages.lstolas.skills.lst_skill.behaviours_classes.trigger_l2_to_l1_bridge import TriggerL2ToL1BridgeRound
-from packages.lstolas.skills.lst_skill.behaviours_classes.claim_reward_tokens_round import ClaimRewardTokensRound
-from packages.lstolas.skills.lst_skill.behaviours_classes.claim_bridged_tokens_round import (
-    ClaimBridgedTokensRound,
-)
 
 
 ROOT_DIR = Path(__file__).parent.parent.parent.parent.parent.parent
+CASSETTES_DIR = Path(__file__).parent / "cassettes"
+RECORD_CASSETTES = os.environ.get("LST_RECORD_CASSETTES") == "1"
 
 
 class BaseTestConditionalBehaviour(BaseSkillTestCase):
     """Test the conditional behaviour of the skill."""
 
     path_to_skill = Path(ROOT_DIR, "packages", PUBLIC_ID.author, "skills", PUBLIC_ID.name)
+    state: LstabciappStates
     behaviour: BaseState
+    data_dir: str
+
+    @classmethod
+    def setup_method(cls, method: Any):  # pylint: disable=W0221
+        """Load the skill with empty stores, its chain traffic replayed from the cassette of the test."""
+        cassette = CASSETTES_DIR / f"{cls.__name__}.{method.__name__}.jsonl.gz"
+        if RECORD_CASSETTES:
+            cassette.unlink(missing_ok=True)
+        elif not cassette.exists():
+            pytest.fail(f"No cassette was recorded at {cassette}, record it with LST_RECORD_CASSETTES=1.")
+        cls.data_dir = tempfile.mkdtemp()
+        super().setup_class(
+            config_overrides={
+                "models": {
+                    "lst_strategy": {
+                        "args": {
+                            "data_dir": cls.data_dir,
+                            "rpc_cassette": {"path": str(cassette), "mode": "record" if RECORD_CASSETTES else "replay"},
+                        }
+                    }
+                }
+            }
+        )
+        cls.behaviour = cast(BaseState, cls._skill.skill_context.behaviours.main.get_state(cls.state.value))
+        cls.logger = cls._skill.skill_context.logger
 
     @classmethod
     def teardown_method(cls):  # pylint: disable=W0221
-        """Teardown the test class."""
+        """Stop the strategy, which saves the cassette when recording it."""
+        cls._skill.skill_context.lst_strategy.teardown()
+        shutil.rmtree(cls.data_dir, ignore_errors=True)
 
     def test_setup(self):
         """Test the initialization of the strategy."""
@@ -46,29 +74,13 @@ class BaseTestConditionalBehaviour(BaseSkillTestCase):
 class TestClaimBridgedTokens(BaseTestConditionalBehaviour):
     """Test HttpHandler of http_echo."""
 
-    @classmethod
-    def setup_method(cls):  # pylint: disable=W0221
-        """Setup the test class."""
-        super().setup_class()
-        behaviour_to_test = LstabciappStates.CLAIMBRIDGEDTOKENSROUND
-        cls.behaviour = cast(
-            ClaimBridgedTokensRound, cls._skill.skill_context.behaviours.main.get_state(behaviour_to_test.value)
-        )
-        cls.logger = cls._skill.skill_context.logger
+    state = LstabciappStates.CLAIMBRIDGEDTOKENSROUND
 
 
 class TestTriggerL2ToL1Bridge(BaseTestConditionalBehaviour):
     """Test HttpHandler of http_echo."""
 
-    @classmethod
-    def setup_method(cls):  # pylint: disable=W0221
-        """Setup the test class."""
-        super().setup_class()
-        behaviour_to_test = LstabciappStates.TRIGGERL2TOL1BRIDGEROUND
-        cls.behaviour = cast(
-            TriggerL2ToL1BridgeRound, cls._skill.skill_context.behaviours.main.get_state(behaviour_to_test.value)
-        )
-        cls.logger = cls._skill.skill_context.logger
+    state = LstabciappStates.TRIGGERL2TOL1BRIDGEROUND
 
     def test_act(self):
         """Test the initialization of the strategy."""
@@ -79,52 +91,22 @@ class TestTriggerL2ToL1Bridge(BaseTestConditionalBehaviour):
 class TestFinalizeBridgedTokens(BaseTestConditionalBehaviour):
     """Test HttpHandler of http_echo."""
 
-    @classmethod
-    def setup_method(cls):  # pylint: disable=W0221
-        """Setup the test class."""
-        super().setup_class()
-        behaviour_to_test = LstabciappStates.FINALIZEBRIDGEDTOKENSROUND
-        cls.behaviour = cast(
-            FinalizeBridgedTokensRound, cls._skill.skill_context.behaviours.main.get_state(behaviour_to_test.value)
-        )
-        cls.logger = cls._skill.skill_context.logger
+    state = LstabciappStates.FINALIZEBRIDGEDTOKENSROUND
 
 
 class TestClaimRewardTokensRound(BaseTestConditionalBehaviour):
     """Test HttpHandler of http_echo."""
 
-    @classmethod
-    def setup_method(cls):  # pylint: disable=W0221
-        """Setup the test class."""
-        super().setup_class()
-        behaviour_to_test = LstabciappStates.CLAIMREWARDTOKENSROUND
-        cls.behaviour = cast(
-            ClaimRewardTokensRound, cls._skill.skill_context.behaviours.main.get_state(behaviour_to_test.value)
-        )
-        cls.logger = cls._skill.skill_context.logger
+    state = LstabciappStates.CLAIMREWARDTOKENSROUND
 
 
 class TestCheckpointRound(BaseTestConditionalBehaviour):
     """Test HttpHandler of http_echo."""
 
-    @classmethod
-    def setup_method(cls):  # pylint: disable=W0221
-        """Setup the test class."""
-        super().setup_class()
-        behaviour_to_test = LstabciappStates.CHECKPOINTROUND
-        cls.behaviour = cast(
-            CheckpointRound, cls._skill.skill_context.behaviours.main.get_state(behaviour_to_test.value)
-        )
-        cls.logger = cls._skill.skill_context.logger
+    state = LstabciappStates.CHECKPOINTROUND
 
 
 class TestRedeemRound(BaseTestConditionalBehaviour):
     """Test HttpHandler of http_echo."""
 
-    @classmethod
-    def setup_method(cls):  # pylint: disable=W0221
-        """Setup the test class."""
-        super().setup_class()
-        behaviour_to_test = LstabciappStates.REDEEMROUND
-        cls.behaviour = cast(RedeemRound, cls._skill.skill_context.behaviours.main.get_state(behaviour_to_test.value))
-        cls.logger = cls._skill.skill_context.logger
+    state = LstabciappStates.REDEEMROUND
@@ -0,0 +1,49 @@
+"""Test the cache of web3 contract instances."""
+
+import json
+from pathlib import Path
+
+from packages.lstolas.skills.lst_skill.contract_cache import CachedEthereumApi, ContractInstanceCache
+
+
+ROOT = Path(__file__).parents[4]
+TOKEN = "0x19C9b2a1B8C5c93d85E8d6826dF9B46f1D2e4c6A"
+OTHER_TOKEN = "0x5aa3a2a8A1f6E1f2f3c3d4E5f6A7B8c9D0E1f2a3"
+
+
+def make_api(cache: ContractInstanceCache, chain_id: int) -> CachedEthereumApi:
+    """Build a ledger api on a known chain, without connecting to it."""
+    api = CachedEthereumApi(cache=cache, address="http://localhost:8545")
+    api._chain_id = chain_id  # noqa: SLF001
+    return api
+
+
+def make_interface() -> dict:
+    """Load the ERC20 contract interface."""
+    build = json.loads((ROOT / "eightballer/contracts/erc_20/build/erc_20.json").read_text(encoding="utf-8"))
+    return {"abi": build["abi"], "bytecode": build["bytecode"]}
+
+
+def test_instances_are_reused_per_chain_address_and_interface():
+    """Test an instance is built once per chain, address and interface."""
+    cache = ContractInstanceCache()
+    layer_1, layer_2 = make_api(cache, 11155111), make_api(cache, 10200)
+    interface = make_interface()
+
+    instance = layer_1.get_contract_instance(interface, TOKEN.lower())
+    assert layer_1.get_contract_instance(interface, TOKEN) is instance
+    assert layer_2.get_contract_instance(interface, TOKEN) is not instance
+    assert layer_1.get_contract_instance(make_interface(), TOKEN) is not instance
+    assert (cache.hits, cache.misses) == (1, 3)
+
+
+def test_least_recently_used_instances_are_evicted_and_reload_clears():
+    """Test the cache is bounded and cleared on reload."""
+    cache = ContractInstanceCache(maxsize=1)
+    api, interface = make_api(cache, 10200), make_interface()
+    instance = api.get_contract_instance(interface, TOKEN)
+    api.get_contract_instance(interface, OTHER_TOKEN)
+    assert len(cache) == 1
+    assert api.get_contract_instance(interface, TOKEN) is not instance
+    cache.clear()
+    assert len(cache) == 0
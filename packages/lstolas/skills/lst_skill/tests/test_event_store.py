@@ -0,0 +1,78 @@
+"""Test the columnar on-disk event store."""
+
+from pathlib import Path
+
+from packages.lstolas.skills.lst_skill.event_store import EventStore
+
+
+TOKEN = "0x19C9b2a1B8C5c93d85E8d6826dF9B46f1D2e4c6A"
+TRANSFER = "0xddf252ad1be2c89b69c2b068fc378daa952ba7f163c4a11628f55a4df523b3ef"
+STREAMS = [(TOKEN, TRANSFER)]
+
+
+def make_log(block_number: int, log_index: int, value: int) -> dict:
+    """Build a raw log with one indexed topic."""
+    return {
+        "address": TOKEN,
+        "topics": [bytes.fromhex(TRANSFER[2:]), bytes([block_number]) * 32],
+        "data": value.to_bytes(32, "big"),
+        "blockNumber": block_number,
+        "blockHash": bytes([block_number]) * 32,
+        "transactionHash": bytes([log_index]) * 32,
+        "transactionIndex": 0,
+        "logIndex": log_index,
+    }
+
+
+def test_appended_logs_are_scanned_back_by_block_range_after_reopening(tmp_path: Path):
+    """Test logs round trip through the columns and the sidecar, and ranges are located by block."""
+    store = EventStore(tmp_path)
+    store.append(STREAMS, [make_log(10, 0, 1), make_log(12, 1, 2)], 10, 12)
+    store.append(STREAMS, [make_log(13, 2, 3), make_log(15, 3, 4)], 13, 15)
+    store.close()
+
+    store = EventStore(tmp_path)
+    assert store.covers(STREAMS, 10, 15)
+    assert not store.covers(STREAMS, 10, 16)
+    assert not store.covers([], 10, 15)
+    logs = list(store.scan(11, 14))
+    assert [log.blockNumber for log in logs] == [12, 13]
+    assert logs[0].address == TOKEN
+    assert logs[0].topics == [bytes.fromhex(TRANSFER[2:]), bytes([12]) * 32]
+    assert int.from_bytes(logs[1].data, "big") == 3
+    assert logs[1].transactionHash == bytes([2]) * 32
+
+
+def test_truncate_drops_reorganised_blocks(tmp_path: Path):
+    """Test the logs after a reorganised block are dropped and the range appended again."""
+    store = EventStore(tmp_path)
+    store.append(STREAMS, [make_log(10, 0, 1), make_log(12, 1, 2), make_log(14, 2, 3)], 10, 14)
+    store.truncate(12)
+    assert not store.covers(STREAMS, 10, 13)
+    store.append(STREAMS, [make_log(14, 3, 4)], 13, 14)
+    assert [int.from_bytes(log.data, "big") for log in store.scan(10, 14)] == [1, 2, 4]
+    store.truncate(5)
+    assert list(store.scan(0, 20)) == []
+    assert not store.covers(STREAMS, 10, 10)
+
+
+def test_windows_skipped_between_appends_are_recorded_as_gaps(tmp_path: Path):
+    """Test a range appended after skipped windows is stored, and only the skipped blocks are not covered."""
+    store = EventStore(tmp_path)
+    store.append(STREAMS, [make_log(100, 0, 1)], 100, 110)
+    store.append(STREAMS, [make_log(125, 1, 2)], 120, 130)  # 111 to 119 were skipped
+    store.append(STREAMS, [make_log(135, 2, 3)], 131, 140)
+    store.close()
+
+    store = EventStore(tmp_path)
+    assert store.catalog.last_block == 140
+    assert store.covers(STREAMS, 120, 140)
+    assert store.covers(STREAMS, 100, 110)
+    assert not store.covers(STREAMS, 105, 125)
+    assert [log.blockNumber for log in store.scan(100, 140)] == [100, 125, 135]
+
+    store.truncate(115)
+    assert store.catalog.last_block == 110
+    assert not store.catalog.gaps
+    store.append(STREAMS, [make_log(112, 3, 4)], 111, 120)
+    assert store.covers(STREAMS, 100, 120)
@@ -0,0 +1,72 @@
+"""Test the decoding of logs into compact event records."""
+
+import json
+from pathlib import Path
+
+from web3 import Web3
+from eth_abi import encode
+from eth_utils.abi import event_abi_to_log_topic
+from web3._utils.events import get_event_data  # noqa: PLC2701
+
+from packages.lstolas.skills.lst_skill.events_processing import EventDecoder
+
+
+ROOT = Path(__file__).parents[4]
+SENDER = "0x789B8c39EFEc3bCaB1DB232eC4a86E5ae2797d27"
+RECEIVER = "0x9D54Ce975f9B2aeF50a999f98C247a8a7b1cC24b"
+AMB_HOME = "0x8448E15d0e706C0298dECA99F0b4744030e59d7d"
+
+
+def load_event_abi(path: str, name: str) -> dict:
+    """Load an event ABI from the build of a contract package."""
+    abi = json.loads((ROOT / path).read_text(encoding="utf-8"))["abi"]
+    return next(item for item in abi if item.get("type") == "event" and item["name"] == name)
+
+
+def make_log(address: str, topics: list[bytes], data: bytes) -> dict:
+    """Build a raw log."""
+    return {
+        "address": address.lower(),
+        "topics": topics,
+        "data": data,
+        "blockNumber": 7,
+        "blockHash": b"\x01" * 32,
+        "transactionHash": b"\x02" * 32,
+        "transactionIndex": 3,
+        "logIndex": 4,
+    }
+
+
+def test_records_match_web3_decoding():
+    """Test records hold the same values as web3 decodes, with native bytes and checksummed addresses."""
+    codec = Web3().codec
+    transfer_abi = load_event_abi("eightballer/contracts/erc_20/build/erc_20.json", "Transfer")
+    log = make_log(
+        SENDER,
+        [event_abi_to_log_topic(transfer_abi), encode(["address"], [SENDER]), encode(["address"], [RECEIVER])],
+        encode(["uint256"], [10**18]),
+    )
+    record = EventDecoder(transfer_abi, codec).decode(log)
+    expected = get_event_data(codec, transfer_abi, log)
+    assert record.args["from"] == expected["args"]["from"] == SENDER
+    assert record.args.to == RECEIVER
+    assert record.args.value == 10**18
+    assert record.address == SENDER
+    assert (record.blockNumber, record.logIndex, record.transactionHash) == (7, 4, b"\x02" * 32)
+
+
+def test_dynamic_data_and_lazy_hex():
+    """Test bytes arguments stay bytes until the record is serialised."""
+    codec = Web3().codec
+    request_abi = load_event_abi("eightballer/contracts/amb_gnosis/build/amb_gnosis.json", "UserRequestForSignature")
+    message_id = b"\xaa" * 32
+    log = make_log(AMB_HOME, [event_abi_to_log_topic(request_abi), message_id], encode(["bytes"], [b"\x12\x34"]))
+    record = EventDecoder(request_abi, codec).decode(log)
+    assert record.args.messageId == message_id
+    assert record.args.encodedData == b"\x12\x34"
+    assert record.hex_args.encodedData == "0x1234"
+    assert record.hex_args["messageId"] == "0x" + "aa" * 32
+    serialised = record.to_dict()
+    assert serialised["args"] == {"messageId": "0x" + "aa" * 32, "encodedData": "0x1234"}
+    assert serialised["transactionHash"] == "0x" + "02" * 32
+    json.dumps(serialised)
@@ -0,0 +1,69 @@
+"""Test the offline hashing helpers against the deployed contracts."""
+
+from typing import cast
+from pathlib import Path
+
+import yaml
+import pytest
+from eth_abi import encode
+from eth_utils.crypto import keccak
+from aea.contracts.base import Contract, contract_registry
+from aea_ledger_ethereum import EthereumApi
+from eth_utils.conversions import to_hex
+from aea.configurations.loader import ComponentType, ContractConfig, load_component_configuration
+
+from packages.lstolas.skills.lst_skill.hashing import get_queued_hash
+
+
+ROOT_DIR = Path(__file__).parent.parent.parent.parent.parent.parent
+SKILL_CONFIG = Path(__file__).parent.parent / "skill.yaml"
+PROCESSOR_DIR = ROOT_DIR / "packages" / "lstolas" / "contracts" / "lst_staking_processor_l2"
+
+BATCH_HASH = "0x" + "11" * 32
+TARGET = "0x789B8c39EFEc3bCaB1DB232eC4a86E5ae2797d27"
+AMOUNT = 10**18
+OPERATION = "0x8ca9a95e41b5eece253c93f5b31eed1253aed6b145d8a6e14d913fdf8e732293"
+
+
+def test_get_queued_hash_matches_abi_encoding():
+    """Test the queued hash is the keccak of the abi encoded request."""
+    expected = keccak(
+        encode(
+            ["bytes32", "address", "uint256", "bytes32"],
+            [bytes.fromhex(BATCH_HASH[2:]), TARGET, AMOUNT, bytes.fromhex(OPERATION[2:])],
+        )
+    )
+    assert get_queued_hash(BATCH_HASH, TARGET, AMOUNT, OPERATION) == to_hex(expected)
+
+
+def test_get_queued_hash_accepts_bytes():
+    """Test raw bytes and hex strings give the same hash."""
+    assert get_queued_hash(
+        bytes.fromhex(BATCH_HASH[2:]), TARGET, AMOUNT, bytes.fromhex(OPERATION[2:])
+    ) == get_queued_hash(BATCH_HASH, TARGET, AMOUNT, OPERATION)
+
+
+def test_get_queued_hash_rejects_short_values():
+    """Test non 32 byte values are rejected."""
+    with pytest.raises(ValueError):
+        get_queued_hash("0x1234", TARGET, AMOUNT, OPERATION)
+
+
+def test_get_queued_hash_matches_contract():
+    """Test the local hash matches `getQueuedHash` on the deployed processor."""
+    strategy_args = yaml.safe_load(SKILL_CONFIG.read_text(encoding="utf-8"))["models"]["lst_strategy"]["args"]
+    configuration = cast(ContractConfig, load_component_configuration(ComponentType.CONTRACT, PROCESSOR_DIR))
+    configuration._directory = PROCESSOR_DIR  # noqa
+    if str(configuration.public_id) not in contract_registry.specs:
+        Contract.from_config(configuration)
+    contract = contract_registry.make(str(configuration.public_id))
+
+    on_chain = contract.get_queued_hash(
+        EthereumApi(address=strategy_args["layer_2_rpc_endpoint"]),
+        strategy_args["lst_staking_processor_l2_address"],
+        batch_hash=BATCH_HASH,
+        target=TARGET,
+        amount=AMOUNT,
+        operation=OPERATION,
+    )["str"]
+    assert to_hex(on_chain) == get_queued_hash(BATCH_HASH, TARGET, AMOUNT, OPERATION)
@@ -0,0 +1,76 @@
+"""Test the shared HTTP sessions of the JSON-RPC endpoints."""
+
+import gzip
+import json
+import threading
+from http.server import HTTPServer, BaseHTTPRequestHandler
+
+import pytest
+
+from packages.lstolas.skills.lst_skill.metrics import HTTP_REQUESTS, HTTP_REUSE_RATE, HTTP_CONNECTIONS, Metrics
+from packages.lstolas.skills.lst_skill.rate_limit import RequestClass, request_class
+from packages.lstolas.skills.lst_skill.http_session import SessionConfig, PooledHTTPProvider, close_sessions
+
+
+class JsonRpcHandler(BaseHTTPRequestHandler):
+    """Answer every request with the method it called, over kept alive connections."""
+
+    protocol_version = "HTTP/1.1"
+    bodies: list[bytes] = []
+
+    def do_POST(self) -> None:  # noqa: N802
+        """Answer a JSON-RPC request."""
+        body = self.rfile.read(int(self.headers["Content-Length"]))
+        if self.headers.get("Content-Encoding") == "gzip":
+            body = gzip.decompress(body)
+        self.bodies.append(body)
+        request = json.loads(body)
+        response = json.dumps({"jsonrpc": "2.0", "id": request["id"], "result": request["method"]}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(response)))
+        self.end_headers()
+        self.wfile.write(response)
+
+    def log_message(self, *args) -> None:
+        """Keep the test output quiet."""
+
+
+@pytest.fixture
+def endpoint():
+    """Serve a JSON-RPC endpoint on a local port."""
+    server = HTTPServer(("127.0.0.1", 0), JsonRpcHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    close_sessions()
+    server.shutdown()
+
+
+def test_providers_of_an_endpoint_share_kept_alive_connections(endpoint):
+    """Test providers of the same endpoint reuse one session and its connections."""
+    config = SessionConfig.from_args({"pool_size": 2, "timeouts": {"backfill": 120}})
+    first, second = PooledHTTPProvider(endpoint, config), PooledHTTPProvider(endpoint, config)
+    assert first.session is second.session
+    assert config.timeouts[RequestClass.BACKFILL] == 120.0
+    assert config.timeouts[RequestClass.READ] == 15.0
+
+    for _ in range(5):
+        assert first.make_request("eth_blockNumber", [])["result"] == "eth_blockNumber"
+        with request_class(RequestClass.BACKFILL):
+            assert second.make_request("eth_getBlockByNumber", ["0x1", False])["result"] == "eth_getBlockByNumber"
+    assert first.session.adapter.counts == (10, 1)
+    assert first.session.reuse_rate == pytest.approx(0.9)
+
+    metrics = Metrics()
+    metrics.set_session(endpoint, first.session)
+    updates = {update.name: update.value for update in metrics.drain()}
+    assert updates == {HTTP_REQUESTS.name: 10, HTTP_CONNECTIONS.name: 1, HTTP_REUSE_RATE.name: pytest.approx(0.9)}
+
+
+def test_large_requests_are_compressed_when_enabled(endpoint):
+    """Test request bodies past the threshold are gzipped."""
+    provider = PooledHTTPProvider(endpoint, SessionConfig(compress_requests=True))
+    payload = ["0x" + "00" * 1_024]
+    assert provider.make_request("eth_call", payload)["result"] == "eth_call"
+    assert json.loads(JsonRpcHandler.bodies[-1])["params"] == payload
@@ -0,0 +1,144 @@
+"""Test the reorg-aware indexing."""
+
+from packages.lstolas.skills.lst_skill.indexing import BlockRef, BlockTag, ChainIndexer
+from packages.lstolas.skills.lst_skill.token_balances import TokenBalances
+
+
+WATCHED = "0x789B8c39EFEc3bCaB1DB232eC4a86E5ae2797d27"
+
+
+class FakeEth:
+    """Chain whose blocks can be replaced to simulate a reorg."""
+
+    def __init__(self, head: int) -> None:
+        self.hashes = {number: f"0x{number:064x}" for number in range(head + 1)}
+
+    def mine(self) -> None:
+        """Add a block to the chain."""
+        number = max(self.hashes) + 1
+        self.hashes[number] = f"0x{number:064x}"
+
+    def reorg(self, from_block: int) -> None:
+        """Replace the blocks from the given one onwards."""
+        for number in range(from_block, max(self.hashes) + 1):
+            self.hashes[number] = f"0x{number + 10**6:064x}"
+
+    def get_block(self, block_identifier):
+        """Get a block by number, or the head for any tag."""
+        number = max(self.hashes) if isinstance(block_identifier, str) else block_identifier
+        return {"number": number, "hash": bytes.fromhex(self.hashes[number][2:])}
+
+
+class FakeLedgerApi:
+    """Ledger api exposing the fake chain."""
+
+    def __init__(self, eth: FakeEth) -> None:
+        self.api = type("Api", (), {"eth": eth})()
+
+
+def index(indexer: ChainIndexer, balances: TokenBalances, transfers: dict[int, int]) -> None:
+    """Apply the transfers to the watched address in the newly confirmed blocks."""
+    to_block = indexer.begin(balances)
+    if to_block is None:
+        return
+    for number in range(balances.last_block + 1, to_block.number + 1):
+        balances.on_transfer("0x0", WATCHED, transfers.get(number, 0))
+    indexer.commit(balances, to_block)
+
+
+def test_confirmations_hold_back_the_head():
+    """Test only blocks with enough confirmations are indexed."""
+    indexer = ChainIndexer(FakeLedgerApi(FakeEth(head=100)), BlockTag.SAFE, confirmations=5)
+    assert indexer.confirmed_block().number == 95
+    balances = TokenBalances(last_block=95)
+    assert indexer.begin(balances) is None
+
+
+def test_reorg_rolls_back_and_reindexes_affected_range():
+    """Test a reorg restores the state before the fork and only the affected blocks are indexed again."""
+    eth = FakeEth(head=4)
+    indexer = ChainIndexer(FakeLedgerApi(eth), head_ttl=0)
+    balances = TokenBalances(last_block=4, balances={WATCHED: 0})
+    for head in range(5, 11):
+        eth.mine()
+        index(indexer, balances, {head: 1})
+    assert balances.balance_of(WATCHED) == 6
+
+    eth.reorg(from_block=8)
+    index(indexer, balances, {8: 5})
+    assert balances.last_block == 10
+    assert balances.balance_of(WATCHED) == 3 + 5
+    assert [checkpoint.block.number for checkpoint in balances.checkpoints] == [5, 6, 7, 10]
+    assert balances.checkpoints[-1].block == BlockRef(number=10, hash=eth.hashes[10])
+
+
+def test_reorg_deeper_than_window_rebuilds_from_defaults(tmp_path):
+    """Test the model is rebuilt from its defaults when every checkpoint was reorganised."""
+    eth = FakeEth(head=3)
+    indexer = ChainIndexer(FakeLedgerApi(eth), reorg_window=2)
+    balances = TokenBalances.load(tmp_path / "balances.json", last_block=1)
+    index(indexer, balances, {2: 1, 3: 1})
+    assert balances.balance_of(WATCHED) == 0  # the watched address is not mirrored yet
+
+    eth.reorg(from_block=1)
+    assert balances.rollback(indexer.is_canonical) == 1
+    assert not balances.checkpoints
+
+
+def test_gap_is_backfilled_in_chunks():
+    """Test a long unindexed range is synced a chunk at a time."""
+    indexer = ChainIndexer(FakeLedgerApi(FakeEth(head=100)), max_blocks=30)
+    balances = TokenBalances(last_block=10)
+    assert indexer.begin(balances).number == 40
+
+
+def test_models_indexed_to_the_same_block_share_the_canonical_check():
+    """Test the canonical hash of a checkpointed block is looked up once for every model indexed up to it."""
+    eth = FakeEth(head=10)
+    lookups = []
+    get_block = eth.get_block
+    eth.get_block = lambda block_identifier: lookups.append(block_identifier) or get_block(block_identifier)
+    indexer = ChainIndexer(FakeLedgerApi(eth))
+    models = [TokenBalances(last_block=5) for _ in range(3)]
+    for model in models:
+        index(indexer, model, {})
+    lookups.clear()
+    for model in models:
+        assert indexer.begin(model) is None
+    assert lookups == [10]
+
+
+def test_unchanged_state_only_writes_the_checkpoints(tmp_path):
+    """Test a block that leaves the state unchanged is journaled without rewriting the state file."""
+    eth = FakeEth(head=5)
+    indexer = ChainIndexer(FakeLedgerApi(eth), head_ttl=0)
+    balances = TokenBalances.load(tmp_path / "balances.json", last_block=4, balances={WATCHED: 0})
+    index(indexer, balances, {5: 1})
+    state = (tmp_path / "balances.json").read_text()
+    assert "checkpoints" not in state
+
+    eth.mine()
+    index(indexer, balances, {})
+    assert (tmp_path / "balances.json").read_text() == state
+    reloaded = TokenBalances.load(tmp_path / "balances.json", last_block=4, balances={WATCHED: 0})
+    assert reloaded.last_block == 6
+    assert [checkpoint.block.number for checkpoint in reloaded.checkpoints] == [5, 6]
+    assert reloaded.checkpoints[-1].undo == {}
+
+
+def test_reloaded_model_rolls_back_through_the_journal(tmp_path):
+    """Test the undo journal persisted next to the state restores a reloaded model after a reorg."""
+    eth = FakeEth(head=4)
+    indexer = ChainIndexer(FakeLedgerApi(eth), head_ttl=0)
+    balances = TokenBalances.load(tmp_path / "balances.json", last_block=4, balances={WATCHED: 0})
+    for head in range(5, 9):
+        eth.mine()
+        balances.reconcile(f"0x{head:040x}", head)
+        index(indexer, balances, {head: head})
+
+    reloaded = TokenBalances.load(tmp_path / "balances.json", last_block=4, balances={WATCHED: 0})
+    eth.reorg(from_block=7)
+    assert reloaded.rollback(indexer.is_canonical) == 6
+    assert reloaded.balance_of(WATCHED) == 5 + 6
+    assert sorted(reloaded.balances) == sorted([WATCHED, f"0x{5:040x}", f"0x{6:040x}"])
+    assert [checkpoint.block.number for checkpoint in reloaded.checkpoints] == [5, 6]
@@ -0,0 +1,119 @@
+"""Test the unified log collector."""
+
+import json
+from pathlib import Path
+
+from web3 import Web3
+from eth_abi import encode
+from eth_utils.abi import event_abi_to_log_topic
+from eth_utils.conversions import to_hex
+
+from packages.lstolas.skills.lst_skill.indexing import BlockRef
+from packages.lstolas.skills.lst_skill.event_store import EventStore
+from packages.lstolas.skills.lst_skill.log_collector import LogCollector
+
+
+ROOT = Path(__file__).parents[4]
+TOKEN = "0x19C9b2a1B8C5c93d85E8d6826dF9B46f1D2e4c6A"
+OTHER_TOKEN = "0x5aa3a2a8A1f6E1f2f3c3d4E5f6A7B8c9D0E1f2a3"
+SENDER = "0x789B8c39EFEc3bCaB1DB232eC4a86E5ae2797d27"
+RECEIVER = "0x9D54Ce975f9B2aeF50a999f98C247a8a7b1cC24b"
+
+
+class FakeEth:
+    """Chain returning the stored logs matching the address and topic filters."""
+
+    def __init__(self, logs: list[dict]) -> None:
+        self.logs = logs
+        self.queries: list[dict] = []
+
+    def get_logs(self, params: dict) -> list[dict]:
+        """Filter the stored logs."""
+        self.queries.append(params)
+        return [
+            log
+            for log in self.logs
+            if params["fromBlock"] <= log["blockNumber"] <= params["toBlock"]
+            and log["address"] in params["address"]
+            and to_hex(log["topics"][0]) in params["topics"][0]
+        ]
+
+
+class FakeLedgerApi:
+    """Ledger api exposing the fake chain and a real codec."""
+
+    def __init__(self, eth: FakeEth) -> None:
+        self.api = type("Api", (), {"eth": eth, "codec": Web3().codec})()
+
+
+def transfer_log(token: str, block_number: int, log_index: int, value: int, abi: dict) -> dict:
+    """Build a raw `Transfer` log."""
+    return {
+        "address": token,
+        "topics": [
+            event_abi_to_log_topic(abi),
+            encode(["address"], [SENDER]),
+            encode(["address"], [RECEIVER]),
+        ],
+        "data": encode(["uint256"], [value]),
+        "blockNumber": block_number,
+        "blockHash": bytes(32),
+        "transactionHash": bytes([log_index]) * 32,
+        "transactionIndex": 0,
+        "logIndex": log_index,
+    }
+
+
+def test_one_query_per_window_routed_to_streams():
+    """Test every watched event of the window is fetched in one query and routed by contract."""
+    abi = json.loads((ROOT / "eightballer/contracts/erc_20/build/erc_20.json").read_text(encoding="utf-8"))["abi"]
+    transfer_abi = next(item for item in abi if item.get("name") == "Transfer")
+    eth = FakeEth(
+        [
+            transfer_log(TOKEN, 10, 0, 1, transfer_abi),
+            transfer_log(OTHER_TOKEN, 11, 1, 2, transfer_abi),
+            transfer_log(TOKEN, 12, 2, 3, transfer_abi),
+        ]
+    )
+    collector = LogCollector(FakeLedgerApi(eth))
+    for address in (TOKEN, OTHER_TOKEN):
+        collector.watch(Web3().eth.contract(address=address, abi=abi), "Transfer")
+
+    head = BlockRef(number=12, hash="0x01")
+    assert [event.args.value for event in collector.get_events(TOKEN, "Transfer", 10, head)] == [1, 3]
+    assert [event.args.value for event in collector.get_events(OTHER_TOKEN, "Transfer", 11, head)] == [2]
+    assert [event.args.value for event in collector.get_events(TOKEN, "Transfer", 11, head)] == [3]
+    assert len(eth.queries) == 1
+    assert eth.queries[0]["address"] == sorted([TOKEN, OTHER_TOKEN])
+
+    collector.get_events(TOKEN, "Transfer", 13, BlockRef(number=14, hash="0x02"))
+    assert len(eth.queries) == 2
+
+
+def test_stored_ranges_are_read_back_without_querying(tmp_path: Path):
+    """Test a collector restarted on the same event store serves the stored range from disk."""
+    abi = json.loads((ROOT / "eightballer/contracts/erc_20/build/erc_20.json").read_text(encoding="utf-8"))["abi"]
+    transfer_abi = next(item for item in abi if item.get("name") == "Transfer")
+    head = BlockRef(number=12, hash="0x01")
+    for expected_queries in (1, 0):
+        eth = FakeEth([transfer_log(TOKEN, 10, 0, 1, transfer_abi), transfer_log(TOKEN, 12, 1, 2, transfer_abi)])
+        collector = LogCollector(FakeLedgerApi(eth), store=EventStore(tmp_path))
+        collector.watch(Web3().eth.contract(address=TOKEN, abi=abi), "Transfer")
+        assert [event.args.value for event in collector.get_events(TOKEN, "Transfer", 10, head)] == [1, 2]
+        assert len(eth.queries) == expected_queries
+        collector.store.close()
+
+
+def test_events_are_streamed_lazily():
+    """Test the window is only fetched once iteration starts and events are yielded one at a time."""
+    abi = json.loads((ROOT / "eightballer/contracts/erc_20/build/erc_20.json").read_text(encoding="utf-8"))["abi"]
+    transfer_abi = next(item for item in abi if item.get("name") == "Transfer")
+    eth = FakeEth([transfer_log(TOKEN, block, block, block, transfer_abi) for block in range(10, 20)])
+    collector = LogCollector(FakeLedgerApi(eth))
+    collector.watch(Web3().eth.contract(address=TOKEN, abi=abi), "Transfer")
+
+    events = collector.iter_events(TOKEN, "Transfer", 15, BlockRef(number=19, hash="0x01"))
+    assert not eth.queries
+    assert next(events).args.value == 15
+    assert len(eth.queries) == 1
+    assert [event.args.value for event in events] == [16, 17, 18, 19]
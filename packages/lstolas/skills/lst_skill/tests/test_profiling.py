@@ -0,0 +1,94 @@
+"""Test the on-demand profiling of the running agent."""
+
+import time
+import threading
+
+import pytest
+
+from packages.lstolas.skills.lst_skill.profiling import (
+    Profiler,
+    ProfileMode,
+    MemoryTracer,
+    ProfilingError,
+    thread_stacks,
+)
+
+
+def busy_loop(stop: threading.Event) -> None:
+    """Keep a thread busy until stopped."""
+    while not stop.is_set():
+        sum(range(1_000))
+
+
+def test_sampler_collects_the_stacks_of_the_other_threads():
+    """Test a sampler session ends by itself and collapses the stacks it sampled by thread."""
+    stop = threading.Event()
+    worker = threading.Thread(target=busy_loop, args=(stop,), name="busy-worker")
+    worker.start()
+    profiler = Profiler()
+    try:
+        profiler.start(ProfileMode.SAMPLER, 0.2)
+        with pytest.raises(ProfilingError, match="already running"):
+            profiler.start(ProfileMode.CPROFILE, 1)
+        with pytest.raises(ProfilingError, match="more seconds"):
+            profiler.get_result()
+        time.sleep(0.3)
+        result = profiler.get_result()
+    finally:
+        stop.set()
+        worker.join()
+    stacks = [line.rsplit(" ", 1) for line in result.splitlines()]
+    assert any(stack.startswith("busy-worker;") and stack.endswith(":busy_loop") for stack, _ in stacks)
+    assert all(int(count) > 0 for _, count in stacks)
+    assert profiler.session is None
+    assert profiler.get_result() == result
+
+
+def test_cprofile_session_reports_the_calls_of_its_thread():
+    """Test a cProfile session stopped early reports the functions called meanwhile."""
+    profiler = Profiler()
+    with pytest.raises(ProfilingError, match="No profiling session"):
+        profiler.get_result()
+    with pytest.raises(ValueError, match="duration"):
+        profiler.start(ProfileMode.CPROFILE, 0)
+    stop = threading.Event()
+    stop.set()
+    profiler.start(ProfileMode.CPROFILE, 60)
+    busy_loop(stop)
+    result = profiler.stop(limit=10)
+    assert "function calls" in result
+    assert "busy_loop" in result
+    with pytest.raises(ProfilingError, match="No profiling session is running"):
+        profiler.stop()
+
+
+def test_allocations_are_listed_and_diffed():
+    """Test the top allocation sites, and the growth of one between two snapshots."""
+    tracer = MemoryTracer()
+    with pytest.raises(ProfilingError, match="not traced"):
+        tracer.top()
+    tracer.start()
+    try:
+        assert "No previous snapshot" in tracer.diff()
+        held = [bytearray(1_024) for _ in range(1_000)]
+        diff = tracer.diff(limit=5)
+        assert "test_profiling.py" in diff.splitlines()[0]
+        assert tracer.top(limit=5).startswith("traced:")
+        del held
+    finally:
+        tracer.stop()
+    assert not tracer.tracing
+
+
+def test_thread_stacks_are_dumped_by_name():
+    """Test every thread is dumped with its name and current stack."""
+    stop = threading.Event()
+    worker = threading.Thread(target=stop.wait, name="waiting-worker", daemon=True)
+    worker.start()
+    try:
+        stacks = thread_stacks()
+    finally:
+        stop.set()
+        worker.join()
+    assert 'Thread "waiting-worker"' in stacks
+    assert "in test_thread_stacks_are_dumped_by_name" in stacks
@@ -0,0 +1,60 @@
+# ruff: noqa: ARG002
+"""Test the client-side rate limiting of the JSON-RPC requests."""
+
+import time
+import threading
+
+from packages.lstolas.skills.lst_skill.rate_limit import (
+    TokenBucket,
+    RequestClass,
+    RateLimitedProvider,
+    classify,
+    request_class,
+)
+
+
+class RecordingProvider:
+    """A provider recording the methods it is sent."""
+
+    def __init__(self) -> None:
+        """Initialize the provider."""
+        self.calls: list[str] = []
+
+    def make_request(self, method: str, params: list) -> dict:
+        """Answer a request."""
+        self.calls.append(method)
+        return {"jsonrpc": "2.0", "id": 1, "result": None}
+
+
+def test_requests_are_classified_by_method_unless_overridden():
+    """Test the class of a request comes from its method, or the enclosing block."""
+    assert classify("eth_sendRawTransaction") is RequestClass.TRANSACTION
+    assert classify("eth_getTransactionReceipt") is RequestClass.RECEIPT
+    assert classify("eth_call") is RequestClass.READ
+    assert classify("eth_getLogs") is RequestClass.BACKFILL
+    with request_class(RequestClass.BACKFILL):
+        assert classify("eth_getBlockByNumber") is RequestClass.BACKFILL
+    assert classify("eth_getBlockByNumber") is RequestClass.READ
+
+
+def test_queued_requests_are_served_by_class_at_the_configured_rate():
+    """Test higher classes overtake queued backfill requests, and waits are recorded per class."""
+    provider = RecordingProvider()
+    limited = RateLimitedProvider(provider, TokenBucket(rate=50, burst=1))
+    limited.make_request("eth_call", [])
+
+    started = time.monotonic()
+    backfill = [threading.Thread(target=limited.make_request, args=("eth_getLogs", [])) for _ in range(4)]
+    for thread in backfill:
+        thread.start()
+    time.sleep(0.005)
+    limited.make_request("eth_sendRawTransaction", [])
+    for thread in backfill:
+        thread.join()
+
+    assert provider.calls.index("eth_sendRawTransaction") <= 2
+    assert time.monotonic() - started >= 4 / 50 * 0.9
+    waits = limited.bucket.waits
+    assert waits[RequestClass.BACKFILL].count == 4
+    assert waits[RequestClass.TRANSACTION].count == 1
+    assert waits[RequestClass.TRANSACTION].max < waits[RequestClass.BACKFILL].max
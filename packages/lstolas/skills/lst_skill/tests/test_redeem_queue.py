@@ -0,0 +1,75 @@
+"""Test the persistent redeem queue."""
+
+from web3.datastructures import AttributeDict
+
+from packages.lstolas.skills.lst_skill.hashing import get_queued_hash
+from packages.lstolas.skills.lst_skill.indexing import BlockRef
+from packages.lstolas.skills.lst_skill.redeem_queue import RedeemQueue, QueuedRequest, OperationStatus
+
+
+REQUEST = QueuedRequest(
+    batch_hash="0x" + "11" * 32,
+    target="0x789B8c39EFEc3bCaB1DB232eC4a86E5ae2797d27",
+    amount=10**18,
+    operation="0x8ca9a95e41b5eece253c93f5b31eed1253aed6b145d8a6e14d913fdf8e732293",
+    status=2,
+    block_number=100,
+)
+
+
+def test_queued_then_executed(tmp_path):
+    """Test a request is inserted when queued and removed when executed."""
+    queue = RedeemQueue.load(tmp_path / "queue.json", last_block=0)
+    assert queue.on_request_queued(REQUEST)
+    assert not queue.on_request_queued(REQUEST)
+    assert REQUEST.queued_hash == get_queued_hash(REQUEST.batch_hash, REQUEST.target, REQUEST.amount, REQUEST.operation)
+    assert list(queue.pending) == [REQUEST.queued_hash]
+
+    removed = queue.on_request_executed(REQUEST.batch_hash, REQUEST.target, REQUEST.amount, REQUEST.operation)
+    assert removed == REQUEST
+    assert not queue.pending
+
+
+def test_state_survives_restart(tmp_path):
+    """Test the pending requests and block cursor are restored from disk."""
+    path = tmp_path / "queue.json"
+    queue = RedeemQueue.load(path, last_block=0)
+    queue.on_request_queued(REQUEST)
+    queue.checkpoint(BlockRef(number=150, hash="0x01"))
+    queue.save()
+
+    restored = RedeemQueue.load(path, last_block=0)
+    assert restored.last_block == 150
+    assert restored.pending == {REQUEST.queued_hash: REQUEST}
+
+
+def make_event(event_name: str, block_number: int, status: OperationStatus | None = None) -> AttributeDict:
+    """Build a decoded `RequestQueued` or `RequestExecuted` event of REQUEST."""
+    args = {
+        "batchHash": bytes.fromhex(REQUEST.batch_hash[2:]),
+        "target": REQUEST.target,
+        "amount": REQUEST.amount,
+        "operation": bytes.fromhex(REQUEST.operation[2:]),
+    }
+    if status is not None:
+        args["status"] = status.value
+    return AttributeDict.recursive({"event": event_name, "args": args, "blockNumber": block_number})
+
+
+def test_only_requests_waiting_for_olas_are_applied():
+    """Test applied events only queue the requests waiting for OLAS, and an execution drops its request."""
+    queue = RedeemQueue()
+    queued, skipped = queue.apply_events(
+        [
+            make_event("RequestQueued", 98, OperationStatus.UNSUPPORTED_OPERATION_TYPE),
+            make_event("RequestQueued", 100, OperationStatus.INSUFFICIENT_OLAS_BALANCE),
+        ]
+    )
+    assert queued == [REQUEST]
+    assert [request.block_number for request in skipped] == [98]
+    assert queue.pending == {REQUEST.queued_hash: REQUEST}
+
+    queued, skipped = queue.apply_events([make_event("RequestExecuted", 101)])
+    assert not queued
+    assert not skipped
+    assert not queue.pending
@@ -0,0 +1,82 @@
+# ruff: noqa: ARG002
+"""Test the pool of JSON-RPC endpoints."""
+
+import time
+
+import pytest
+
+from packages.lstolas.skills.lst_skill.rpc_pool import RpcPool, Endpoint
+
+
+class FakeProvider:
+    """A provider answering after a delay, or failing."""
+
+    def __init__(self, name: str, delay: float = 0.0, fail: bool = False) -> None:
+        """Initialize the provider."""
+        self.name = name
+        self.delay = delay
+        self.fail = fail
+        self.calls: list[str] = []
+
+    def make_request(self, method: str, params: list) -> dict:
+        """Answer a request with the name of the provider."""
+        self.calls.append(method)
+        time.sleep(self.delay)
+        if self.fail:
+            msg = f"{self.name} is down"
+            raise ConnectionError(msg)
+        return {"jsonrpc": "2.0", "id": 1, "result": self.name}
+
+
+def test_reads_go_to_the_fastest_healthy_endpoint_and_broken_ones_are_skipped():
+    """Test reads fail over, prefer the lowest weighted latency and open the breaker of failing endpoints."""
+    fast, slow, down = FakeProvider("fast"), FakeProvider("slow", delay=0.01), FakeProvider("down", fail=True)
+    pool = RpcPool(
+        [Endpoint("down", provider=down), Endpoint("slow", provider=slow), Endpoint("fast", provider=fast)],
+        failure_threshold=2,
+    )
+    pool.endpoints[1].latencies.append(0.01)
+    pool.endpoints[2].latencies.append(0.001)
+
+    for _ in range(3):
+        assert pool.make_request("eth_blockNumber", [])["result"] == "fast"
+    assert len(fast.calls) == 3
+    assert not slow.calls
+
+    # the down endpoint has no latency yet so is tried first, until its breaker opens
+    assert len(down.calls) == 2
+    assert not pool.endpoints[0].is_available(time.monotonic())
+    assert pool.endpoints[0].error_rate == 1.0
+
+    fast.fail = True
+    assert pool.make_request("eth_blockNumber", [])["result"] == "slow"
+
+    pool.endpoints[2].weight = 100.0
+    fast.fail = False
+    pool.endpoints[2].latencies.extend([0.05] * 10)
+    assert pool.make_request("eth_blockNumber", [])["result"] == "fast"
+
+    slow.fail = fast.fail = True
+    with pytest.raises(ConnectionError):
+        pool.make_request("eth_blockNumber", [])
+    pool.close()
+
+
+def test_slow_reads_are_hedged_and_transactions_broadcast():
+    """Test a slow read is also sent to the next endpoint and transactions reach every healthy one."""
+    stuck, backup = FakeProvider("stuck", delay=0.5), FakeProvider("backup")
+    pool = RpcPool(
+        [Endpoint("stuck", provider=stuck), Endpoint("backup", provider=backup, weight=0.5)], hedge_after=0.05
+    )
+    pool.endpoints[1].latencies.append(0.01)
+
+    started = time.monotonic()
+    assert pool.make_request("eth_call", [])["result"] == "backup"
+    assert time.monotonic() - started < 0.4
+    assert stuck.calls == backup.calls == ["eth_call"]
+
+    stuck.delay = 0.0
+    backup.fail = True
+    assert pool.make_request("eth_sendRawTransaction", ["0x"])["result"] == "stuck"
+    assert stuck.calls[-1] == backup.calls[-1] == "eth_sendRawTransaction"
+    pool.close()
@@ -0,0 +1,37 @@
+"""Test the signature readiness tracker."""
+
+from packages.lstolas.skills.lst_skill.signature_readiness import SignatureReadiness
+
+
+MESSAGE = "0x6e0d3f1d8a4f7c2f0f0bcfd2d6a2c0e3b7a1c8b3f7b0cdb1d2e3f4a5b6c7d8e9"
+OTHER = "0x1f0e2d3c4b5a69788796a5b4c3d2e1f00112233445566778899aabbccddeeff0"
+
+
+def test_exponential_recheck():
+    """Test a message without signatures is checked again after doubling intervals."""
+    readiness = SignatureReadiness()
+    assert readiness.should_check(MESSAGE, now=0)
+
+    readiness.on_not_ready(MESSAGE, now=0, interval=10, max_interval=25)
+    assert not readiness.should_check(MESSAGE, now=9)
+    assert readiness.should_check(MESSAGE, now=10)
+
+    readiness.on_not_ready(MESSAGE, now=10, interval=10, max_interval=25)
+    assert not readiness.should_check(MESSAGE, now=29)
+    assert readiness.should_check(MESSAGE, now=30)
+
+    readiness.on_not_ready(MESSAGE, now=30, interval=10, max_interval=25)
+    assert readiness.rechecks[MESSAGE].next_check == 55
+
+
+def test_collected_signatures_event():
+    """Test a collected signatures event makes a backed off message ready and stale messages are dropped."""
+    readiness = SignatureReadiness()
+    readiness.on_not_ready(MESSAGE, now=0)
+    readiness.on_not_ready(OTHER, now=0)
+    readiness.on_collected_signatures(MESSAGE)
+    assert readiness.should_check(MESSAGE, now=1)
+    assert not readiness.should_check(OTHER, now=1)
+
+    readiness.retain({MESSAGE})
+    assert OTHER not in readiness.rechecks
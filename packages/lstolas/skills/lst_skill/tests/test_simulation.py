@@ -0,0 +1,125 @@
+"""Test the in-process simulated chain."""
+
+import json
+from types import SimpleNamespace
+from pathlib import Path
+from itertools import starmap
+
+import pytest
+from web3 import Web3, HTTPProvider
+from eth_account import Account
+from web3.exceptions import ContractLogicError
+
+from packages.lstolas.skills.lst_skill.bloom import BloomScreen, fetch_blooms
+from packages.lstolas.skills.lst_skill.indexing import BlockRef
+from packages.lstolas.skills.lst_skill.multicall import MULTICALL3_ADDRESS, CallResult, decode_bool, encode_call
+from packages.lstolas.skills.lst_skill.simulation import Revert, SimulatedNode, SimulatedChain
+from packages.lstolas.skills.lst_skill.http_session import SessionConfig, PooledHTTPProvider, close_sessions
+from packages.lstolas.skills.lst_skill.log_collector import LogCollector
+
+
+ROOT = Path(__file__).parents[4]
+TOKEN = "0x19C9b2a1B8C5c93d85E8d6826dF9B46f1D2e4c6A"
+SENDER = "0x789B8c39EFEc3bCaB1DB232eC4a86E5ae2797d27"
+RECEIVER = "0x9D54Ce975f9B2aeF50a999f98C247a8a7b1cC24b"
+
+
+def load_abi(path: str) -> list[dict]:
+    """Load the ABI of a contract package."""
+    return json.loads((ROOT / path).read_text(encoding="utf-8"))["abi"]
+
+
+def test_logs_are_served_by_block_and_prescreened_by_bloom():
+    """Test the simulated logs are filtered by range and topic, and the header blooms match them."""
+    chain = SimulatedChain(chain_id=100)
+    abi = load_abi("eightballer/contracts/erc_20/build/erc_20.json")
+    token = chain.deploy(TOKEN, abi)
+    for block in range(1, 201, 20):
+        token.emit("Transfer", block=block, **{"from": SENDER, "to": RECEIVER, "value": block})
+    chain.mine(200)
+    web3 = Web3(chain)
+    collector = LogCollector(SimpleNamespace(api=web3), prescreen=True)
+    collector.watch(web3.eth.contract(address=TOKEN, abi=abi), "Transfer")
+
+    events = collector.get_events(TOKEN, "Transfer", 30, BlockRef(number=120, hash="0x01"))
+    assert [event.args.value for event in events] == [41, 61, 81, 101]
+    assert chain.requests["eth_getBlockByNumber"] == 91
+    assert chain.requests["eth_getLogs"] == 4
+
+
+def test_views_are_answered_directly_and_through_multicall():
+    """Test calls reach the handlers of a simulated contract, reverts included, alone or aggregated."""
+    chain = SimulatedChain(chain_id=100)
+    abi = load_abi("eightballer/contracts/erc_20/build/erc_20.json")
+    balances = {SENDER.lower(): 5}  # addresses are decoded in lower case
+
+    def balance_of(account: str) -> int:
+        if account not in balances:
+            msg = "unknown account"
+            raise Revert(msg)
+        return balances[account]
+
+    chain.deploy(TOKEN, abi, balanceOf=balance_of)
+    ledger_api = SimpleNamespace(api=Web3(chain), identifier="ethereum")
+    instance = ledger_api.api.eth.contract(address=TOKEN, abi=abi)
+    assert instance.functions.balanceOf(SENDER).call() == 5
+    with pytest.raises(ContractLogicError, match="unknown account"):
+        instance.functions.balanceOf(RECEIVER).call()
+
+    multicall = ledger_api.api.eth.contract(
+        address=MULTICALL3_ADDRESS, abi=load_abi("eightballer/contracts/multicall3/build/multicall3.json")
+    )
+    calls = [encode_call(instance, "balanceOf", account) for account in (SENDER, RECEIVER)]
+    batch = [(call.target, True, call.call_data) for call in calls]
+    results = list(starmap(CallResult, multicall.functions.aggregate3(batch).call()))
+    assert [result.success for result in results] == [True, False]
+    assert ledger_api.api.codec.decode(["uint256"], results[0].return_data) == (5,)
+    assert decode_bool(ledger_api, results[1]) is None
+    assert chain.requests["eth_call"] == 3
+
+
+def test_transactions_change_the_state_of_a_served_chain():
+    """Test a transaction sent to a simulated node changes the state a call to the same function leaves alone."""
+    chain = SimulatedChain(chain_id=100)
+    abi = load_abi("eightballer/contracts/erc_20/build/erc_20.json")
+    account = Account.create()
+    balances = {account.address.lower(): 10}
+    token = None
+
+    def transfer(to: str, value: int) -> bool:
+        if chain.transaction is not None:
+            sender = chain.transaction["from"]
+            balances[sender.lower()] -= value
+            balances[to] = balances.get(to, 0) + value
+            token.emit("Transfer", **{"from": sender, "to": to, "value": value})
+        return True
+
+    token = chain.deploy(TOKEN, abi, transfer=transfer, balanceOf=lambda account: balances.get(account, 0))
+    node = SimulatedNode(chain)
+    node.start()
+    try:
+        web3 = Web3(HTTPProvider(node.url))
+        instance = web3.eth.contract(address=TOKEN, abi=abi)
+        assert instance.functions.transfer(RECEIVER, 4).call({"from": account.address}) is True
+        assert instance.functions.balanceOf(RECEIVER).call() == 0
+
+        transaction = instance.functions.transfer(RECEIVER, 4).build_transaction(
+            {
+                "from": account.address,
+                "nonce": web3.eth.get_transaction_count(account.address),
+                "gasPrice": web3.eth.gas_price,
+            }
+        )
+        tx_hash = web3.eth.send_raw_transaction(account.sign_transaction(transaction).rawTransaction)
+        receipt = web3.eth.wait_for_transaction_receipt(tx_hash)
+        assert receipt.status == 1
+        assert instance.functions.balanceOf(RECEIVER).call() == 4
+        assert web3.eth.get_transaction_count(account.address) == 1
+
+        batched = Web3(PooledHTTPProvider(node.url, SessionConfig()))
+        blooms = fetch_blooms(SimpleNamespace(api=batched), 0, receipt.blockNumber)
+        screen = BloomScreen([TOKEN], [receipt.logs[0].topics[0].hex()])
+        assert [number for number, bloom in blooms.items() if screen.may_match(bloom)] == [receipt.blockNumber]
+    finally:
+        close_sessions()
+        node.stop()
@@ -0,0 +1,150 @@
+"""Test the websocket subscriptions against a local JSON-RPC stub."""
+
+import json
+import time
+import asyncio
+import threading
+
+import websockets
+
+from packages.lstolas.skills.lst_skill.indexing import ChainIndexer
+from packages.lstolas.skills.lst_skill.subscriptions import ChainSubscription
+
+
+PROCESSOR = "0x195c34FfbEB3dF49E3e14aa8a2D23DDAf167c096"
+COLLECTOR = "0x7E11A2c0fd9E3F4F1C1f7e9A1D6FE8Cb5A1C2D3e"
+
+
+class WsJsonRpcStub:
+    """Local websocket JSON-RPC server answering `eth_subscribe` and pushing notifications on demand."""
+
+    def __init__(self) -> None:
+        self.loop = asyncio.new_event_loop()
+        self.clients: set = set()
+        self.subscriptions: dict[str, str] = {}
+        self.port = 0
+        self._server = None
+        ready = threading.Event()
+        threading.Thread(target=self._serve, args=(ready,), daemon=True).start()
+        ready.wait(5)
+
+    @property
+    def url(self) -> str:
+        """The url of the stub."""
+        return f"ws://127.0.0.1:{self.port}"
+
+    def _serve(self, ready: threading.Event) -> None:
+        asyncio.set_event_loop(self.loop)
+        self._server = self.loop.run_until_complete(self._start())
+        self.port = self._server.sockets[0].getsockname()[1]
+        ready.set()
+        self.loop.run_forever()
+
+    async def _start(self):
+        return await websockets.serve(self._handle, "127.0.0.1", 0)
+
+    async def _handle(self, websocket, *_) -> None:
+        self.clients.add(websocket)
+        try:
+            async for message in websocket:
+                request = json.loads(message)
+                subscription_id = hex(len(self.subscriptions) + 1)
+                self.subscriptions[request["params"][0]] = subscription_id
+                await websocket.send(json.dumps({"jsonrpc": "2.0", "id": request["id"], "result": subscription_id}))
+        finally:
+            self.clients.discard(websocket)
+
+    def push(self, kind: str, result: dict) -> None:
+        """Push a notification for the given subscription kind to every client."""
+        message = json.dumps(
+            {
+                "jsonrpc": "2.0",
+                "method": "eth_subscription",
+                "params": {"subscription": self.subscriptions[kind], "result": result},
+            }
+        )
+
+        async def send() -> None:
+            for client in list(self.clients):
+                await client.send(message)
+
+        asyncio.run_coroutine_threadsafe(send(), self.loop).result(5)
+
+    def push_head(self, number: int) -> None:
+        """Push a new head."""
+        self.push("newHeads", {"number": hex(number), "hash": f"0x{number:064x}"})
+
+    def push_log(self, address: str, number: int) -> None:
+        """Push a log of the address."""
+        self.push("logs", {"address": address.lower(), "blockNumber": hex(number), "removed": False})
+
+    def drop_clients(self) -> None:
+        """Close every client connection."""
+
+        async def close() -> None:
+            for client in list(self.clients):
+                await client.close()
+
+        asyncio.run_coroutine_threadsafe(close(), self.loop).result(5)
+
+    def close(self) -> None:
+        """Stop the server."""
+        self._server.close()
+        self.loop.call_soon_threadsafe(self.loop.stop)
+
+
+def wait_until(condition, timeout: float = 5) -> None:
+    """Wait until the condition holds."""
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "condition not met in time"
+        time.sleep(0.01)
+
+
+def test_pushed_heads_and_logs_feed_the_indexer():
+    """Test the indexer takes heads from the socket and only queries ranges with pushed logs."""
+    stub = WsJsonRpcStub()
+    subscription = ChainSubscription(stub.url, [PROCESSOR, COLLECTOR], reconnect_delay=0.1)
+    subscription.start()
+    try:
+        wait_until(lambda: subscription.connected and len(stub.subscriptions) == 2)
+        for number in range(100, 104):
+            stub.push_head(number)
+        stub.push_log(PROCESSOR, 102)
+        stub.push_head(104)
+        wait_until(lambda: subscription.head is not None and subscription.head.number == 104)
+
+        indexer = ChainIndexer(ledger_api=None, confirmations=1, subscription=subscription)
+        assert indexer.confirmed_block().number == 103
+        assert indexer.may_have_logs(PROCESSOR, 101, 103)
+        assert not indexer.may_have_logs(COLLECTOR, 101, 103)
+        # the first head may predate the logs subscription, so it is not covered
+        assert indexer.may_have_logs(COLLECTOR, 100, 103)
+    finally:
+        subscription.stop()
+        stub.close()
+
+
+def test_dropped_socket_falls_back_to_polling():
+    """Test ranges are no longer covered once the socket drops, until heads are pushed again."""
+    stub = WsJsonRpcStub()
+    subscription = ChainSubscription(stub.url, [PROCESSOR], reconnect_delay=0.1)
+    subscription.start()
+    try:
+        wait_until(lambda: subscription.connected)
+        for number in range(10, 14):
+            stub.push_head(number)
+        wait_until(lambda: subscription.covers(11, 12))
+
+        stub.subscriptions.clear()
+        stub.drop_clients()
+        wait_until(lambda: not subscription.covers(11, 12))
+        wait_until(lambda: subscription.connected and len(stub.subscriptions) == 2)
+        for number in range(14, 17):
+            stub.push_head(number)
+        wait_until(lambda: subscription.covers(15, 15))
+        # the gap left while disconnected has to be backfilled by polling
+        assert not subscription.covers(12, 15)
+    finally:
+        subscription.stop()
+        stub.close()
@@ -0,0 +1,48 @@
+"""Test the token balance mirror."""
+
+from packages.lstolas.skills.lst_skill.indexing import BlockRef
+from packages.lstolas.skills.lst_skill.token_balances import TokenBalances
+
+
+RELAYER = "0x789B8c39EFEc3bCaB1DB232eC4a86E5ae2797d27"
+DISTRIBUTOR = "0x9D54Ce975f9B2aeF50a999f98C247a8a7b1cC24b"
+BRIDGE = "0x88ad09518695c6c3712AC10a214bE5109a655671"
+
+
+def test_transfers_update_watched_balances():
+    """Test transfers only move the balances of the watched addresses."""
+    balances = TokenBalances()
+    assert balances.missing([RELAYER, DISTRIBUTOR]) == [RELAYER, DISTRIBUTOR]
+    balances.reconcile(RELAYER, 0)
+    balances.reconcile(DISTRIBUTOR, 10)
+
+    balances.on_transfer(BRIDGE, RELAYER, 100)
+    balances.on_transfer(DISTRIBUTOR, RELAYER, 10)
+    assert balances.balance_of(RELAYER) == 110
+    assert balances.balance_of(DISTRIBUTOR) == 0
+    assert BRIDGE not in balances.balances
+
+
+def test_reconciliation_interval():
+    """Test the mirror is due for reconciliation once the interval has elapsed."""
+    balances = TokenBalances(last_reconciled_block=1000)
+    assert not balances.needs_reconciliation(1500, 1000)
+    assert balances.needs_reconciliation(2000, 1000)
+
+
+def test_emptied_balance_is_held_until_its_transfer_is_indexed():
+    """Test an address emptied by the agent reads as empty until the block of its transfer out is indexed."""
+    balances = TokenBalances(last_block=100)
+    balances.reconcile(RELAYER, 50)
+    balances.on_emptied(RELAYER, 104)
+    assert balances.balance_of(RELAYER) == 0
+
+    balances.checkpoint(BlockRef(number=103, hash="0x03"))
+    assert balances.balance_of(RELAYER) == 0
+    balances.on_transfer(RELAYER, BRIDGE, 50)
+    balances.checkpoint(BlockRef(number=104, hash="0x04"))
+    assert balances.balance_of(RELAYER) == 0
+    assert not balances.emptied
+
+    balances.on_transfer(BRIDGE, RELAYER, 7)
+    assert balances.balance_of(RELAYER) == 7
@@ -0,0 +1,98 @@
+"""Test the read-through cache of contract view calls."""
+# ruff: noqa: ARG002
+
+from packages.lstolas.skills.lst_skill.view_cache import ViewCache
+
+
+PROXY = "0x789B8c39EFEc3bCaB1DB232eC4a86E5ae2797d27"
+COLLECTOR = "0x5aD1BB8AFa97bD24Cd54d03f87649791Ea9e69AE"
+
+
+class LedgerApi:
+    """Ledger api of a chain whose head can be moved."""
+
+    chain_id = 10200
+    head: int | None = 100
+
+
+class LstStakingTokenLocked:
+    """Staking proxy wrapper counting its view calls."""
+
+    def __init__(self) -> None:
+        self.calls: list[str] = []
+
+    def liveness_period(self, ledger_api: LedgerApi, contract_address: str) -> dict:
+        """Immutable view."""
+        self.calls.append("liveness_period")
+        return {"int": 86400}
+
+    def ts_checkpoint(self, ledger_api: LedgerApi, contract_address: str) -> dict:
+        """Block-scoped view."""
+        self.calls.append("ts_checkpoint")
+        return {"int": ledger_api.head}
+
+    def checkpoint(self) -> str:
+        """Transaction, not cached."""
+        return "checkpoint"
+
+
+class LstCollector:
+    """Collector wrapper counting its view calls."""
+
+    def __init__(self) -> None:
+        self.calls: list[str] = []
+
+    def min_olas_balance(self, ledger_api: LedgerApi, contract_address: str) -> dict:
+        """Config view."""
+        self.calls.append("min_olas_balance")
+        return {"int": 10}
+
+
+def test_immutable_and_block_scoped_views():
+    """Test immutable views are read once and block-scoped views once per known head."""
+    ledger_api, wrapper = LedgerApi(), LstStakingTokenLocked()
+    cache = ViewCache(block_number=lambda api: api.head)
+    contract = cache.wrap(wrapper)
+    for _ in range(3):
+        assert contract.liveness_period(ledger_api, PROXY) == {"int": 86400}
+        assert contract.ts_checkpoint(ledger_api, PROXY.lower()) == {"int": 100}
+    ledger_api.head = 101
+    assert contract.liveness_period(ledger_api, PROXY) == {"int": 86400}
+    assert contract.ts_checkpoint(ledger_api, PROXY) == {"int": 101}
+    ledger_api.head = None
+    contract.ts_checkpoint(ledger_api, PROXY)
+    contract.ts_checkpoint(ledger_api, PROXY)
+    assert wrapper.calls == ["liveness_period", "ts_checkpoint", "ts_checkpoint", "ts_checkpoint", "ts_checkpoint"]
+    assert contract.checkpoint() == "checkpoint"
+
+
+def test_views_of_a_contract_are_forgotten_after_its_transactions():
+    """Test every cached view of a contract is read again once the agent sent it a transaction."""
+    ledger_api, wrapper = LedgerApi(), LstStakingTokenLocked()
+    cache = ViewCache(block_number=lambda api: api.head)
+    contract = cache.wrap(wrapper)
+    contract.liveness_period(ledger_api, PROXY)
+    contract.ts_checkpoint(ledger_api, PROXY)
+    cache.forget(COLLECTOR)
+    contract.ts_checkpoint(ledger_api, PROXY)
+    assert len(wrapper.calls) == 2
+    cache.forget(PROXY.lower())
+    contract.liveness_period(ledger_api, PROXY)
+    contract.ts_checkpoint(ledger_api, PROXY)
+    assert wrapper.calls == ["liveness_period", "ts_checkpoint", "liveness_period", "ts_checkpoint"]
+
+
+def test_config_views_are_invalidated_by_their_events():
+    """Test config views are read again once an event changing them is indexed for their contract."""
+    ledger_api, wrapper = LedgerApi(), LstCollector()
+    cache = ViewCache(block_number=lambda api: api.head)
+    contract = cache.wrap(wrapper)
+    contract.min_olas_balance(ledger_api, COLLECTOR)
+    cache.on_event(COLLECTOR, "ProtocolBalanceUpdated")
+    cache.on_event(PROXY, "ImplementationUpdated")
+    contract.min_olas_balance(ledger_api, COLLECTOR)
+    assert len(wrapper.calls) == 1
+    cache.on_event(COLLECTOR, "ImplementationUpdated")
+    contract.min_olas_balance(ledger_api, COLLECTOR)
+    assert len(wrapper.calls) == 2
+    assert (cache.hits, cache.misses) == (1, 2)
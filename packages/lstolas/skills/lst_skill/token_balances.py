@@ -0,0 +1,54 @@
+"""Local mirror of the token balances of watched addresses, kept current from `Transfer` events."""
+
+from typing import Any
+from collections.abc import Iterable
+
+from packages.lstolas.skills.lst_skill.indexing import REORG_WINDOW, BlockRef, IndexedModel
+
+
+class TokenBalances(IndexedModel):
+    """Token balances of the watched addresses as of `last_block`."""
+
+    last_reconciled_block: int = 0
+    balances: dict[str, int] = {}
+    # addresses emptied by a transaction of the agent, with the block of the transaction, until it is indexed
+    emptied: dict[str, int] = {}
+
+    def missing(self, addresses: list[str]) -> list[str]:
+        """Get the watched addresses whose balance is not mirrored yet."""
+        return [address for address in addresses if address not in self.balances]
+
+    def on_transfer(self, sender: str, receiver: str, value: int) -> None:
+        """Apply a `Transfer` event to the watched addresses it touches."""
+        if sender in self.balances:
+            self.balances[sender] -= value
+        if receiver in self.balances:
+            self.balances[receiver] += value
+
+    def apply_events(self, events: Iterable[Any]) -> None:
+        """Apply the `Transfer` events of the token."""
+        for event in events:
+            self.on_transfer(event.args["from"], event.args["to"], event.args["value"])
+
+    def reconcile(self, address: str, balance: int) -> None:
+        """Overwrite a mirrored balance with the one read from the token contract."""
+        self.balances[address] = balance
+
+    def needs_reconciliation(self, block_number: int, interval: int) -> bool:
+        """Whether the mirrored balances are due to be checked against the token contract."""
+        return block_number - self.last_reconciled_block >= interval
+
+    def on_emptied(self, address: str, block_number: int) -> None:
+        """Record that a transaction of the agent emptied an address, before its transfer out is indexed."""
+        self.emptied[address] = block_number
+
+    def checkpoint(self, block: BlockRef, window: int = REORG_WINDOW) -> bool:
+        """Record a newly indexed block, once the transfers out of emptied addresses are in it."""
+        self.emptied = {address: number for address, number in self.emptied.items() if number > block.number}
+        return super().checkpoint(block, window)
+
+    def balance_of(self, address: str) -> int:
+        """Get the mirrored balance of a watched address, nothing if it was emptied since the last indexed block."""
+        if address in self.emptied:
+            return 0
+        return self.balances.get(address, 0)
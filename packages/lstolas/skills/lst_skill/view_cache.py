@@ -0,0 +1,166 @@
+"""Read-through cache of the contract view calls made through the contract wrappers."""
+
+import threading
+from enum import StrEnum
+from typing import Any, NamedTuple
+from functools import partial
+from collections import OrderedDict
+from collections.abc import Callable
+
+from eth_utils.address import to_checksum_address
+
+
+CACHE_SIZE = 4_096  # view results kept across all contracts
+
+
+class CachePolicy(StrEnum):
+    """How long the result of a view call stays valid."""
+
+    IMMUTABLE = "immutable"  # for the lifetime of the contract
+    CONFIG = "config"  # until one of the events that change it is indexed
+    BLOCK = "block"  # for the head block it was read at
+
+
+class ViewPolicy(NamedTuple):
+    """The caching policy of a view method of a contract wrapper."""
+
+    policy: CachePolicy
+    invalidated_by: tuple[str, ...] = ()
+
+
+IMMUTABLE = ViewPolicy(CachePolicy.IMMUTABLE)
+BLOCK = ViewPolicy(CachePolicy.BLOCK)
+
+VIEW_POLICIES: dict[str, dict[str, ViewPolicy]] = {  # wrapper class: view method: policy
+    "LstStakingTokenLocked": {
+        "liveness_period": IMMUTABLE,
+        "max_num_services": IMMUTABLE,
+        "rewards_per_second": IMMUTABLE,
+        "min_staking_deposit": IMMUTABLE,
+        "time_for_emissions": IMMUTABLE,
+        "staking_token": IMMUTABLE,
+        "activity_checker": IMMUTABLE,
+        "ts_checkpoint": BLOCK,
+        "available_rewards": BLOCK,
+    },
+    "LstStakingManager": {
+        "num_agent_instances": IMMUTABLE,
+        "threshold": IMMUTABLE,
+        "agent_id": IMMUTABLE,
+    },
+    "LstCollector": {
+        "min_olas_balance": ViewPolicy(CachePolicy.CONFIG, ("ImplementationUpdated",)),
+        "map_operation_receiver_balances": ViewPolicy(
+            CachePolicy.CONFIG, ("OperationReceiverBalancesUpdated", "OperationReceiversSet", "ImplementationUpdated")
+        ),
+    },
+}
+
+
+class ViewCache:
+    """Least recently used results of contract view calls, kept according to the policy table.
+
+    Results are keyed by chain id, contract address, method and arguments. Block-scoped results
+    are dropped once the head moves past the block they were read at, and are not cached while no
+    head is known; config results are dropped when an event listed in their policy is indexed for
+    their contract. Every result of a contract the agent sends a transaction to is forgotten, as
+    the transaction may change it before its events are indexed.
+    """
+
+    def __init__(
+        self,
+        block_number: Callable[[Any], int | None],
+        policies: dict[str, dict[str, ViewPolicy]] = VIEW_POLICIES,
+        maxsize: int = CACHE_SIZE,
+    ) -> None:
+        """Initialize the cache, with a function getting the known head block number of a ledger api, if any."""
+        self.block_number = block_number
+        self.policies = policies
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[tuple, tuple[Any, int | None]] = OrderedDict()
+        self._invalidated_methods: dict[str, set[str]] = {}
+        for contract_policies in policies.values():
+            for method, policy in contract_policies.items():
+                for event_name in policy.invalidated_by:
+                    self._invalidated_methods.setdefault(event_name, set()).add(method)
+
+    def wrap(self, contract: Any) -> Any:
+        """Get a contract wrapper whose view methods in the policy table are read through the cache."""
+        policies = self.policies.get(type(contract).__name__, {})
+        return CachedViews(contract, policies, self) if policies else contract
+
+    def call(
+        self,
+        method: str,
+        policy: ViewPolicy,
+        function: Callable[..., Any],
+        ledger_api: Any,
+        contract_address: str,
+        *args: Any,
+        **kwargs: Any,
+    ) -> Any:
+        """Call a view method of a contract wrapper, or get its cached result."""
+        address = to_checksum_address(contract_address)
+        key = (ledger_api.chain_id, address, method, args, tuple(sorted(kwargs.items())))
+        block = None
+        if policy.policy is CachePolicy.BLOCK:
+            block = self.block_number(ledger_api)
+            if block is None:
+                return function(ledger_api, contract_address, *args, **kwargs)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] == block:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+        result = function(ledger_api, contract_address, *args, **kwargs)
+        with self._lock:
+            self.misses += 1
+            self._entries[key] = (result, block)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return result
+
+    def on_event(self, address: str, event_name: str) -> None:
+        """Drop the config results of a contract that an indexed event changes."""
+        methods = self._invalidated_methods.get(event_name)
+        if not methods:
+            return
+        address = to_checksum_address(address)
+        with self._lock:
+            for key in [key for key in self._entries if key[1] == address and key[2] in methods]:
+                del self._entries[key]
+
+    def forget(self, address: str) -> None:
+        """Drop every result of a contract."""
+        address = to_checksum_address(address)
+        with self._lock:
+            for key in [key for key in self._entries if key[1] == address]:
+                del self._entries[key]
+
+    def clear(self) -> None:
+        """Drop every result."""
+        with self._lock:
+            self._entries.clear()
+
+
+class CachedViews:
+    """A contract wrapper proxy reading the view methods of its policy table through a view cache."""
+
+    def __init__(self, contract: Any, policies: dict[str, ViewPolicy], cache: ViewCache) -> None:
+        """Initialize the proxy."""
+        self._contract = contract
+        self._policies = policies
+        self._cache = cache
+
+    def __getattr__(self, name: str) -> Any:
+        """Get an attribute of the wrapper, read through the cache if it is a cached view method."""
+        attribute = getattr(self._contract, name)
+        policy = self._policies.get(name)
+        if policy is None:
+            return attribute
+        return partial(self._cache.call, name, policy, attribute)
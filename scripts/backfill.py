@@ -0,0 +1,339 @@
+"""Backfill the event stores of the lst skill from the deployment blocks up to the confirmed chain head.
+
+The history of each chain is split into block windows whose logs are fetched concurrently, with a
+bounded number of requests in flight per endpoint, and decoded in a process pool. The decoded events
+are applied in chain order to the same json stores the skill loads from its `data_dir`, through the
+same methods its rounds apply them with, and are checkpointed after every batch of windows so that an
+interrupted run resumes where it stopped. The raw logs are kept in the event store of the chain, so
+that the skill reads the backfilled range back from disk instead of fetching it again.
+
+    python -m scripts.backfill --data-dir agent/data
+"""
+
+import json
+import time
+import logging
+from typing import Any
+from pathlib import Path
+from functools import cache
+from dataclasses import dataclass
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+
+import yaml
+import click
+from web3 import Web3
+from eth_utils.abi import event_abi_to_log_topic
+from eth_utils.address import to_checksum_address
+from web3._utils.events import get_event_data  # noqa: PLC2701
+from web3.datastructures import AttributeDict
+from eth_utils.conversions import to_hex
+
+from packages.lstolas.skills.lst_skill.indexing import REORG_WINDOW, BlockRef, IndexedModel
+from packages.lstolas.skills.lst_skill.event_store import EventStore
+from packages.lstolas.skills.lst_skill.redeem_queue import RedeemQueue
+from packages.lstolas.skills.lst_skill.token_balances import TokenBalances
+from packages.lstolas.skills.lst_skill.bridge_messages import BridgeMessages
+from packages.lstolas.skills.lst_skill.staked_services import StakedServices
+
+
+ROOT = Path(__file__).parent.parent
+SKILL_CONFIG_PATH = ROOT / "packages" / "lstolas" / "skills" / "lst_skill" / "skill.yaml"
+
+DEPLOYMENT_BLOCKS = {
+    "layer_1": 9123229,  # Sepolia
+    "layer_2": 17497117,  # Chiado
+}
+WINDOW_SIZE = 2_000  # blocks per eth_getLogs
+CONCURRENCY = 4  # eth_getLogs in flight per endpoint
+WINDOWS_PER_CHECKPOINT = 16  # windows applied to the stores between two saves
+MAX_RETRIES = 5
+
+ABI_PATHS = {
+    "erc_20": ROOT / "packages" / "eightballer" / "contracts" / "erc_20" / "build" / "erc_20.json",
+    "amb_gnosis": ROOT / "packages" / "eightballer" / "contracts" / "amb_gnosis" / "build" / "amb_gnosis.json",
+    "lst_collector": ROOT / "packages" / "lstolas" / "contracts" / "lst_collector" / "build" / "lst_collector.json",
+    "lst_staking_manager": (
+        ROOT / "packages" / "lstolas" / "contracts" / "lst_staking_manager" / "build" / "lst_staking_manager.json"
+    ),
+    "lst_staking_processor_l2": (
+        ROOT
+        / "packages"
+        / "lstolas"
+        / "contracts"
+        / "lst_staking_processor_l2"
+        / "build"
+        / "lst_staking_processor_l2.json"
+    ),
+}
+
+logger = logging.getLogger("backfill")
+
+
+@dataclass(frozen=True)
+class Stream:
+    """An event of a contract, the contract address being read from the skill config."""
+
+    address_key: str
+    contract: str
+    event_name: str
+
+
+@dataclass(frozen=True)
+class Store:
+    """An indexed model of the skill, the streams it is built from and how their events apply to it."""
+
+    file_name: str
+    model: type[IndexedModel]
+    layer: str
+    streams: tuple[Stream, ...]
+    apply: Callable[[Any, list[AttributeDict]], Any]
+    defaults: Callable[[dict[str, Any]], dict[str, Any]] = lambda _: {}
+
+
+def token_balances_defaults(config: dict[str, Any]) -> dict[str, Any]:
+    """Start the watched balances at zero, as the watched contracts are deployed at the start block."""
+    watched = config.get("layer_1_watched_addresses") or [
+        config["lst_unstake_relayer_address"],
+        config["lst_distributor_address"],
+    ]
+    return {"balances": {to_checksum_address(address): 0 for address in watched}}
+
+
+STORES = (
+    Store(
+        file_name="redeem_queue.json",
+        model=RedeemQueue,
+        layer="layer_2",
+        streams=(
+            Stream("lst_staking_processor_l2_address", "lst_staking_processor_l2", "RequestQueued"),
+            Stream("lst_staking_processor_l2_address", "lst_staking_processor_l2", "RequestExecuted"),
+        ),
+        apply=RedeemQueue.apply_events,
+    ),
+    Store(
+        file_name="bridge_messages.json",
+        model=BridgeMessages,
+        layer="layer_2",
+        streams=(
+            Stream("lst_collector_address", "lst_collector", "TokensRelayed"),
+            Stream("layer_2_amb_home", "amb_gnosis", "UserRequestForSignature"),
+        ),
+        apply=BridgeMessages.apply_events,
+    ),
+    Store(
+        file_name="staked_services.json",
+        model=StakedServices,
+        layer="layer_2",
+        streams=(Stream("lst_staking_manager_address", "lst_staking_manager", "Staked"),),
+        apply=StakedServices.apply_events,
+    ),
+    Store(
+        file_name="layer_1_olas_balances.json",
+        model=TokenBalances,
+        layer="layer_1",
+        streams=(Stream("layer_1_olas_address", "erc_20", "Transfer"),),
+        apply=TokenBalances.apply_events,
+        defaults=token_balances_defaults,
+    ),
+)
+
+
+# every event the indexers of the skill watch on each chain, which the event store of the chain is keyed on
+WATCHED_STREAMS = {
+    "layer_1": (Stream("layer_1_olas_address", "erc_20", "Transfer"),),
+    "layer_2": (
+        Stream("lst_staking_processor_l2_address", "lst_staking_processor_l2", "RequestQueued"),
+        Stream("lst_staking_processor_l2_address", "lst_staking_processor_l2", "RequestExecuted"),
+        *(
+            Stream("lst_collector_address", "lst_collector", event_name)
+            for event_name in (
+                "OperationReceiverBalancesUpdated",
+                "OperationReceiversSet",
+                "ProtocolBalanceUpdated",
+                "ImplementationUpdated",
+                "TokensRelayed",
+            )
+        ),
+        Stream("layer_2_amb_home", "amb_gnosis", "UserRequestForSignature"),
+        Stream("layer_2_amb_home", "amb_gnosis", "CollectedSignatures"),
+        Stream("lst_staking_manager_address", "lst_staking_manager", "Staked"),
+    ),
+}
+
+
+@cache
+def load_event_abi(contract: str, event_name: str) -> dict[str, Any]:
+    """Load the ABI of a contract event from the build of its package."""
+    abi = json.loads(ABI_PATHS[contract].read_text(encoding="utf-8"))["abi"]
+    return next(item for item in abi if item.get("type") == "event" and item["name"] == event_name)
+
+
+def decode_logs(event_abis: dict[tuple[str, str], dict[str, Any]], logs: list[dict]) -> list[AttributeDict]:
+    """Decode the logs of a window, in a worker process."""
+    codec = Web3().codec
+    events = []
+    for log in logs:
+        event_abi = event_abis.get((to_checksum_address(log["address"]), to_hex(log["topics"][0])))
+        if event_abi is not None:
+            events.append(AttributeDict.recursive(get_event_data(codec, event_abi, log)))
+    return events
+
+
+def fetch_logs(w3: Web3, addresses: list[str], from_block: int, to_block: int) -> list[dict]:
+    """Fetch the logs of the addresses in a window, splitting it when the endpoint rejects its size."""
+    for attempt in range(MAX_RETRIES):
+        try:
+            return w3.eth.get_logs({"fromBlock": from_block, "toBlock": to_block, "address": addresses})
+        except ValueError:
+            # json-rpc errors, most commonly a result set over the endpoint limit
+            if to_block > from_block:
+                middle = (from_block + to_block) // 2
+                return fetch_logs(w3, addresses, from_block, middle) + fetch_logs(w3, addresses, middle + 1, to_block)
+            if attempt == MAX_RETRIES - 1:
+                raise
+        except OSError:
+            if attempt == MAX_RETRIES - 1:
+                raise
+        time.sleep(2**attempt)
+    return []
+
+
+class ChainBackfill:
+    """Backfills the stores of one chain."""
+
+    def __init__(
+        self,
+        layer: str,
+        config: dict[str, Any],
+        data_dir: Path,
+        decoders: ProcessPoolExecutor,
+        window_size: int = WINDOW_SIZE,
+        concurrency: int = CONCURRENCY,
+        windows_per_checkpoint: int = WINDOWS_PER_CHECKPOINT,
+    ) -> None:
+        """Initialize the backfill of a chain."""
+        self.layer = layer
+        self.config = config
+        self.decoders = decoders
+        self.window_size = window_size
+        self.concurrency = concurrency
+        self.windows_per_checkpoint = windows_per_checkpoint
+        self.w3 = Web3(Web3.HTTPProvider(config[f"{layer}_rpc_endpoint"]))
+        self.stores = [store for store in STORES if store.layer == layer]
+        self.models = {
+            store: store.model.load(
+                data_dir / store.file_name,
+                last_block=DEPLOYMENT_BLOCKS[layer] - 1,
+                **store.defaults(config),
+            )
+            for store in self.stores
+        }
+        self.event_abis = {
+            (to_checksum_address(config[stream.address_key]), to_hex(event_abi_to_log_topic(event_abi))): event_abi
+            for stream in WATCHED_STREAMS[layer]
+            for event_abi in [load_event_abi(stream.contract, stream.event_name)]
+        }
+        self.addresses = sorted({address for address, _ in self.event_abis})
+        self.event_store = EventStore(data_dir / "events" / layer)
+
+    def confirmed_block(self) -> int:
+        """Get the block the skill will start indexing from, past its confirmations."""
+        return self.w3.eth.block_number - int(self.config.get(f"{self.layer}_confirmations") or 0)
+
+    def get_block(self, number: int) -> BlockRef:
+        """Get a block by number."""
+        block = self.w3.eth.get_block(number)
+        return BlockRef(number=block["number"], hash=to_hex(block["hash"]))
+
+    def run(self) -> None:
+        """Bring every store of the chain up to the confirmed head."""
+        head = self.confirmed_block()
+        from_block = min(model.last_block for model in self.models.values()) + 1
+        windows = [
+            (start, min(start + self.window_size - 1, head)) for start in range(from_block, head + 1, self.window_size)
+        ]
+        logger.info(f"{self.layer}: backfilling blocks {from_block} to {head} in {len(windows)} windows.")
+        started = time.monotonic()
+        with ThreadPoolExecutor(max_workers=self.concurrency) as fetchers:
+            for index in range(0, len(windows), self.windows_per_checkpoint):
+                batch = windows[index : index + self.windows_per_checkpoint]
+                logs = list(fetchers.map(lambda window: fetch_logs(self.w3, self.addresses, *window), batch))
+                for window, window_logs in zip(batch, logs, strict=True):
+                    self.store_logs(window_logs, *window)
+                decoded = self.decoders.map(decode_logs, [self.event_abis] * len(batch), logs)
+                self.apply([event for events in decoded for event in events], self.get_block(batch[-1][1]))
+                done = batch[-1][1] - from_block + 1
+                rate = done / (time.monotonic() - started)
+                logger.info(f"{self.layer}: indexed up to block {batch[-1][1]} ({rate:.0f} blocks/s).")
+
+    def store_logs(self, logs: list[dict], from_block: int, to_block: int) -> None:
+        """Keep the logs of the watched events of a window in the event store the skill reads them back from."""
+        watched = [
+            log
+            for log in logs
+            if log["topics"] and (to_checksum_address(log["address"]), to_hex(log["topics"][0])) in self.event_abis
+        ]
+        self.event_store.append(sorted(self.event_abis), watched, from_block, to_block)
+
+    def apply(self, events: list[AttributeDict], block: BlockRef) -> None:
+        """Apply the events of a batch of windows to every store still behind it, then checkpoint them."""
+        events.sort(key=lambda event: (event.blockNumber, event.logIndex))
+        for store, model in self.models.items():
+            if model.last_block >= block.number:
+                continue
+            streams = {
+                (to_checksum_address(self.config[stream.address_key]), stream.event_name) for stream in store.streams
+            }
+            store.apply(
+                model,
+                [
+                    event
+                    for event in events
+                    if event.blockNumber > model.last_block and (event.address, event.event) in streams
+                ],
+            )
+            if isinstance(model, TokenBalances):
+                model.last_reconciled_block = block.number
+            if model.checkpoint(block, REORG_WINDOW):
+                model.save()
+            else:
+                model.save_checkpoints()
+
+
+@click.command()
+@click.option("--data-dir", type=click.Path(path_type=Path), default=Path("data"), help="The data_dir of the skill.")
+@click.option("--layer", type=click.Choice(sorted(DEPLOYMENT_BLOCKS)), multiple=True, help="Chains to backfill.")
+@click.option("--layer-1-rpc", default=None, help="Layer 1 endpoint, defaults to the skill config.")
+@click.option("--layer-2-rpc", default=None, help="Layer 2 endpoint, defaults to the skill config.")
+@click.option("--window-size", default=WINDOW_SIZE, show_default=True, help="Blocks per eth_getLogs.")
+@click.option("--concurrency", default=CONCURRENCY, show_default=True, help="Requests in flight per endpoint.")
+@click.option("--workers", default=None, type=int, help="Decoding processes, defaults to the number of CPUs.")
+@click.option("--checkpoint-every", default=WINDOWS_PER_CHECKPOINT, show_default=True, help="Windows per save.")
+def main(
+    data_dir: Path,
+    layer: tuple[str, ...],
+    layer_1_rpc: str | None,
+    layer_2_rpc: str | None,
+    window_size: int,
+    concurrency: int,
+    workers: int | None,
+    checkpoint_every: int,
+) -> None:
+    """Backfill the event stores of the lst skill, resuming from their last checkpoint."""
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(message)s")
+    skill_config = yaml.safe_load(SKILL_CONFIG_PATH.read_text(encoding="utf-8"))
+    config = dict(skill_config["models"]["lst_strategy"]["args"])
+    config["layer_1_rpc_endpoint"] = layer_1_rpc or config["layer_1_rpc_endpoint"]
+    config["layer_2_rpc_endpoint"] = layer_2_rpc or config["layer_2_rpc_endpoint"]
+    with ProcessPoolExecutor(max_workers=workers) as decoders, ThreadPoolExecutor() as chains:
+        backfills = [
+            ChainBackfill(name, config, data_dir, decoders, window_size, concurrency, checkpoint_every)
+            for name in layer or sorted(DEPLOYMENT_BLOCKS)
+        ]
+        for future in [chains.submit(backfill.run) for backfill in backfills]:
+            future.result()
+
+
+if __name__ == "__main__":
+    main()  # pylint: disable=no-value-for-parameter
@@ -0,0 +1,558 @@
+"""End-to-end benchmark of the agent cycle against two local nodes standing in for layer 1 and layer 2.
+
+Loads the skill with the aea skill test tools and runs `LstabciappFsmBehaviour` until a cycle
+finds no work left, against either of:
+
+- simulated nodes (the default): in-process chains served over JSON-RPC on localhost, seeded
+  with due checkpoints, claimable rewards, queued redeems, pending bridge messages and relayable
+  balances, whose contracts settle that work as the agent sends its transactions. No network
+  access or node binary is needed.
+- anvil nodes forking both chains at a pinned block, with whatever work is due there. Anvil
+  caches the forked state on disk, so a fork that ran once runs again offline.
+
+Reports the work items settled per minute, RPC requests per work item, the latency of the
+transactions and the wall clock time of every round.
+
+    python -m scripts.bench_e2e --checkpoints 20 --rewards 100 --redeems 50 --bridge-messages 50
+    python -m scripts.bench_e2e --node anvil --layer-1-fork-block 8500000 --layer-2-fork-block 17600000
+"""
+
+import time
+import socket
+import tempfile
+import threading
+import subprocess
+from typing import Any, cast
+from pathlib import Path
+from functools import partial
+from collections import Counter, defaultdict
+
+import yaml
+import click
+import requests
+from eth_account import Account
+from web3.providers import JSONBaseProvider
+from eth_utils.crypto import keccak
+from aea_ledger_ethereum import EthereumCrypto
+from eth_utils.conversions import to_hex
+
+from scripts.bench_scale import SkillLoader, load_abi, synthetic_address
+from packages.lstolas.skills.lst_skill.models import REDEEM_QUEUE_START_BLOCK, LstStrategy, TransactionSettler
+from packages.lstolas.skills.lst_skill.hashing import get_queued_hash
+from packages.lstolas.skills.lst_skill.behaviours import LstabciappFsmBehaviour
+from packages.lstolas.skills.lst_skill.rate_limit import send_batch
+from packages.lstolas.skills.lst_skill.simulation import Revert, SimulatedNode, SimulatedChain
+from packages.lstolas.skills.lst_skill.redeem_queue import OperationStatus
+from packages.lstolas.skills.lst_skill.behaviours_classes.base_behaviour import LstabciappStates
+from packages.lstolas.skills.lst_skill.behaviours_classes.trigger_l2_to_l1_bridge import TriggerOperations
+
+
+ROOT = Path(__file__).parent.parent
+SKILL_CONFIG = ROOT / "packages" / "lstolas" / "skills" / "lst_skill" / "skill.yaml"
+LAYER_1_CHAIN_ID = 11_155_111
+LAYER_2_CHAIN_ID = 10_200
+LAYER_1_START_BLOCK = 8_000_000
+HISTORY_BLOCKS = 1_000  # blocks the seeded events are spread over
+LIVENESS_PERIOD = 86_400
+MIN_OLAS_BALANCE = 10**20
+REWARD = 10**18
+SIGNATURES = b"\x01" * 65 * 3
+NODE_START_TIMEOUT = 30  # seconds
+AGENT_BALANCE = 10**20
+
+
+class Workload:
+    """Work seeded on simulated chains, settled by the contracts as the agent sends its transactions."""
+
+    def __init__(
+        self,
+        args: dict[str, Any],
+        checkpoints: int,
+        rewards: int,
+        redeems: int,
+        bridge_messages: int,
+        relays: bool,
+    ) -> None:
+        """Deploy the contracts at the addresses of the strategy args, and seed the work on fresh chains."""
+        self.args = args
+        self.seeded: Counter[str] = Counter()
+        self.settled: Counter[str] = Counter()
+        self.layer_1 = SimulatedChain(LAYER_1_CHAIN_ID, block_time=12)
+        self.layer_2 = SimulatedChain(LAYER_2_CHAIN_ID, block_time=5)
+        self.layer_1.mine(LAYER_1_START_BLOCK)
+        self.layer_2.mine(REDEEM_QUEUE_START_BLOCK)
+        self.checkpoints: dict[str, int] = {}
+        self.claimable: set[str] = set()
+        self.queued: set[str] = set()
+        self.processed: set[str] = set()
+        self.messages: dict[bytes, bytes] = {}  # encoded data: message id
+        self.executed: set[bytes] = set()
+        self.operation_balances = {operation.value: 0 for operation in TriggerOperations}
+        self.olas_balances = {
+            args["lst_unstake_relayer_address"].lower(): 0,
+            args["lst_distributor_address"].lower(): 0,
+        }
+
+        self.olas = self.layer_1.deploy(
+            args["layer_1_olas_address"],
+            load_abi("eightballer", "erc_20"),
+            balanceOf=lambda account: self.olas_balances.get(account, 0),
+        )
+        self.layer_1.deploy(
+            args["layer_1_amb_home"],
+            load_abi("eightballer", "amb_mainnet"),
+            relayedMessages=lambda message_id: message_id in self.executed,
+            executeSignatures=self.execute_signatures,
+        )
+        self.layer_1.deploy(
+            args["lst_unstake_relayer_address"],
+            load_abi("lstolas", "lst_unstake_relayer"),
+            relay=partial(self.forward_olas, args["lst_unstake_relayer_address"]),
+        )
+        self.layer_1.deploy(
+            args["lst_distributor_address"],
+            load_abi("lstolas", "lst_distributor"),
+            distribute=partial(self.forward_olas, args["lst_distributor_address"]),
+        )
+        self.manager = self.layer_2.deploy(
+            args["lst_staking_manager_address"], load_abi("lstolas", "lst_staking_manager")
+        )
+        self.collector = self.layer_2.deploy(
+            args["lst_collector_address"],
+            load_abi("lstolas", "lst_collector"),
+            minOlasBalance=lambda: MIN_OLAS_BALANCE,
+            mapOperationReceiverBalances=lambda operation: (
+                self.operation_balances[to_hex(operation)],
+                args["lst_distributor_address"],
+            ),
+            relayTokens=self.relay_tokens,
+        )
+        self.amb = self.layer_2.deploy(args["layer_2_amb_home"], load_abi("eightballer", "amb_gnosis"))
+        self.layer_2.deploy(
+            args["layer_2_amb_helper"], load_abi("eightballer", "amb_gnosis_helper"), getSignatures=self.signatures
+        )
+        self.processor = self.layer_2.deploy(
+            args["lst_staking_processor_l2_address"],
+            load_abi("lstolas", "lst_staking_processor_l2"),
+            queuedHashes=lambda queued_hash: to_hex(queued_hash) in self.queued,
+            processedHashes=lambda queued_hash: to_hex(queued_hash) in self.processed,
+            redeem=self.redeem,
+        )
+
+        start = self.layer_2.head + 1
+        self.seed_services(checkpoints, rewards, start)
+        self.seed_redeems(redeems, start)
+        self.seed_bridge_messages(bridge_messages, start)
+        if relays:
+            self.seed_relays()
+        self.layer_1.mine(HISTORY_BLOCKS + args["layer_1_confirmations"])
+        self.layer_2.mine(HISTORY_BLOCKS + args["layer_2_confirmations"])
+
+    @property
+    def remaining(self) -> Counter[str]:
+        """The seeded work items not settled yet."""
+        return self.seeded - self.settled
+
+    def seed_services(self, checkpoints: int, rewards: int, start: int) -> None:
+        """Stake services on staking proxies, the first `checkpoints` due and the first `rewards` claimable."""
+        staking_proxy_abi = load_abi("lstolas", "lst_staking_token_locked")
+        activity_module_abi = load_abi("lstolas", "lst_activity_module")
+        proxies = max(checkpoints, 1)
+        for index in range(proxies):
+            staking_proxy = synthetic_address(1, index)
+            self.checkpoints[staking_proxy] = 0 if index < checkpoints else self.layer_2.block_timestamp(start)
+            self.layer_2.deploy(
+                staking_proxy,
+                staking_proxy_abi,
+                tsCheckpoint=partial(self.checkpoints.__getitem__, staking_proxy),
+                livenessPeriod=lambda: LIVENESS_PERIOD,
+                checkpoint=partial(self.checkpoint, staking_proxy),
+            )
+        for index in range(max(checkpoints, rewards)):
+            activity_module = synthetic_address(2, index)
+            if index < rewards:
+                self.claimable.add(activity_module)
+            self.layer_2.deploy(activity_module, activity_module_abi, claim=partial(self.claim, activity_module))
+            self.manager.emit(
+                "Staked",
+                block=start + index % HISTORY_BLOCKS,
+                stakingProxy=synthetic_address(1, index % proxies),
+                serviceId=index,
+                activityModule=activity_module,
+            )
+        self.seeded.update(checkpoint=checkpoints, claim=rewards)
+
+    def seed_redeems(self, redeems: int, start: int) -> None:
+        """Queue redeem requests on the processor for lack of OLAS balance."""
+        operation = bytes.fromhex(TriggerOperations.UNSTAKE.value[2:])
+        for index in range(redeems):
+            batch_hash, target = keccak(b"batch" + index.to_bytes(8, "big")), synthetic_address(4, index)
+            self.queued.add(get_queued_hash(batch_hash, target, REWARD, operation))
+            self.processor.emit(
+                "RequestQueued",
+                block=start + index % HISTORY_BLOCKS,
+                batchHash=batch_hash,
+                target=target,
+                amount=REWARD,
+                operation=operation,
+                status=OperationStatus.INSUFFICIENT_OLAS_BALANCE.value,
+            )
+        self.seeded.update(redeem=redeems)
+
+    def seed_bridge_messages(self, bridge_messages: int, start: int) -> None:
+        """Relay tokens from the collector, each relay sending an AMB message the validators signed."""
+        for index in range(bridge_messages):
+            block = start + index % HISTORY_BLOCKS
+            transaction_hash = keccak(b"relay" + index.to_bytes(8, "big"))
+            message_id = keccak(b"message" + index.to_bytes(8, "big"))
+            encoded_data = message_id + bytes(340)
+            self.messages[encoded_data] = message_id
+            self.collector.emit(
+                "TokensRelayed",
+                block=block,
+                transaction_hash=transaction_hash,
+                l1Distributor=self.args["lst_distributor_address"],
+                amount=REWARD,
+            )
+            self.amb.emit(
+                "UserRequestForSignature",
+                block=block,
+                transaction_hash=transaction_hash,
+                messageId=message_id,
+                encodedData=encoded_data,
+            )
+        self.seeded.update(execute=bridge_messages)
+
+    def seed_relays(self) -> None:
+        """Fill the collector balance of every operation above the bridging threshold, and the layer 1 receivers."""
+        for operation in self.operation_balances:
+            self.operation_balances[operation] = MIN_OLAS_BALANCE
+        for account in self.olas_balances:
+            self.olas_balances[account] = REWARD
+        self.seeded.update(relay=len(self.operation_balances), finalize=len(self.olas_balances))
+
+    def checkpoint(self, staking_proxy: str) -> tuple[list, list, list]:
+        """Checkpoint a staking proxy at the current block."""
+        if self.layer_2.transaction is not None:
+            if self.checkpoints[staking_proxy] == 0:
+                self.settled.update(checkpoint=1)
+            self.checkpoints[staking_proxy] = self.layer_2.block_timestamp(self.layer_2.head)
+        return [], [], []
+
+    def claim(self, activity_module: str) -> int:
+        """Claim the rewards of an activity module, reverting when there is none."""
+        if activity_module not in self.claimable:
+            msg = "no rewards"
+            raise Revert(msg)
+        if self.layer_2.transaction is not None:
+            self.claimable.discard(activity_module)
+            self.settled.update(claim=1)
+        return REWARD
+
+    def redeem(self, batch_hash: bytes, target: str, amount: int, operation: bytes) -> None:
+        """Process a queued redeem request."""
+        queued_hash = get_queued_hash(batch_hash, target, amount, operation)
+        if queued_hash not in self.queued:
+            msg = "request not queued"
+            raise Revert(msg)
+        if self.layer_2.transaction is not None:
+            self.queued.discard(queued_hash)
+            self.processed.add(queued_hash)
+            self.settled.update(redeem=1)
+
+    def signatures(self, encoded_data: bytes) -> bytes:
+        """The validators signed every message."""
+        if encoded_data not in self.messages:
+            msg = "unknown message"
+            raise Revert(msg)
+        return SIGNATURES
+
+    def execute_signatures(self, encoded_data: bytes, _: bytes) -> None:
+        """Execute a signed message on layer 1."""
+        message_id = self.messages.get(encoded_data)
+        if message_id is None or message_id in self.executed:
+            msg = "message already executed"
+            raise Revert(msg)
+        if self.layer_1.transaction is not None:
+            self.executed.add(message_id)
+            self.settled.update(execute=1)
+
+    def relay_tokens(self, operation: bytes, _: bytes) -> None:
+        """Bridge the collector balance of an operation to layer 1."""
+        operation_hex = to_hex(operation)
+        if self.operation_balances[operation_hex] < MIN_OLAS_BALANCE:
+            msg = "balance below the minimum"
+            raise Revert(msg)
+        if self.layer_2.transaction is not None:
+            self.operation_balances[operation_hex] = 0
+            self.settled.update(relay=1)
+
+    def forward_olas(self, holder: str) -> None:
+        """Forward the OLAS balance of a layer 1 receiver, if any."""
+        if self.layer_1.transaction is None or not self.olas_balances[holder.lower()]:
+            return
+        value, self.olas_balances[holder.lower()] = self.olas_balances[holder.lower()], 0
+        self.olas.emit("Transfer", **{"from": holder, "to": self.args["lst_staking_manager_address"], "value": value})
+        self.settled.update(finalize=1)
+
+
+class AnvilNode:
+    """An anvil node forking a chain, on a free port of localhost."""
+
+    def __init__(self, fork_url: str, fork_block: int | None) -> None:
+        """Initialize the node."""
+        self.fork_url = fork_url
+        self.fork_block = fork_block
+        with socket.socket() as s:
+            s.bind(("127.0.0.1", 0))
+            self.port = s.getsockname()[1]
+        self.process: subprocess.Popen | None = None
+
+    @property
+    def url(self) -> str:
+        """The url of the node."""
+        return f"http://127.0.0.1:{self.port}"
+
+    def request(self, method: str, params: list) -> Any:
+        """Send a JSON-RPC request to the node."""
+        response = requests.post(
+            self.url, json={"jsonrpc": "2.0", "id": 1, "method": method, "params": params}, timeout=30
+        )
+        return response.json()["result"]
+
+    def start(self) -> None:
+        """Start the node and wait until it answers."""
+        command = ["anvil", "--silent", "--port", str(self.port), "--fork-url", self.fork_url]
+        if self.fork_block is not None:
+            command += ["--fork-block-number", str(self.fork_block)]
+        self.process = subprocess.Popen(command)
+        deadline = time.monotonic() + NODE_START_TIMEOUT
+        while time.monotonic() < deadline:
+            try:
+                self.request("eth_blockNumber", [])
+                return
+            except requests.ConnectionError:
+                time.sleep(0.2)
+        self.stop()
+        msg = f"anvil did not start forking {self.fork_url} within {NODE_START_TIMEOUT} seconds."
+        raise click.ClickException(msg)
+
+    def fund(self, address: str, value: int) -> None:
+        """Set the balance of an account."""
+        self.request("anvil_setBalance", [address, hex(value)])
+
+    def stop(self) -> None:
+        """Stop the node."""
+        if self.process is not None:
+            self.process.terminate()
+            self.process.wait(timeout=10)
+            self.process = None
+
+
+class CountingProvider(JSONBaseProvider):
+    """A web3 provider counting the requests another one sends, by chain and method."""
+
+    def __init__(self, provider: Any, chain: str, counts: Counter[tuple[str, str]]) -> None:
+        """Initialize the provider."""
+        super().__init__()
+        self.provider = provider
+        self.chain = chain
+        self.counts = counts
+        self._lock = threading.Lock()
+
+    @property
+    def endpoint_uri(self) -> str | None:
+        """The url of the wrapped provider."""
+        return getattr(self.provider, "endpoint_uri", None)
+
+    def make_request(self, method: Any, params: Any) -> Any:
+        """Count and send a request."""
+        with self._lock:
+            self.counts[self.chain, method] += 1
+        return self.provider.make_request(method, params)
+
+    def make_batch_request(self, requests: list[tuple[Any, Any]]) -> list[Any]:
+        """Count each request of a batch and send it."""
+        with self._lock:
+            for method, _ in requests:
+                self.counts[self.chain, method] += 1
+        return send_batch(self.provider, requests)
+
+    def is_connected(self, show_traceback: bool = False) -> bool:
+        """Whether the wrapped provider is connected."""
+        return self.provider.is_connected(show_traceback)
+
+
+class Measurements:
+    """The rounds, transactions and RPC requests of a run."""
+
+    def __init__(self) -> None:
+        """Initialize empty measurements."""
+        self.rounds: defaultdict[str, list[float]] = defaultdict(list)
+        self.transactions: list[tuple[float, bool]] = []
+        self.requests: Counter[tuple[str, str]] = Counter()
+
+    def instrument(self, fsm: LstabciappFsmBehaviour, settler: TransactionSettler, strategy: LstStrategy) -> None:
+        """Time every round and transaction, and count the RPC requests of both chains."""
+        for name in fsm.states:
+            state = fsm.get_state(name)
+            state.act = self.timed(state.act, self.rounds[name])  # type: ignore
+        settle = settler.build_and_settle_transaction
+
+        def timed_settle(*args: Any, **kwargs: Any) -> bool:
+            started = time.perf_counter()
+            succeeded = settle(*args, **kwargs)
+            self.transactions.append((time.perf_counter() - started, bool(succeeded)))
+            return succeeded
+
+        settler.build_and_settle_transaction = timed_settle  # type: ignore
+        for chain, ledger_api in (("layer_1", strategy.layer_1_api), ("layer_2", strategy.layer_2_api)):
+            ledger_api.api.provider = CountingProvider(ledger_api.api.provider, chain, self.requests)
+
+    @staticmethod
+    def timed(act: Any, durations: list[float]) -> Any:
+        """Wrap an act to record its durations."""
+
+        def timed_act() -> None:
+            started = time.perf_counter()
+            try:
+                act()
+            finally:
+                durations.append(time.perf_counter() - started)
+
+        return timed_act
+
+
+def percentile(values: list[float], share: float) -> float:
+    """Get the value below which a share of the sorted values falls."""
+    return values[min(len(values) - 1, int(share * len(values)))] if values else 0.0
+
+
+def report(measurements: Measurements, elapsed: float, settled: Counter[str], remaining: Counter[str] | None) -> None:
+    """Print the throughput, requests, transaction latencies and round times of a run."""
+    work_items = sum(settled.values())
+    details = ", ".join(f"{work} {count}" for work, count in sorted(settled.items()))
+    click.echo(
+        f"Settled {work_items} work items in {elapsed:.1f} s, {work_items / elapsed * 60:.1f} per minute ({details})"
+    )
+    if remaining:
+        click.echo(f"Left unsettled: {', '.join(f'{work} {count}' for work, count in sorted(remaining.items()))}")
+
+    requests_sent = sum(measurements.requests.values())
+    click.echo(f"RPC requests: {requests_sent}, {requests_sent / max(work_items, 1):.1f} per work item")
+    for (chain, method), count in measurements.requests.most_common(8):
+        click.echo(f"  {chain} {method:<28} {count:8}")
+
+    latencies = sorted(seconds for seconds, _ in measurements.transactions)
+    succeeded = sum(1 for _, success in measurements.transactions if success)
+    click.echo(f"Transactions: {len(latencies)} sent, {succeeded} succeeded")
+    if latencies:
+        click.echo(
+            "  latency "
+            + "  ".join(
+                f"{name} {percentile(latencies, share) * 1e3:.0f} ms"
+                for name, share in (("p50", 0.5), ("p90", 0.9), ("p99", 0.99), ("max", 1.0))
+            )
+        )
+
+    click.echo("Rounds:")
+    for name, durations in sorted(measurements.rounds.items(), key=lambda item: -sum(item[1])):
+        if durations:
+            click.echo(
+                f"  {name:<28} {len(durations):6} acts {sum(durations):9.2f} s total"
+                f" {sum(durations) / len(durations) * 1e3:9.1f} ms mean {max(durations) * 1e3:9.1f} ms max"
+            )
+
+
+@click.command()
+@click.option("--node", type=click.Choice(["simulated", "anvil"]), default="simulated", show_default=True)
+@click.option("--checkpoints", default=10, show_default=True, help="Staking proxies due for a checkpoint.")
+@click.option("--rewards", default=50, show_default=True, help="Services with rewards to claim.")
+@click.option("--redeems", default=20, show_default=True, help="Redeem requests queued.")
+@click.option("--bridge-messages", default=20, show_default=True, help="Signed bridge messages to execute.")
+@click.option("--relays/--no-relays", default=True, show_default=True, help="Balances to bridge and distribute.")
+@click.option("--block-interval", default=0.2, show_default=True, help="Seconds between simulated blocks.")
+@click.option("--layer-1-fork-url", default=None, help="Layer 1 endpoint anvil forks, the skill's by default.")
+@click.option("--layer-2-fork-url", default=None, help="Layer 2 endpoint anvil forks, the skill's by default.")
+@click.option("--layer-1-fork-block", type=int, default=None, help="Layer 1 block anvil forks at.")
+@click.option("--layer-2-fork-block", type=int, default=None, help="Layer 2 block anvil forks at.")
+@click.option("--max-duration", default=600.0, show_default=True, help="Seconds after which the run stops.")
+def main(
+    node: str,
+    checkpoints: int,
+    rewards: int,
+    redeems: int,
+    bridge_messages: int,
+    relays: bool,
+    block_interval: float,
+    layer_1_fork_url: str | None,
+    layer_2_fork_url: str | None,
+    layer_1_fork_block: int | None,
+    layer_2_fork_block: int | None,
+    max_duration: float,
+) -> None:
+    """Run the agent until no work is left, and report its throughput."""
+    with tempfile.TemporaryDirectory() as data_dir:
+        key_path = Path(data_dir) / "ethereum_private_key.txt"
+        key_path.write_text(to_hex(Account.create().key), encoding="utf-8")
+        crypto = EthereumCrypto(private_key_path=str(key_path))
+        strategy_args = yaml.safe_load(SKILL_CONFIG.read_text(encoding="utf-8"))["models"]["lst_strategy"]["args"]
+        nodes: list[Any]
+        workload = None
+        if node == "anvil":
+            nodes = [
+                AnvilNode(layer_1_fork_url or strategy_args["layer_1_rpc_endpoint"], layer_1_fork_block),
+                AnvilNode(layer_2_fork_url or strategy_args["layer_2_rpc_endpoint"], layer_2_fork_block),
+            ]
+        else:
+            workload = Workload(strategy_args, checkpoints, rewards, redeems, bridge_messages, relays)
+            nodes = [SimulatedNode(workload.layer_1, block_interval), SimulatedNode(workload.layer_2, block_interval)]
+        SkillLoader.setup_class(
+            config_overrides={
+                "models": {
+                    "lst_strategy": {
+                        "args": {
+                            "data_dir": data_dir,
+                            "layer_1_rpc_endpoint": nodes[0].url,
+                            "layer_2_rpc_endpoint": nodes[1].url,
+                        }
+                    }
+                }
+            }
+        )
+        context = SkillLoader._skill.skill_context  # noqa: SLF001
+        strategy = cast(LstStrategy, context.lst_strategy)
+        strategy.__dict__["crypto"] = crypto
+        for running in nodes:
+            running.start()
+            if node == "anvil":
+                running.fund(crypto.address, AGENT_BALANCE)
+
+        fsm = cast(LstabciappFsmBehaviour, context.behaviours.main)
+        measurements = Measurements()
+        measurements.instrument(fsm, cast(TransactionSettler, context.tx_settler), strategy)
+        strategy.setup()
+        fsm.setup()
+        started = time.perf_counter()
+        try:
+            while time.perf_counter() - started < max_duration:
+                fsm.act()
+                if fsm.current == LstabciappStates.WAITINGROUND.value:
+                    break  # a whole cycle found no work left
+                if fsm.current == LstabciappStates.UNHANDLEDERRORROUND.value:
+                    click.echo("The agent hit a fatal error, stopping.")
+                    break
+            elapsed = time.perf_counter() - started
+        finally:
+            strategy.teardown()
+            for running in nodes:
+                running.stop()
+        if workload is not None:
+            report(measurements, elapsed, workload.settled, workload.remaining)
+        else:
+            succeeded = sum(1 for _, success in measurements.transactions if success)
+            report(measurements, elapsed, Counter(transaction=succeeded), None)
+
+
+if __name__ == "__main__":
+    main()  # pylint: disable=no-value-for-parameter
@@ -0,0 +1,79 @@
+"""Microbenchmark of the hex conversion of decoded AMB `UserRequestForSignature` events.
+
+Compares the recursive `hexify` of web3 decoded events with the conversion of event records,
+which only touches the bytes fields of the event ABI.
+
+    python -m scripts.bench_event_hex
+"""
+
+import json
+import timeit
+from pathlib import Path
+
+import click
+from web3 import Web3
+from eth_abi import encode
+from eth_utils.abi import event_abi_to_log_topic
+from web3._utils.events import get_event_data  # noqa: PLC2701
+from web3.datastructures import AttributeDict
+
+from packages.lstolas.skills.lst_skill.events_processing import EventDecoder, hexify
+
+
+ROOT = Path(__file__).parent.parent
+AMB_ABI_PATH = ROOT / "packages" / "eightballer" / "contracts" / "amb_gnosis" / "build" / "amb_gnosis.json"
+AMB_HOME = "0x8448E15d0e706C0298dECA99F0b4744030e59d7d"
+ENCODED_DATA_BYTES = 372  # an AMB message header followed by a relayed token transfer call
+
+
+def make_log(event_abi: dict, index: int) -> dict:
+    """Build a `UserRequestForSignature` log with a realistic payload."""
+    return {
+        "address": AMB_HOME,
+        "topics": [event_abi_to_log_topic(event_abi), index.to_bytes(32, "big")],
+        "data": encode(["bytes"], [bytes([index % 256]) * ENCODED_DATA_BYTES]),
+        "blockNumber": 17_590_111 + index,
+        "blockHash": index.to_bytes(32, "big"),
+        "transactionHash": (index + 1).to_bytes(32, "big"),
+        "transactionIndex": 0,
+        "logIndex": index,
+    }
+
+
+@click.command()
+@click.option("--events", default=1_000, show_default=True, help="Events per run.")
+@click.option("--repeat", default=5, show_default=True, help="Runs, the best one is reported.")
+def main(events: int, repeat: int) -> None:
+    """Time the decoding and hex conversion of AMB events."""
+    abi = json.loads(AMB_ABI_PATH.read_text(encoding="utf-8"))["abi"]
+    event_abi = next(item for item in abi if item.get("name") == "UserRequestForSignature")
+    codec = Web3().codec
+    decoder = EventDecoder(event_abi, codec)
+    logs = [make_log(event_abi, index) for index in range(events)]
+    attribute_dicts = [AttributeDict.recursive(get_event_data(codec, event_abi, log)) for log in logs]
+    records = [decoder.decode(log) for log in logs]
+
+    groups = {  # the first case of each group is the baseline of the others
+        "hex conversion": {
+            "hexify(AttributeDict)": lambda: [hexify(event) for event in attribute_dicts],
+            "EventRecord.to_dict": lambda: [record.to_dict() for record in records],
+            "EventRecord.hex_args": lambda: [record.hex_args.encodedData for record in records],
+        },
+        "decoding and hex conversion": {
+            "get_event_data + hexify": lambda: [
+                hexify(AttributeDict.recursive(get_event_data(codec, event_abi, log))) for log in logs
+            ],
+            "EventDecoder + to_dict": lambda: [decoder.decode(log).to_dict() for log in logs],
+        },
+    }
+    for group, cases in groups.items():
+        click.echo(group)
+        baseline = None
+        for name, case in cases.items():
+            seconds = min(timeit.repeat(case, number=1, repeat=repeat)) / events
+            baseline = baseline or seconds
+            click.echo(f"  {name:<26} {seconds * 1e6:8.2f} us/event  {baseline / seconds:5.1f}x")
+
+
+if __name__ == "__main__":
+    main()  # pylint: disable=no-value-for-parameter
@@ -0,0 +1,291 @@
+"""Scale benchmark of the work checks of the skill against simulated chains.
+
+Loads the skill with the aea skill test tools, points both ledger apis at in-process simulated
+chains holding thousands of staked services, bridge messages and redeem requests, and times
+`CheckAnyWorkRound` with the check of every round it runs, in three phases:
+
+- cold: the first check, indexing the whole history;
+- new blocks: a check after a few new blocks with new events;
+- idle: a check without any new block.
+
+The scenario is built so that no round triggers, so every check runs. The RPC requests of each
+check are counted by method, and the peak memory of each phase is traced.
+
+    python -m scripts.bench_scale --services 100 --services 1000 --services 5000
+"""
+
+import json
+import time
+import tempfile
+import tracemalloc
+from typing import Any, cast
+from pathlib import Path
+from collections import Counter
+from dataclasses import field, dataclass
+
+import click
+from eth_utils.crypto import keccak
+from eth_utils.address import to_checksum_address
+from aea.test_tools.test_skill import BaseSkillTestCase
+
+from packages.lstolas.skills.lst_skill import PUBLIC_ID
+from packages.lstolas.skills.lst_skill.models import REDEEM_QUEUE_START_BLOCK, LstStrategy
+from packages.lstolas.skills.lst_skill.behaviours import CheckAnyWorkRound
+from packages.lstolas.skills.lst_skill.simulation import Revert, SimulatedChain
+from packages.lstolas.skills.lst_skill.redeem_queue import OperationStatus
+from packages.lstolas.skills.lst_skill.behaviours_classes.base_behaviour import BaseState, LstabciappStates
+from packages.lstolas.skills.lst_skill.behaviours_classes.trigger_l2_to_l1_bridge import TriggerOperations
+
+
+ROOT = Path(__file__).parent.parent
+LAYER_1_CHAIN_ID = 11_155_111
+LAYER_2_CHAIN_ID = 10_200
+LAYER_1_START_BLOCK = 8_000_000
+SERVICES_PER_PROXY = 50
+LIVENESS_PERIOD = 86_400
+MIN_OLAS_BALANCE = 10**21
+ENCODED_DATA_BYTES = 372  # an AMB message header followed by a relayed token transfer call
+
+
+def load_abi(author: str, name: str) -> list[dict]:
+    """Load the ABI of a contract package."""
+    path = ROOT / "packages" / author / "contracts" / name / "build" / f"{name}.json"
+    return json.loads(path.read_text(encoding="utf-8"))["abi"]
+
+
+def synthetic_address(kind: int, index: int) -> str:
+    """Get a distinct address per kind of entity and index."""
+    return to_checksum_address(kind.to_bytes(2, "big") + index.to_bytes(18, "big"))
+
+
+class Scenario:
+    """The contracts of both chains, answering as if no work was due, and the events they emit.
+
+    Services are staked across staking proxies whose checkpoints are recent and whose activity
+    modules have nothing to claim. Every bridge message is already executed on layer 1, every
+    redeem request was processed, the collector balances stay below the bridging threshold and
+    the OLAS transfers on layer 1 never touch the watched addresses.
+    """
+
+    def __init__(self, strategy: LstStrategy, blocks_per_batch: int) -> None:
+        """Deploy the contracts the skill reads on fresh chains."""
+        self.blocks_per_batch = blocks_per_batch
+        self.confirmations = (strategy.layer_1_confirmations, strategy.layer_2_confirmations)
+        self.count = 0
+        self.layer_1 = SimulatedChain(LAYER_1_CHAIN_ID, block_time=12)
+        self.layer_2 = SimulatedChain(LAYER_2_CHAIN_ID, block_time=5)
+        self.layer_1.mine(LAYER_1_START_BLOCK)
+        self.layer_2.mine(REDEEM_QUEUE_START_BLOCK)
+
+        self.layer_1.deploy(
+            strategy.layer_1_amb_home, load_abi("eightballer", "amb_mainnet"), relayedMessages=lambda _: True
+        )
+        self.olas = self.layer_1.deploy(
+            strategy.layer_1_olas_token_address, load_abi("eightballer", "erc_20"), balanceOf=lambda _: 0
+        )
+        self.manager = self.layer_2.deploy(
+            strategy.lst_staking_manager_address, load_abi("lstolas", "lst_staking_manager")
+        )
+        self.collector = self.layer_2.deploy(
+            strategy.lst_collector_address,
+            load_abi("lstolas", "lst_collector"),
+            minOlasBalance=lambda: MIN_OLAS_BALANCE,
+            mapOperationReceiverBalances=lambda _: (0, strategy.lst_distributor_address),
+        )
+        self.amb = self.layer_2.deploy(strategy.layer_2_amb_home, load_abi("eightballer", "amb_gnosis"))
+        self.layer_2.deploy(
+            strategy.layer_2_amb_helper, load_abi("eightballer", "amb_gnosis_helper"), getSignatures=self.no_signatures
+        )
+        self.processor = self.layer_2.deploy(
+            strategy.lst_staking_processor_l2_address,
+            load_abi("lstolas", "lst_staking_processor_l2"),
+            queuedHashes=lambda _: False,
+            processedHashes=lambda _: True,
+        )
+        self.staking_proxy_abi = load_abi("lstolas", "lst_staking_token_locked")
+        self.activity_module_abi = load_abi("lstolas", "lst_activity_module")
+
+    @staticmethod
+    def no_signatures(_: bytes) -> bytes:
+        """The validators have not signed any message."""
+        msg = "signatures not collected"
+        raise Revert(msg)
+
+    def last_checkpoint(self) -> int:
+        """Every staking proxy was checkpointed at the current head."""
+        return self.layer_2.block_timestamp(self.layer_2.head)
+
+    def add(self, count: int) -> None:
+        """Emit the events of `count` more services, bridge messages, redeem requests and transfers.
+
+        They are spread over the next `blocks_per_batch` blocks, which are then mined and confirmed.
+        """
+        start_2, start_1 = self.layer_2.head + 1, self.layer_1.head + 1
+        for offset, index in enumerate(range(self.count, self.count + count)):
+            block_2 = start_2 + offset * self.blocks_per_batch // count
+            block_1 = start_1 + offset * self.blocks_per_batch // count
+            self.add_service(index, block_2)
+            self.add_bridge_message(index, block_2)
+            self.add_redeem_request(index, block_2)
+            self.olas.emit(
+                "Transfer",
+                block=block_1,
+                **{"from": synthetic_address(6, index), "to": synthetic_address(7, index), "value": 10**18},
+            )
+        self.count += count
+        self.layer_1.mine(self.blocks_per_batch + self.confirmations[0])
+        self.layer_2.mine(self.blocks_per_batch + self.confirmations[1])
+
+    def add_service(self, index: int, block: int) -> None:
+        """Stake a service on a staking proxy, deploying the proxy with its first service."""
+        staking_proxy = synthetic_address(1, index // SERVICES_PER_PROXY)
+        activity_module = synthetic_address(2, index)
+        if staking_proxy not in self.layer_2.contracts:
+            self.layer_2.deploy(
+                staking_proxy,
+                self.staking_proxy_abi,
+                tsCheckpoint=self.last_checkpoint,
+                livenessPeriod=lambda: LIVENESS_PERIOD,
+            )
+        self.layer_2.deploy(activity_module, self.activity_module_abi)  # nothing to claim, `claim` reverts
+        self.manager.emit(
+            "Staked", block=block, stakingProxy=staking_proxy, serviceId=index, activityModule=activity_module
+        )
+
+    def add_bridge_message(self, index: int, block: int) -> None:
+        """Relay tokens from the collector, sending an AMB message in the same transaction."""
+        transaction_hash = keccak(b"relay" + index.to_bytes(8, "big"))
+        self.collector.emit(
+            "TokensRelayed",
+            block=block,
+            transaction_hash=transaction_hash,
+            l1Distributor=synthetic_address(3, 0),
+            amount=1,
+        )
+        self.amb.emit(
+            "UserRequestForSignature",
+            block=block,
+            transaction_hash=transaction_hash,
+            messageId=keccak(b"message" + index.to_bytes(8, "big")),
+            encodedData=bytes([index % 256]) * ENCODED_DATA_BYTES,
+        )
+        self.collector.emit("ProtocolBalanceUpdated", block=block, protocolBalance=index)
+
+    def add_redeem_request(self, index: int, block: int) -> None:
+        """Queue a redeem request on the processor for lack of OLAS balance."""
+        self.processor.emit(
+            "RequestQueued",
+            block=block,
+            batchHash=keccak(b"batch" + index.to_bytes(8, "big")),
+            target=synthetic_address(4, index),
+            amount=10**18,
+            operation=bytes.fromhex(TriggerOperations.UNSTAKE.value[2:]),
+            status=OperationStatus.INSUFFICIENT_OLAS_BALANCE.value,
+        )
+
+    @property
+    def requests(self) -> Counter[str]:
+        """The requests served by both chains, by method."""
+        return self.layer_1.requests + self.layer_2.requests
+
+
+@dataclass
+class Timing:
+    """The time and requests a check took."""
+
+    seconds: float = 0.0
+    requests: Counter[str] = field(default_factory=Counter)
+
+
+class SkillLoader(BaseSkillTestCase):
+    """Loads the skill outside of a test session."""
+
+    path_to_skill = ROOT / "packages" / PUBLIC_ID.author / "skills" / PUBLIC_ID.name
+
+
+def time_checks(check_any_work: CheckAnyWorkRound, scenario: Scenario, timings: dict[str, Timing]) -> None:
+    """Time the check of every round `CheckAnyWorkRound` runs, as it runs it."""
+    for state, _ in check_any_work.conditional_behaviours_to_events:
+        instance = cast(BaseState, check_any_work.context.behaviours.main.get_state(state.value))
+        is_triggered = type(instance).is_triggered.__get__(instance)
+        timing = timings[type(instance).__name__] = Timing()
+
+        def timed(is_triggered: Any = is_triggered, timing: Timing = timing) -> bool:
+            before = scenario.requests
+            started = time.perf_counter()
+            try:
+                return is_triggered()
+            finally:
+                timing.seconds += time.perf_counter() - started
+                timing.requests += scenario.requests - before
+
+        instance.is_triggered = timed  # type: ignore
+
+
+def run_phase(check_any_work: CheckAnyWorkRound, scenario: Scenario, trace_memory: bool) -> tuple[dict, int]:
+    """Run `CheckAnyWorkRound` once, and get the timing of every check with the peak traced memory."""
+    timings: dict[str, Timing] = {}
+    time_checks(check_any_work, scenario, timings)
+    if trace_memory:
+        tracemalloc.start()
+    before = scenario.requests
+    started = time.perf_counter()
+    check_any_work.act()
+    timings["CheckAnyWorkRound"] = Timing(time.perf_counter() - started, scenario.requests - before)
+    peak = 0
+    if trace_memory:
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    if check_any_work.event.value != "NO_WORK":
+        msg = f"A round triggered with {check_any_work.event}, the scenario should leave no work."
+        raise click.ClickException(msg)
+    return timings, peak
+
+
+def report(services: int, phase: str, timings: dict[str, Timing], peak: int) -> None:
+    """Print the timings of a phase."""
+    click.echo(f"{services:>8} services, {phase} (peak traced memory {peak / 2**20:.1f} MiB)")
+    for name, timing in timings.items():
+        top = ", ".join(f"{method} {count}" for method, count in timing.requests.most_common(3))
+        click.echo(f"  {name:<28} {timing.seconds * 1e3:10.1f} ms {sum(timing.requests.values()):8} requests  {top}")
+
+
+@click.command()
+@click.option(
+    "--services", "sizes", multiple=True, type=int, default=(100, 1_000), show_default=True, help="Services to stake."
+)
+@click.option("--blocks", default=10_000, show_default=True, help="Blocks the history of each chain spans.")
+@click.option("--new-events", default=10, show_default=True, help="Events of each kind in the new blocks.")
+@click.option("--trace-memory/--no-trace-memory", default=True, show_default=True, help="Trace the peak memory.")
+def main(sizes: tuple[int, ...], blocks: int, new_events: int, trace_memory: bool) -> None:
+    """Time the work checks of the skill as the number of services, messages and requests grows."""
+    if trace_memory:
+        click.echo("Timings include the overhead of tracing the memory, see --no-trace-memory.")
+    for services in sizes:
+        with tempfile.TemporaryDirectory() as data_dir:
+            SkillLoader.setup_class(config_overrides={"models": {"lst_strategy": {"args": {"data_dir": data_dir}}}})
+            context = SkillLoader._skill.skill_context  # noqa: SLF001
+            strategy = cast(LstStrategy, context.lst_strategy)
+            scenario = Scenario(strategy, blocks_per_batch=blocks)
+            strategy.layer_1_api.api.provider = scenario.layer_1
+            strategy.layer_2_api.api.provider = scenario.layer_2
+            strategy.setup()
+            for indexer in (strategy.layer_1_indexer, strategy.layer_2_indexer):
+                indexer.head_ttl = 0  # every check sees the new blocks
+            check_any_work = cast(
+                CheckAnyWorkRound, context.behaviours.main.get_state(LstabciappStates.CHECKANYWORKROUND.value)
+            )
+            check_any_work.setup()
+            try:
+                scenario.add(services)
+                report(services, "cold", *run_phase(check_any_work, scenario, trace_memory))
+                scenario.blocks_per_batch = 10
+                scenario.add(new_events)
+                report(services, "new blocks", *run_phase(check_any_work, scenario, trace_memory))
+                report(services, "idle", *run_phase(check_any_work, scenario, trace_memory))
+            finally:
+                strategy.teardown()
+
+
+if __name__ == "__main__":
+    main()  # pylint: disable=no-value-for-parameter